@@ -1,116 +1,94 @@
-import os
-import json
-import re
-import tempfile
-import pandas as pd
 import streamlit as st
-import tabula
-import pdfplumber
 
 from datetime import datetime, timezone, timedelta
+from fpk.bundle import zip_bytes
+from fpk import antrian, blok_log, riwayat
+from fpk.preload import mulai_preload
+from fpk.store import get_store
+from fpk.triage import siapkan_upload, jalankan_jobs, bersihkan_jobs
 
 # ── CONFIG ──────────────────────────────────────────────────
 st.set_page_config(page_title="FPK Converter", page_icon="⚡", layout="centered")
 
-LOG_FILE = "log_konversi.json"
-
 def now_wib():
     return datetime.now(timezone.utc) + timedelta(hours=7)
 
-def load_log():
-    if os.path.exists(LOG_FILE):
-        try:
-            with open(LOG_FILE, "r") as f:
-                return json.load(f)
-        except Exception:
-            return []
-    return []
-
 def save_log(entry: dict):
-    log = load_log()
-    log.insert(0, entry)
-    with open(LOG_FILE, "w") as f:
-        json.dump(log[:100], f, ensure_ascii=False, indent=2)
+    riwayat.tambah(entry)
 
 def hapus_log():
-    if os.path.exists(LOG_FILE):
-        os.remove(LOG_FILE)
+    riwayat.hapus_semua()
 
 def update_log_status(nama_file: str, status: str):
     """Update status entri log berdasarkan nama file."""
-    log = load_log()
-    for item in log:
-        if item.get('nama_file') == nama_file:
-            item['status']        = status
-            item['waktu_selesai'] = now_wib().strftime("%d %b %Y, %H:%M") + " WIB" if status == "Selesai" else None
-            break
-    with open(LOG_FILE, "w") as f:
-        json.dump(log[:100], f, ensure_ascii=False, indent=2)
+    update_log_status_batch([nama_file], status)
+
+def update_log_status_batch(nama_files, status: str):
+    """Update status beberapa entri log sekaligus dalam satu kali tulis."""
+    waktu = now_wib().strftime("%d %b %Y, %H:%M") + " WIB" if status == "Selesai" else None
+    riwayat.update_status(nama_files, status, waktu)
 
 # ── PIN FILE ─────────────────────────────────────────────────
 PIN_FILE    = "pin_app.json"
 MAX_ATTEMPT = 5
 LOCKOUT_MIN = 5
 
+# Default PIN pertama kali (juga dipakai bila file rusak)
+pin_store = get_store(PIN_FILE, default=lambda: {"pin": "1234", "attempts": 0, "locked_until": None})
+
 def load_pin():
-    if os.path.exists(PIN_FILE):
-        try:
-            with open(PIN_FILE, "r") as f:
-                return json.load(f)
-        except Exception:
-            pass
-    # Default PIN pertama kali
-    data = {"pin": "1234", "attempts": 0, "locked_until": None}
-    save_pin(data)
-    return data
+    return pin_store.read()
 
 def save_pin(data: dict):
-    with open(PIN_FILE, "w") as f:
-        json.dump(data, f)
+    pin_store.write(data)
 
-def is_locked(data: dict):
+def _cek_lock(data: dict):
+    """(locked, sisa menit); reset counter di tempat bila masa kunci sudah lewat."""
     if data.get("locked_until"):
         locked_until = datetime.fromisoformat(data["locked_until"])
         if now_wib() < locked_until:
             sisa = (locked_until - now_wib()).seconds // 60 + 1
             return True, sisa
-        else:
-            data["attempts"]    = 0
-            data["locked_until"] = None
-            save_pin(data)
+        data["attempts"]    = 0
+        data["locked_until"] = None
     return False, 0
 
+def is_locked(data: dict):
+    kadaluarsa   = bool(data.get("locked_until"))
+    locked, sisa = _cek_lock(data)
+    if kadaluarsa and not locked:
+        pin_store.update(_cek_lock)
+    return locked, sisa
+
 def check_pin(input_pin: str):
-    data  = load_pin()
-    locked, sisa = is_locked(data)
-    if locked:
-        return False, f"🔒 Terlalu banyak percobaan. Coba lagi dalam **{sisa} menit**."
-    if input_pin == data["pin"]:
-        data["attempts"]    = 0
-        data["locked_until"] = None
-        save_pin(data)
-        return True, ""
-    else:
+    def _cek(data):
+        locked, sisa = _cek_lock(data)
+        if locked:
+            return False, f"🔒 Terlalu banyak percobaan. Coba lagi dalam **{sisa} menit**."
+        if input_pin == data["pin"]:
+            data["attempts"]    = 0
+            data["locked_until"] = None
+            return True, ""
         data["attempts"] += 1
         sisa_attempt = MAX_ATTEMPT - data["attempts"]
         if data["attempts"] >= MAX_ATTEMPT:
             data["locked_until"] = (now_wib() + timedelta(minutes=LOCKOUT_MIN)).isoformat()
-            save_pin(data)
             return False, f"🔒 PIN salah {MAX_ATTEMPT}x. Dikunci selama **{LOCKOUT_MIN} menit**."
-        save_pin(data)
         return False, f"❌ PIN salah. Sisa percobaan: **{sisa_attempt}x**."
+    # Read-modify-write di bawah lock agar percobaan dari sesi lain tidak hilang
+    return pin_store.update(_cek)
 
 def change_pin(pin_lama: str, pin_baru: str, pin_konfirm: str):
-    data = load_pin()
-    if pin_lama != data["pin"]:
-        return False, "❌ PIN lama tidak cocok."
-    if len(pin_baru) < 4:
-        return False, "❌ PIN baru minimal 4 karakter."
-    if pin_baru != pin_konfirm:
-        return False, "❌ Konfirmasi PIN tidak cocok."
-    data["pin"] = pin_baru
-    save_pin(data)
-    return True, "✅ PIN berhasil diubah."
+    def _ganti(data):
+        if pin_lama != data["pin"]:
+            return False, "❌ PIN lama tidak cocok."
+        if len(pin_baru) < 4:
+            return False, "❌ PIN baru minimal 4 karakter."
+        if pin_baru != pin_konfirm:
+            return False, "❌ Konfirmasi PIN tidak cocok."
+        data["pin"] = pin_baru
+        return True, "✅ PIN berhasil diubah."
+    return pin_store.update(_ganti)
 
 # ── THEME CSS ────────────────────────────────────────────────
 def inject_css(dark: bool):
@@ -498,68 +476,28 @@ if not st.session_state.logged_in:
                 st.error(msg)
     st.stop()
 
-
-# ── HELPERS ──────────────────────────────────────────────────
-def ambil_metadata_pdf(pdf_path):
-    nama_file, tingkat = "Hasil_Konversi_FPK", "UNKNOWN"
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = pdf.pages[0].extract_text() or ""
-            bulan_pola = (r"(JANUARI|FEBRUARI|MARET|APRIL|MEI|JUNI|JULI|"
-                          r"AGUSTUS|SEPTEMBER|OKTOBER|NOVEMBER|DESEMBER)")
-            m_b = re.search(f"{bulan_pola}\\s+(\\d{{4}})", text, re.IGNORECASE)
-            m_t = re.search(r"Tingkat\s+Pelayanan\s*:\s*(RITL|RJTL|RITP|RJTP)", text, re.IGNORECASE)
-            if m_b:
-                bulan   = m_b.group(1).upper()
-                tahun   = m_b.group(2)
-                tingkat = m_t.group(1).upper() if m_t else "FPK"
-                nama_file = f"FPK_{tingkat}_{bulan}_{tahun}"
-            elif m_t:
-                tingkat   = m_t.group(1).upper()
-                nama_file = f"FPK_{tingkat}"
-    except Exception as e:
-        print(f"Gagal baca metadata: {e}")
-    return nama_file, tingkat
-
-
-def process_data(pdf_path):
-    df_list = tabula.read_pdf(pdf_path, pages='all', multiple_tables=True,
-                              lattice=True, pandas_options={'header': None})
-    if not df_list:
-        raise ValueError("PDF tidak terbaca.")
-    cleaned = [df for df in df_list if df.shape[1] >= 6 and len(df) > 1]
-    df = pd.concat(cleaned, ignore_index=True)
-    df_data = df.iloc[:, :6].copy()
-    df_data = df_data[pd.to_numeric(df_data.iloc[:, 0], errors='coerce').notna()]
-    df_data.columns = ['No. Urut', 'No.SEP', 'Tgl. Verifikasi', 'Biaya Riil RS', 'Diajukan', 'Disetujui']
-    df_data['No.SEP'] = (df_data['No.SEP'].astype(str)
-                         .str.replace(r'[^a-zA-Z0-9]', '', regex=True).str.strip())
-    df_data['Disetujui'] = (pd.to_numeric(
-        df_data['Disetujui'].astype(str).str.replace(r'[^0-9]', '', regex=True),
-        errors='coerce').fillna(0).astype(int))
-    return df_data[['No.SEP', 'Disetujui']].reset_index(drop=True)
+# pandas/tabula/pdfplumber tidak diimpor di halaman login; panaskan di background
+mulai_preload()
 
 
-def render_result(res, idx=0):
-    """Render satu hasil konversi (stats + preview + download)."""
-    tingkat = res['tingkat']
+# ── HELPERS ──────────────────────────────────────────────────
+def stats_html(jumlah, total, tingkat, sub_jumlah="SEP records", sub_total="total disetujui"):
+    """Kartu stats konversi; dipakai hasil akhir & panel progres live."""
     t_lower = tingkat.lower()
     t_label = ("🏥 Rawat Inap (RITL)" if tingkat == "RITL"
                else "🏃 Rawat Jalan (RJTL)" if tingkat == "RJTL" else tingkat)
-    total_rp = f"Rp {res['total']:,.0f}".replace(",", ".")
-
-    st.markdown(f'<div class="file-badge">📄 {res["filename"]}</div>', unsafe_allow_html=True)
-    st.markdown(f"""
+    total_rp = f"Rp {total:,.0f}".replace(",", ".")
+    return f"""
     <div class="stats-grid">
         <div class="stat-card">
             <div class="stat-label">Jumlah Data</div>
-            <div class="stat-value">{res['count']}</div>
-            <div class="stat-sub">SEP records</div>
+            <div class="stat-value">{jumlah}</div>
+            <div class="stat-sub">{sub_jumlah}</div>
         </div>
         <div class="stat-card green-top">
             <div class="stat-label">Total Nominal</div>
             <div class="stat-value green">{total_rp}</div>
-            <div class="stat-sub">total disetujui</div>
+            <div class="stat-sub">{sub_total}</div>
         </div>
         <div class="stat-card blue-top" style="grid-column:1/-1;">
             <div class="stat-label">Tingkat Pelayanan</div>
@@ -567,11 +505,12 @@ def render_result(res, idx=0):
             <div class="stat-sub" style="margin-top:0.6rem;">terdeteksi otomatis dari PDF</div>
         </div>
     </div>
-    """, unsafe_allow_html=True)
+    """
 
-    st.divider()
-    st.subheader("Preview Data")
-    df_prev = res['df'].copy()
+
+def tabel_preview(df):
+    """Tabel No.SEP + nominal bernomor urut (kolom dipilih tanpa salinan data)."""
+    df_prev = df[['No.SEP', 'Disetujui']]
     df_prev.insert(0, 'No', range(1, 1 + len(df_prev)))
     st.dataframe(df_prev, use_container_width=True, height=280, hide_index=True,
                  column_config={
@@ -579,15 +518,86 @@ def render_result(res, idx=0):
                      "Disetujui": st.column_config.NumberColumn("Nominal Cair", format="Rp %d"),
                  })
 
+
+def render_result(res, idx=0):
+    """Render satu hasil konversi (stats + preview + download)."""
+    st.markdown(f'<div class="file-badge">📄 {res["filename"]}</div>', unsafe_allow_html=True)
+    st.markdown(stats_html(res['count'], res['total'], res['tingkat']), unsafe_allow_html=True)
+
+    st.divider()
+    st.subheader("Preview Data")
+    tabel_preview(res['df'])
+
+    # Info cache halaman & revisi dibanding konversi sebelumnya
+    info = res.get('halaman')
+    if info and info['dari_cache']:
+        st.caption(f"⚡ {info['dari_cache']}/{info['halaman']} halaman dari cache, "
+                   f"{info['diekstrak']} halaman diekstrak ulang")
+    if info and info.get('ocr'):
+        st.caption(f"🔍 {info['ocr']} halaman scan dibaca dengan OCR — cek ulang nominalnya")
+    diff = info.get('diff') if info else None
+    if diff:
+        n_add, n_del, n_chg = len(diff['ditambah']), len(diff['dihapus']), len(diff['berubah'])
+        if n_add or n_del or n_chg:
+            st.info(f"🔁 **Revisi terdeteksi** dibanding versi sebelumnya: "
+                    f"+{n_add} SEP baru · −{n_del} SEP hilang · {n_chg} nominal berubah")
+            with st.expander("Lihat perubahan SEP"):
+                if diff['berubah']:
+                    import pandas as pd
+                    st.dataframe(pd.DataFrame(diff['berubah']), use_container_width=True, hide_index=True)
+                if diff['ditambah']:
+                    st.markdown("**SEP baru:** " + ", ".join(diff['ditambah']))
+                if diff['dihapus']:
+                    st.markdown("**SEP hilang:** " + ", ".join(diff['dihapus']))
+        else:
+            st.caption("🔁 Sama dengan versi sebelumnya — tidak ada SEP yang berubah.")
+
+    # Hasil profiling (opt-in)
+    lap = info.get('profil') if info else None
+    if lap:
+        nama_prof = res['filename'].rsplit('.', 1)[0]
+        st.caption(f"🧪 Profil: {lap['durasi']:.2f} s total · tabula {lap['tabula_detik']:.2f} s "
+                   f"({len(lap['tabula'])} panggilan) · puncak memori {lap['puncak_mem'] / 1e6:.1f} MB")
+        if lap.get('memori'):
+            with st.expander("🧠 Memori per langkah"):
+                from fpk.profil import salinan
+                st.dataframe([{'Langkah': k, 'Panggilan': m['panggilan'],
+                               'Puncak (MB)': round(m['puncak'] / 1e6, 2),
+                               'Arrow (MB)': round(m['arrow'] / 1e6, 2),
+                               'Salinan': None if salinan(m) is None else round(salinan(m), 2),
+                               'Objek': m['objek'], 'Detik': round(m['detik'], 3)}
+                              for k, m in lap['memori'].items()],
+                             use_container_width=True, hide_index=True)
+        from fpk.profil import zip_laporan
+        st.download_button("⬇ Download Profil (.zip)",
+                           data=lambda: zip_laporan(lap, nama_prof),
+                           file_name=f"{nama_prof}_profil.zip", mime="application/zip",
+                           key=f"dl_prof_{idx}", on_click="ignore")
+
     # Cek duplikat No.SEP
     dup = res['df'][res['df']['No.SEP'].duplicated(keep=False)]
     if not dup.empty:
         dup_list = ', '.join(dup['No.SEP'].unique().tolist())
         st.warning(f"⚠️ **{len(dup['No.SEP'].unique())} No.SEP duplikat ditemukan:** {dup_list}")
+
+    # Validasi lain (format SEP, nominal 0, outlier, Disetujui > Diajukan)
+    mask = info.get('anomali') if info else None
+    if mask is not None:
+        from fpk import validasi
+        lain = mask & (validasi.SEMUA ^ validasi.DUPLIKAT)
+        if lain.any():
+            st.warning("🔎 **Anomali terdeteksi:** " + " · ".join(
+                f"{label} ({n})" for label, n in validasi.ringkas(lain).items()))
+            with st.expander("Lihat baris anomali"):
+                idx_anom = lain.nonzero()[0]
+                df_anom  = res['df'].iloc[idx_anom].copy()
+                df_anom['Anomali'] = validasi.keterangan(lain[idx_anom])
+                st.dataframe(df_anom, use_container_width=True, hide_index=True)
     st.divider()
     col1, col2 = st.columns([3, 1])
     with col1:
-        csv        = res['df'].to_csv(index=False).encode('utf-8')
+        # CSV dibuat saat tombol diklik, tidak ditahan di memori per tab
+        csv        = lambda df=res['df']: df.to_csv(index=False).encode('utf-8')
         downloaded = st.download_button(label="⬇ Download CSV", data=csv,
                                         file_name=res['filename'], mime="text/csv",
                                         key=f"dl_{idx}")
@@ -602,35 +612,38 @@ def render_result(res, idx=0):
         st.markdown('</div>', unsafe_allow_html=True)
 
 
-def build_chart(log_data):
-    if not log_data:
-        return None
-    bulan_order = ["JANUARI","FEBRUARI","MARET","APRIL","MEI","JUNI",
-                   "JULI","AGUSTUS","SEPTEMBER","OKTOBER","NOVEMBER","DESEMBER"]
-    records = {}
-    for item in log_data:
-        m = re.search(r'FPK_(?:RITL|RJTL|RITP|RJTP|FPK)?_?([A-Z]+)_(\d{4})', item['nama_file'])
-        period = f"{m.group(1)} {m.group(2)}" if m else "Lainnya"
-        tkt    = item.get('tingkat', 'FPK')
-        key    = (period, tkt)
-        records[key] = records.get(key, 0) + item['total']
-
-    if not records:
-        return None
+def id_pengguna():
+    """Identitas sesi untuk antrean adil server-wide (fpk.antrian)."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx else None
 
-    periods  = sorted(set(k[0] for k in records),
-                      key=lambda x: (x.split()[-1], bulan_order.index(x.split()[0])
-                                     if x.split()[0] in bulan_order else 99))
-    tingkats = sorted(set(k[1] for k in records))
 
-    rows = []
-    for p in periods:
-        row = {'Periode': p}
-        for tkt in tingkats:
-            row[tkt] = round(records.get((p, tkt), 0) / 1_000_000, 2)
-        rows.append(row)
+def simpan_gudang(df_res, job):
+    """Simpan baris SEP hasil konversi ke gudang data per periode (untuk analitik)."""
+    _, tahun, bulan = riwayat.periode_dari_nama(job['nama'])
+    if not tahun:
+        return
+    try:
+        from fpk import gudang
+        gudang.simpan(df_res, job['nama'], tahun, bulan, job['tingkat'], "converter", job['hash'])
+    except Exception as e:
+        print(f"Gagal simpan gudang SEP: {e}")
 
-    return pd.DataFrame(rows).set_index('Periode')
+
+def build_chart(rekap_rows):
+    """DataFrame chart (juta rupiah) per periode × tingkat dari riwayat.rekap_periode()."""
+    if not rekap_rows:
+        return None
+    rows = {}
+    for r in reversed(rekap_rows):
+        row = rows.setdefault(r['periode'], {'Periode': r['periode']})
+        tkt = r['tingkat'] or 'FPK'
+        row[tkt] = row.get(tkt, 0) + round(r['total'] / 1_000_000, 2)
+
+    import pandas as pd
+    tingkats = sorted({r['tingkat'] or 'FPK' for r in rekap_rows})
+    return pd.DataFrame(list(rows.values()), columns=['Periode'] + tingkats).fillna(0).set_index('Periode')
 
 
 # ══════════════════════════════════════════════════════════════
@@ -701,19 +714,37 @@ st.markdown("""
 with st.expander("ℹ️ Fitur & Cara Penggunaan"):
     st.markdown("""
     ### ⚡ Konversi PDF → CSV
-    - Upload satu atau beberapa PDF FPK BPJS sekaligus (maks 200MB/file)
+    - Upload satu atau beberapa PDF FPK BPJS sekaligus (maks 200MB & 2.000 halaman per file)
     - Klik **⚡ Proses Sekarang** — sistem otomatis membaca isi PDF
     - Nama file CSV terdeteksi otomatis dari PDF: **FPK_RITL_MARET_2026.csv** atau **FPK_RJTL_MARET_2026.csv**
     - Kalau upload lebih dari 1 PDF, hasil tiap file tampil di **tab terpisah**
     - Output CSV hanya berisi 2 kolom: **No.SEP** dan **Disetujui** — siap upload ke SIMRS
+    - File PDF yang identik otomatis dilewati; kalau nama CSV bentrok, file berikutnya diberi akhiran **_2**, **_3**, dst.
+    - File besar diproses lebih dulu secara paralel agar total waktu lebih singkat
+    - Selama proses, **pratinjau SEP halaman awal** langsung tampil; jumlah SEP & total nominal
+      bertambah live per halaman sampai ekstraksi penuh selesai
+    - Halaman hasil **scan** (gambar tanpa teks) otomatis dibaca dengan OCR Tesseract —
+      cek ulang nominalnya, hasil OCR bisa salah baca
+    - Kalau beberapa staf memproses bersamaan, file masuk **antrean server** bergiliran
+      antar pengguna — posisi antrean tampil di progress bar
+
+    ### 🧪 Profiling
+    - Buka **🧪 Profiling (opsional)** dan pilih file yang lambat sebelum klik proses
+    - Hasilnya bisa diunduh sebagai ZIP: profil CPU `.prof` (buka dengan snakeviz), snapshot alokasi & ringkasan teks
+    - Dari terminal: `python -m fpk.profil FILE.pdf -o hasil.prof`
+    - Bagian **🧠 Memori per langkah** menampilkan puncak memori, alokasi Arrow, salinan & objek
+      tiap langkah (tabula, concat, filter, ketik); benchmark data sintetis: `python -m fpk.bench_memori`
 
     ### ⚠️ Cek Duplikat No.SEP
     - Setelah diproses, sistem otomatis cek apakah ada **No.SEP yang muncul lebih dari sekali**
     - Kalau ada duplikat, muncul warning kuning beserta daftar No.SEP yang bermasalah
+    - Validasi tambahan: format No.SEP tidak valid, Disetujui 0/gagal dibaca,
+      nominal outlier, dan Disetujui melebihi Diajukan
     - Periksa data sebelum diserahkan ke rekan yang upload ke SIMRS
 
     ### 📥 Download & Status
     - Klik **⬇ Download CSV** untuk mengunduh hasil konversi
+    - Kalau lebih dari 1 file, klik **⬇ Download Semua** untuk satu file ZIP berisi semua CSV + `manifest.json`
     - Status di log otomatis berubah jadi **✓ Selesai** setelah download
     - Kalau belum didownload, status **⏳ Belum Diambil**
     - Bisa juga tandai manual lewat tombol **✓ Tandai** di log
@@ -727,8 +758,13 @@ with st.expander("ℹ️ Fitur & Cara Penggunaan"):
     - Warna berbeda per tingkat: **ungu = RITL**, **biru = RJTL**
     - Sumbu Y dalam satuan juta rupiah (M)
 
+    ### 📈 Analitik per SEP
+    - Semua baris SEP hasil konversi & audit disimpan per periode di folder `gudang_sep/`
+    - Aktifkan toggle **📈 Analitik per SEP** untuk total bulanan per tingkat & SEP nominal tertinggi tanpa upload ulang
+
     ### 🕓 Riwayat Konversi
-    - Semua aktivitas konversi tersimpan otomatis (maks 100 entri)
+    - Semua aktivitas konversi tersimpan otomatis di database lokal (tanpa batas entri)
+    - Filter per periode, tingkat & status; riwayat ditampilkan per halaman (10 entri)
     - Tampil: nama file, badge RITL/RJTL, waktu konversi, total nominal, jumlah SEP, status
     - Summary di atas log: total konversi, selesai, pending, total nominal kumulatif
     - Klik **Hapus Semua** untuk reset seluruh riwayat
@@ -752,25 +788,150 @@ uploaded_files = st.file_uploader(
 )
 
 if uploaded_files:
+    with st.expander("🧪 Profiling (opsional)"):
+        st.caption("Rekam profil CPU (.prof), snapshot alokasi memori & waktu tabula untuk file yang lambat.")
+        profil_files = st.multiselect("Profil file berikut", [uf.name for uf in uploaded_files],
+                                      key="profil_files", label_visibility="collapsed")
+
+    srv = antrian.status()
+    if srv['aktif'] or srv['menunggu']:
+        st.caption(f"🖥️ Server: {srv['aktif']}/{srv['slot']} slot ekstraksi terpakai · "
+                   f"{srv['menunggu']} file antre · {srv['pengguna']} pengguna aktif")
+
     if st.button("⚡ Proses Sekarang"):
-        results = []
-        errors  = []
+        results  = []
+        errors   = []
+        pengguna = id_pengguna()
+        with st.spinner("Memeriksa file..."):
+            triage = siapkan_upload(uploaded_files, pengguna)
+        jobs    = triage['jobs']
+        for d in triage['ditolak']:
+            st.error(f"⛔ {d['nama_upload']} ditolak: {d['alasan']}")
+        for d in triage['duplikat']:
+            st.info(f"ℹ️ {d['nama_upload']} identik dengan {d['sama_dengan']} — dilewati.")
+        for t in triage['tabrakan']:
+            st.warning(f"⚠️ {t['nama_upload']}: nama {t['nama_asli']}.csv sudah dipakai, disimpan sebagai {t['nama_baru']}.csv")
+
         prog    = st.progress(0, text="Memproses file...")
-        total_f = len(uploaded_files)
-
-        for i, uf in enumerate(uploaded_files):
-            prog.progress((i + 1) / total_f, text=f"Membaca: {uf.name} ({i+1}/{total_f})")
-            try:
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp:
-                    tmp.write(uf.getvalue())
-                    tmp_path = tmp.name
-
-                nama, tingkat = ambil_metadata_pdf(tmp_path)
-                df_res        = process_data(tmp_path)
-                total         = int(df_res['Disetujui'].sum())
-                jumlah        = len(df_res)
-                filename      = f"{nama}.csv"
-                os.unlink(tmp_path)
+        total_f = len(jobs)
+        n_done  = 0
+
+        # Panel progresif: pratinjau halaman awal + kartu stats yang bertambah
+        # per halaman selama ekstraksi penuh berjalan; dihapus setelah selesai.
+        # `kemajuan` ditulis thread worker, dibaca & digambar di thread ini.
+        live     = st.empty()
+        kemajuan = {j['urutan']: {'halaman': 0, 'total_hal': j['halaman'], 'n': 0, 'nominal': 0,
+                                  'awal': [], 'versi': 0, 'selesai': False}
+                    for j in jobs}
+        slot     = {}
+        with live.container():
+            wadah = [st.container()] if total_f == 1 else st.tabs([j['nama_upload'] for j in jobs])
+            for j, w in zip(jobs, wadah):
+                with w:
+                    st.markdown(f'<div class="file-badge">📄 {j["filename"]}</div>', unsafe_allow_html=True)
+                    slot[j['urutan']] = {'kartu': st.empty(), 'tabel': st.empty(),
+                                         'digambar': -1, 'pratinjau': None}
+
+        def lapor_antrian(posisi, n_menunggu):
+            if posisi:
+                prog.progress(n_done / total_f, text=f"⏳ Menunggu giliran server — posisi antrean "
+                                                      f"#{posisi} ({n_menunggu} file menunggu)")
+
+        # Pratinjau dibaca di thread sendiri; detak() hanya menggambar yang sudah siap
+        from concurrent.futures import ThreadPoolExecutor
+        ex_pratinjau  = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fpk-pratinjau")
+        fut_pratinjau = {}
+        try:
+            from fpk.extract import PRATINJAU_BARIS, pratinjau, process_data_incremental
+            from fpk.profil import profil_konversi
+
+            def pencatat(j):
+                k = kemajuan[j['urutan']]
+
+                def lapor(selesai, n_hal, df_p):
+                    k['n']       += len(df_p)
+                    k['nominal'] += int(df_p['Disetujui'].sum())
+                    if sum(len(d) for d in k['awal']) < PRATINJAU_BARIS:
+                        k['awal'].append(df_p)
+                    k['halaman'], k['total_hal'] = selesai, n_hal
+                    k['versi'] += 1
+                return lapor
+
+            def konversi(j):
+                if j['nama_upload'] in profil_files:
+                    (df_j, info_j), lap = profil_konversi(process_data_incremental, j['path'], j['nama'],
+                                                          j['hash'], lengkap=True, lapor=pencatat(j))
+                    info_j['profil'] = lap
+                    return df_j, info_j
+                return process_data_incremental(j['path'], j['nama'], j['hash'], lengkap=True,
+                                                lapor=pencatat(j))
+
+            def gambar(j):
+                k, s = kemajuan[j['urutan']], slot[j['urutan']]
+                if s['digambar'] == k['versi']:
+                    return
+                s['digambar'] = k['versi']
+                if k['selesai']:
+                    kartu = stats_html(k['n'], k['nominal'], j['tingkat'])
+                else:
+                    kartu = stats_html(k['n'], k['nominal'], j['tingkat'],
+                                       sub_jumlah=f"SEP · hal. {k['halaman']}/{k['total_hal']}",
+                                       sub_total="sementara, terus bertambah")
+                s['kartu'].markdown(kartu, unsafe_allow_html=True)
+                # Halaman awal tanpa teks (scan) → pratinjau dari potongan ekstraksi pertama
+                if s['pratinjau'] is False and k['awal']:
+                    s['pratinjau'] = True
+                    import pandas as pd
+                    with s['tabel'].container():
+                        st.caption("👀 Pratinjau SEP pertama — data lengkap menyusul")
+                        tabel_preview(pd.concat(k['awal'], ignore_index=True).head(PRATINJAU_BARIS))
+
+            def detak():
+                for j in jobs:
+                    s = slot[j['urutan']]
+                    if s['pratinjau'] is not None:
+                        continue
+                    fut = fut_pratinjau.get(j['urutan'])
+                    if fut is None:
+                        fut_pratinjau[j['urutan']] = ex_pratinjau.submit(pratinjau, j['path'])
+                        continue
+                    if not fut.done():
+                        continue
+                    try:
+                        df_p, dibaca = fut.result()
+                    except Exception as e:
+                        print(f"Gagal pratinjau {j['nama_upload']}: {e}")
+                        df_p, dibaca = None, 0
+                    s['pratinjau'] = df_p is not None and not df_p.empty
+                    if s['pratinjau']:
+                        with s['tabel'].container():
+                            st.caption(f"👀 Pratinjau {len(df_p)} SEP pertama (hal. 1–{dibaca}) "
+                                       f"— data lengkap menyusul")
+                            tabel_preview(df_p)
+                    s['digambar'] = -1
+                for j in jobs:
+                    gambar(j)
+
+            for i, (job, hasil, err) in enumerate(jalankan_jobs(jobs, konversi, pengguna=pengguna,
+                                                                lapor=lapor_antrian, detak=detak)):
+                n_done = i + 1
+                prog.progress(n_done / total_f, text=f"Selesai: {job['nama_upload']} ({n_done}/{total_f})")
+                if err is not None:
+                    errors.append(f"❌ {job['nama_upload']}: {err}")
+                    continue
+                # Satu parse 6 kolom bertipe: CSV pakai 2 kolom, gudang ikut menyimpan biaya riil
+                df_full, info = hasil
+                df_res   = df_full[['No.SEP', 'Disetujui']]
+                total    = int(df_res['Disetujui'].sum())
+                jumlah   = len(df_res)
+                filename = job['filename']
+                tingkat  = job['tingkat']
+
+                k = kemajuan[job['urutan']]
+                k.update(n=jumlah, nominal=total, selesai=True, versi=k['versi'] + 1)
+                if slot[job['urutan']]['pratinjau'] is None:
+                    slot[job['urutan']]['pratinjau'] = False
+                gambar(job)
 
                 results.append({
                     'filename': filename,
@@ -778,7 +939,10 @@ if uploaded_files:
                     'total'   : total,
                     'count'   : jumlah,
                     'tingkat' : tingkat,
+                    'urutan'  : job['urutan'],
+                    'halaman' : info,
                 })
+                simpan_gudang(df_full, job)
                 save_log({
                     'waktu'        : now_wib().strftime("%d %b %Y, %H:%M") + " WIB",
                     'nama_file'    : filename,
@@ -788,10 +952,13 @@ if uploaded_files:
                     'status'       : 'Belum Diambil',
                     'waktu_selesai': None,
                 })
-            except Exception as e:
-                errors.append(f"❌ {uf.name}: {e}")
+        finally:
+            ex_pratinjau.shutdown(wait=False, cancel_futures=True)
+            bersihkan_jobs(jobs)
 
+        live.empty()
         prog.empty()
+        results.sort(key=lambda r: r['urutan'])
         st.session_state.results = results
         if errors:
             for err in errors:
@@ -806,6 +973,15 @@ if st.session_state.get('results'):
     if len(results) == 1:
         render_result(results[0], idx=0)
     else:
+        waktu_zip = now_wib().strftime("%d %b %Y, %H:%M") + " WIB"
+        dl_all = st.download_button(
+            label=f"⬇ Download Semua ({len(results)} CSV, .zip)",
+            data=lambda: zip_bytes(results, waktu_zip),
+            file_name=f"FPK_Bundle_{now_wib().strftime('%Y%m%d_%H%M')}.zip",
+            mime="application/zip", key="dl_all")
+        if dl_all:
+            update_log_status_batch([r['filename'] for r in results], 'Selesai')
+            st.rerun()
         tab_labels = [f"{'🏥' if r['tingkat']=='RITL' else '🏃'} {r['tingkat']}" for r in results]
         tabs = st.tabs(tab_labels)
         for i, (tab, res) in enumerate(zip(tabs, results)):
@@ -817,140 +993,133 @@ if st.session_state.get('results'):
 # LOG & REKAP
 # ══════════════════════════════════════════════════════════════
 st.divider()
-log_data = load_log()
-
-# -- Monthly summary rekap --
-if log_data:
-    bulan_order = ["JANUARI","FEBRUARI","MARET","APRIL","MEI","JUNI",
-                   "JULI","AGUSTUS","SEPTEMBER","OKTOBER","NOVEMBER","DESEMBER"]
-    rekap = {}
-    for item in log_data:
-        m = re.search(r'FPK_(?:RITL|RJTL|RITP|RJTP|FPK)?_?([A-Z]+)_(\d{4})', item['nama_file'])
-        period = f"{m.group(1)} {m.group(2)}" if m else "Lainnya"
-        if period not in rekap:
-            rekap[period] = {'total': 0, 'count': 0, 'konversi': 0, 'tingkats': set()}
-        rekap[period]['total']    += item['total']
-        rekap[period]['count']    += item['jumlah']
-        rekap[period]['konversi'] += 1
-        rekap[period]['tingkats'].add(item.get('tingkat', ''))
-
-    sorted_periods = sorted(rekap.keys(),
-        key=lambda x: (x.split()[-1], bulan_order.index(x.split()[0])
-                       if x.split()[0] in bulan_order else 99), reverse=True)
-
+versi_log  = riwayat.versi()
+data_log   = blok_log.data(versi_log)
+ringkas    = data_log['ringkas']
+ada_log    = ringkas['total_entri'] > 0
+rekap_rows = data_log['rekap_rows']
+
+# -- Monthly summary rekap (satu elemen, HTML di-cache per versi log) --
+if ada_log:
     st.markdown('<div class="section-title">📅 Rekap Per Bulan</div>', unsafe_allow_html=True)
-    for p in sorted_periods:
-        r        = rekap[p]
-        total_rp = f"Rp {r['total']:,.0f}".replace(",", ".")
-        tkt_str  = " · ".join(sorted(t for t in r['tingkats'] if t))
-        st.markdown(f"""
-        <div class="rekap-card">
-            <div class="rekap-left">
-                <div class="rekap-period">{p}</div>
-                <div class="rekap-meta">{r['konversi']}x konversi &nbsp;·&nbsp; {r['count']} SEP &nbsp;·&nbsp; {tkt_str}</div>
-            </div>
-            <div class="rekap-total">{total_rp}</div>
-        </div>
-        """, unsafe_allow_html=True)
+    st.markdown(blok_log.rekap_bulan(versi_log), unsafe_allow_html=True)
     st.divider()
 
 # -- Chart --
-if log_data:
+if ada_log:
     st.markdown('<div class="section-title">📊 Rekap Per Periode</div>', unsafe_allow_html=True)
-    df_chart = build_chart(log_data)
+    df_chart = build_chart(rekap_rows)
     if df_chart is not None:
         st.bar_chart(df_chart, use_container_width=True, height=220,
                      color=["#a78bfa","#60a5fa","#34d399","#fb923c"][:len(df_chart.columns)])
     st.divider()
 
+# -- Analitik gudang data SEP --
+if ada_log and st.toggle("📈 Analitik per SEP (tanpa upload ulang)", key="analitik_sep"):
+    from fpk import gudang
+    df_bulanan = gudang.total_bulanan()
+    if df_bulanan.empty:
+        st.caption("Belum ada data SEP tersimpan.")
+    else:
+        df_bulanan['Periode'] = [f"{riwayat.BULAN_ORDER[b - 1]} {t}" for t, b in zip(df_bulanan['tahun'], df_bulanan['bulan'])]
+        st.dataframe(df_bulanan[['Periode', 'tingkat', 'n_sep', 'total']], use_container_width=True, hide_index=True,
+                     column_config={
+                         "tingkat": st.column_config.TextColumn("Tingkat"),
+                         "n_sep":   st.column_config.NumberColumn("Jumlah SEP"),
+                         "total":   st.column_config.NumberColumn("Total Disetujui", format="Rp %d"),
+                     })
+        st.markdown('<div class="section-title">🔎 SEP Nominal Tertinggi</div>', unsafe_allow_html=True)
+        df_top = gudang.outlier_teratas(10)
+        df_top['Periode'] = [f"{riwayat.BULAN_ORDER[b - 1]} {t}" for t, b in zip(df_top['tahun'], df_top['bulan'])]
+        st.dataframe(df_top[['Periode', 'tingkat', 'no_sep', 'disetujui', 'biaya_riil', 'selisih']],
+                     use_container_width=True, hide_index=True,
+                     column_config={
+                         "no_sep":     st.column_config.TextColumn("No.SEP"),
+                         "disetujui":  st.column_config.NumberColumn("Disetujui", format="Rp %d"),
+                         "biaya_riil": st.column_config.NumberColumn("Biaya Riil RS", format="Rp %d"),
+                         "selisih":    st.column_config.NumberColumn("Selisih CBG", format="Rp %d"),
+                     })
+    st.divider()
+
 # -- Log summary stats --
-if log_data:
-    total_entri  = len(log_data)
-    total_selesai   = sum(1 for x in log_data if x.get('status') == 'Selesai')
-    total_pending   = total_entri - total_selesai
-    total_nominal   = sum(x['total'] for x in log_data)
-    nominal_fmt     = f"Rp {total_nominal:,.0f}".replace(",", ".")
-
-    dark = st.session_state.dark_mode
-    dim  = '#334155' if dark else '#94a3b8'
-    surf = 'rgba(255,255,255,0.03)' if dark else 'rgba(0,0,0,0.02)'
-    bdr  = 'rgba(255,255,255,0.07)' if dark else 'rgba(0,0,0,0.08)'
-    th   = '#f1f5f9' if dark else '#1e293b'
+if ada_log:
+    st.markdown(blok_log.ringkasan(versi_log, st.session_state.dark_mode), unsafe_allow_html=True)
+
+RIWAYAT_PER_HALAMAN = 10
+
+
+@st.fragment
+def riwayat_konversi():
+    """Filter & navigasi halaman hanya me-rerun blok ini; perubahan log me-rerun seluruh app."""
+    versi = riwayat.versi()
+    ada   = blok_log.data(versi)['ringkas']['total_entri'] > 0
+
+    col_title, col_hapus = st.columns([4, 1])
+    with col_title:
+        st.markdown('<div class="log-title">🕓 Riwayat Konversi</div>', unsafe_allow_html=True)
+    with col_hapus:
+        if ada:
+            st.markdown('<div class="danger-btn">', unsafe_allow_html=True)
+            if st.button("Hapus Semua", key="hapus_log"):
+                hapus_log()
+                st.session_state.results = []
+                st.rerun()
+            st.markdown('</div>', unsafe_allow_html=True)
+
+    if not ada:
+        st.markdown('<div class="log-empty">Belum ada riwayat konversi.</div>', unsafe_allow_html=True)
+        return
+
+    f1, f2, f3 = st.columns(3)
+    f_periode = f1.selectbox("Periode", ["Semua"] + blok_log.data(versi)['periode'], key="f_periode")
+    f_tingkat = f2.selectbox("Tingkat", ["Semua", "RITL", "RJTL", "RITP", "RJTP"], key="f_tingkat")
+    f_status  = f3.selectbox("Status", ["Semua", "Belum Diambil", "Selesai"], key="f_status")
+
+    filter_kini = (f_periode, f_tingkat, f_status)
+    if st.session_state.get('riwayat_filter') != filter_kini:
+        st.session_state.riwayat_filter  = filter_kini
+        st.session_state.riwayat_halaman = 0
+    hal = st.session_state.get('riwayat_halaman', 0)
+
+    blok = blok_log.daftar(
+        versi,
+        periode=None if f_periode == "Semua" else f_periode,
+        tingkat=None if f_tingkat == "Semua" else f_tingkat,
+        status=None if f_status == "Semua" else f_status,
+        limit=RIWAYAT_PER_HALAMAN, offset=hal * RIWAYAT_PER_HALAMAN)
+    n_filter = blok['n_filter']
+    n_hal    = max(1, -(-n_filter // RIWAYAT_PER_HALAMAN))
+
+    if not blok['html']:
+        st.markdown('<div class="log-empty">Tidak ada riwayat yang cocok dengan filter.</div>', unsafe_allow_html=True)
+    else:
+        st.markdown(blok['html'], unsafe_allow_html=True)
+
+    # Tandai selesai manual: satu pilihan untuk semua entri pending di halaman ini
+    if blok['pending']:
+        col_a, col_b = st.columns([5, 1])
+        pilih = col_a.multiselect("Tandai sudah diambil", blok['pending'], key=f"tandai_{hal}",
+                                  label_visibility="collapsed", placeholder="Pilih file yang sudah diambil...")
+        with col_b:
+            st.markdown('<div class="selesai-btn">', unsafe_allow_html=True)
+            if st.button("✓ Tandai", key="tandai_btn", disabled=not pilih):
+                update_log_status_batch(pilih, 'Selesai')
+                st.rerun()
+            st.markdown('</div>', unsafe_allow_html=True)
 
-    st.markdown(f"""
-    <div style="display:grid; grid-template-columns:1fr 1fr 1fr 1fr; gap:0.6rem; margin-bottom:1rem;">
-        <div style="background:{surf}; border:1px solid {bdr}; border-radius:12px; padding:0.9rem 1rem;">
-            <div style="color:{dim}; font-size:9px; font-weight:700; letter-spacing:2px; text-transform:uppercase; margin-bottom:4px;">Total Konversi</div>
-            <div style="color:{th}; font-size:1.3rem; font-weight:800;">{total_entri}</div>
-        </div>
-        <div style="background:{surf}; border:1px solid {bdr}; border-radius:12px; padding:0.9rem 1rem;">
-            <div style="color:{dim}; font-size:9px; font-weight:700; letter-spacing:2px; text-transform:uppercase; margin-bottom:4px;">Selesai</div>
-            <div style="color:#34d399; font-size:1.3rem; font-weight:800;">{total_selesai}</div>
-        </div>
-        <div style="background:{surf}; border:1px solid {bdr}; border-radius:12px; padding:0.9rem 1rem;">
-            <div style="color:{dim}; font-size:9px; font-weight:700; letter-spacing:2px; text-transform:uppercase; margin-bottom:4px;">Pending</div>
-            <div style="color:#fbbf24; font-size:1.3rem; font-weight:800;">{total_pending}</div>
-        </div>
-        <div style="background:{surf}; border:1px solid {bdr}; border-radius:12px; padding:0.9rem 1rem; overflow:hidden;">
-            <div style="color:{dim}; font-size:9px; font-weight:700; letter-spacing:2px; text-transform:uppercase; margin-bottom:4px;">Total Nominal</div>
-            <div style="color:#818cf8; font-size:0.8rem; font-weight:800; white-space:nowrap;">{nominal_fmt}</div>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    # Navigasi halaman riwayat
+    # (callback: klik tombol di dalam fragment hanya me-rerun fragment ini)
+    if n_hal > 1:
+        c_prev, c_info, c_next = st.columns([1, 2, 1])
+        c_prev.button("← Baru", key="riwayat_prev", disabled=hal == 0,
+                      on_click=lambda: st.session_state.update(riwayat_halaman=hal - 1))
+        c_info.markdown(f'<div class="log-empty">Halaman {hal + 1} / {n_hal} · {n_filter} entri</div>',
+                        unsafe_allow_html=True)
+        c_next.button("Lama →", key="riwayat_next", disabled=hal >= n_hal - 1,
+                      on_click=lambda: st.session_state.update(riwayat_halaman=hal + 1))
 
-# -- Log header --
-col_title, col_hapus = st.columns([4, 1])
-with col_title:
-    st.markdown('<div class="log-title">🕓 Riwayat Konversi</div>', unsafe_allow_html=True)
-with col_hapus:
-    if log_data:
-        st.markdown('<div class="danger-btn">', unsafe_allow_html=True)
-        if st.button("Hapus Semua", key="hapus_log"):
-            hapus_log()
-            st.session_state.results = []
-            st.rerun()
-        st.markdown('</div>', unsafe_allow_html=True)
 
-if not log_data:
-    st.markdown('<div class="log-empty">Belum ada riwayat konversi.</div>', unsafe_allow_html=True)
-else:
-    for i, item in enumerate(log_data):
-        tkt      = item.get('tingkat', '')
-        t_cls    = tkt.lower() if tkt in ('RITL','RJTL','RITP','RJTP') else 'other'
-        badge    = f'<span class="log-badge {t_cls}">{tkt}</span>' if tkt else ''
-        total_rp = f"Rp {item['total']:,.0f}".replace(",", ".")
-        status   = item.get('status', 'Belum Diambil')
-        wkt_sel  = item.get('waktu_selesai')
-
-        if status == 'Selesai':
-            status_html = f'<span class="status-selesai">✓ Selesai</span>'
-            footer_extra = f'<span class="log-item-sep">·</span><span class="log-item-time">📥 {wkt_sel}</span>' if wkt_sel else ''
-        else:
-            status_html  = '<span class="status-pending">⏳ Belum Diambil</span>'
-            footer_extra = ''
-
-        st.markdown(f"""
-        <div class="log-item">
-            <div class="log-item-name">📄 {item['nama_file']} {badge} {status_html}</div>
-            <div class="log-item-footer">
-                <span class="log-item-time">🕓 {item['waktu']}</span>
-                <span class="log-item-sep">·</span>
-                <span class="log-item-total">{total_rp}</span>
-                <span class="log-item-sep">·</span>
-                <span class="log-item-count">{item['jumlah']} SEP</span>
-                {footer_extra}
-            </div>
-        </div>""", unsafe_allow_html=True)
-
-        # Tombol manual tandai selesai
-        if status != 'Selesai':
-            col_a, col_b = st.columns([5, 1])
-            with col_b:
-                st.markdown('<div class="selesai-btn" style="margin-top:-0.4rem;">', unsafe_allow_html=True)
-                if st.button("✓ Tandai", key=f"tandai_{i}"):
-                    update_log_status(item['nama_file'], 'Selesai')
-                    st.rerun()
-                st.markdown('</div>', unsafe_allow_html=True)
+riwayat_konversi()
 
 # ── WATERMARK FOOTER ─────────────────────────────────────────
 _dark     = st.session_state.get('dark_mode', True)
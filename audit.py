@@ -1,10 +1,10 @@
-import os
-import re
-import io
-import tempfile
-import pdfplumber
-import pandas as pd
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from fpk import antrian, scratch
+from fpk.audit_pdf import ekstrak_paralel
+from fpk.metadata import jumlah_halaman
+from fpk.preload import mulai_preload
 
 # ── PAGE CONFIG ──────────────────────────────────────────────────────────────
 st.set_page_config(page_title="Audit Jaspel BPJS", page_icon="🔍", layout="centered")
@@ -224,94 +224,13 @@ if not st.session_state.logged_in:
             st.error("❌ PIN salah.")
     st.stop()
 
-# ── KONSTANTA KANTONG BESAR ──────────────────────────────────────────────────
-# Proporsi dari data aktual ICHA Januari 2026
-KANTONG = {
-    "dr. Operator & dr. Spesialis": 34.29,
-    "dr. Umum":                      6.12,
-    "Perawat":                       24.81,
-    "Management Struktural":         12.11,
-    "Petugas Khusus":                 7.93,
-    "Farmasi":                        4.12,
-    "Management Administrasi":       10.62,
-}
+# pandas/pdfminer tidak diimpor di halaman login; panaskan di background
+mulai_preload(("pandas", "pdfminer.pdfinterp", "xlsxwriter", "pyarrow", "fpk.gudang"))
 
 # ── HELPER ──────────────────────────────────────────────────────────────────
-def fmt_rp(val: float) -> str:
+def fmt_rp(val) -> str:
     return f"Rp {val:,.0f}".replace(",", ".")
 
-def extract_pdf(uploaded_file):
-    """Extract No.SEP, Biaya Riil RS, Disetujui dari PDF FPK BPJS."""
-    pattern = re.compile(
-        r'\d+\s+(1028R\S+)\s+([\d-]+)\s+([\d,]+)\s+([\d,]+)\s+([\d,]+)'
-    )
-    rows = []
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(uploaded_file.read())
-        tmp_path = tmp.name
-    try:
-        with pdfplumber.open(tmp_path) as pdf:
-            bulan_pel = ""
-            for page in pdf.pages:
-                text = page.extract_text() or ""
-                # Ambil info bulan dari halaman pertama
-                if not bulan_pel:
-                    m = re.search(r"Bulan Pelayanan\s*:\s*(.+)", text)
-                    if m:
-                        bulan_pel = m.group(1).strip()
-                for m in pattern.finditer(text):
-                    rows.append({
-                        "No.SEP":       m.group(1),
-                        "Biaya Riil RS": int(m.group(3).replace(",", "")),
-                        "Disetujui":    int(m.group(5).replace(",", "")),
-                    })
-    except Exception as e:
-        return None, None, str(e)
-    finally:
-        os.unlink(tmp_path)
-
-    if not rows:
-        return None, None, "Tidak ada data SEP ditemukan. Pastikan format PDF adalah Rincian Data Hasil Verifikasi dari BPJS."
-
-    df = pd.DataFrame(rows).drop_duplicates(subset=["No.SEP"]).reset_index(drop=True)
-    return df, bulan_pel, None
-
-def hitung_jaspel(df: pd.DataFrame, tarif: float, naik_kelas: float) -> dict:
-    """Hitung jaspel per SEP sesuai rumus ICHA."""
-    jasa_list, selisih_list, jaspel_sel_list, jaspel_list = [], [], [], []
-    for _, row in df.iterrows():
-        cbg   = float(row["Disetujui"])
-        biaya = float(row["Biaya Riil RS"])
-        jasa  = cbg * tarif
-        sel   = max(0.0, cbg - biaya)
-        jsel  = sel * 0.05
-        jasa_list.append(jasa)
-        selisih_list.append(sel)
-        jaspel_sel_list.append(jsel)
-        jaspel_list.append(jasa + jsel)
-
-    subtotal = sum(jaspel_list)
-    final    = subtotal + naik_kelas
-
-    df_out = df.copy()
-    df_out["Jasa Pelayanan"]  = jasa_list
-    df_out["Selisih CBG"]     = selisih_list
-    df_out["Jaspel Selisih"]  = jaspel_sel_list
-    df_out["Total Jaspel"]    = jaspel_list
-
-    return {
-        "n_sep":          len(df),
-        "total_cbg":      float(df["Disetujui"].sum()),
-        "total_biaya":    float(df["Biaya Riil RS"].sum()),
-        "tarif":          tarif,
-        "jasa_pel":       sum(jasa_list),
-        "jaspel_selisih": sum(jaspel_sel_list),
-        "naik_kelas":     naik_kelas,
-        "subtotal":       subtotal,
-        "final":          final,
-        "df_detail":      df_out,
-    }
-
 # ── HEADER ──────────────────────────────────────────────────────────────────
 st.markdown("""
     <div class="app-header">
@@ -353,47 +272,136 @@ icha_val = st.number_input(
 st.markdown("---")
 btn = st.button("🧮  Hitung Jaspel Sekarang", type="primary", use_container_width=True)
 
-if not btn:
+# Setelah sekali dihitung, hasil tetap tampil di rerun berikutnya (slider,
+# naik kelas, ICHA) — PDF tidak dibaca ulang karena ekstraksi di-cache per hash.
+# Begitu file yang di-upload berganti atau dihapus, tunggu tombol ditekan lagi.
+berkas = tuple(up.file_id if up is not None else None for up in (up_ri, up_rj))
+if btn:
+    st.session_state.audit_aktif = berkas
+if st.session_state.get("audit_aktif") != berkas:
+    st.session_state.audit_aktif = None
     st.stop()
 
+import pandas as pd  # noqa: E402 — sengaja ditunda sampai ada yang dihitung
+from fpk import excel, gudang, skenario  # noqa: E402
+
 # ── VALIDASI ────────────────────────────────────────────────────────────────
 if up_ri is None and up_rj is None:
     st.warning("⚠️ Upload minimal satu PDF FPK (RI atau RJ).")
     st.stop()
 
 # ── EKSTRAK PDF ──────────────────────────────────────────────────────────────
-hasil_ri = hasil_rj = None
+# RI & RJ di-spool sekali ke area scratch (fpk.scratch) lalu dibaca bersamaan
+# oleh worker lewat memory-map; tiap sisi langsung dihitung begitu
+# ekstraksinya selesai, jadi total waktu ≈ max(RI, RJ).
+hasil = {"RI": None, "RJ": None}
+baru  = set()   # sisi yang benar-benar diekstrak di run ini (bukan dari cache)
 bulan_info = ""
 
-if up_ri:
-    with st.spinner("📄 Membaca PDF Rawat Inap..."):
-        df_ri, bl, err = extract_pdf(up_ri)
-    if err:
-        st.error(f"❌ PDF RI: {err}")
-    else:
-        if bl: bulan_info = bl
-        hasil_ri = hitung_jaspel(df_ri, 0.30, float(nk_ri))
-        st.success(f"✅ RI: {hasil_ri['n_sep']:,} SEP berhasil dibaca")
-
-if up_rj:
-    with st.spinner("📄 Membaca PDF Rawat Jalan..."):
-        df_rj, bl, err = extract_pdf(up_rj)
-    if err:
-        st.error(f"❌ PDF RJ: {err}")
-    else:
-        if bl: bulan_info = bl
-        hasil_rj = hitung_jaspel(df_rj, 0.35, float(nk_rj))
-        st.success(f"✅ RJ: {hasil_rj['n_sep']:,} SEP berhasil dibaca")
+sisi = {kode: (up, tarif, nk, label) for kode, up, tarif, nk, label in (
+    ("RI", up_ri, 0.30, nk_ri, "Rawat Inap"),
+    ("RJ", up_rj, 0.35, nk_rj, "Rawat Jalan"),
+) if up is not None}
+
+# Hasil hitung per sisi disimpan di sesi per file_id upload: rerun karena
+# slider / naik kelas / ICHA tidak men-spool, meng-hash & mengekstrak ulang.
+tersimpan = st.session_state.setdefault("audit_hasil", {})
+for kode in list(tersimpan):
+    if kode not in sisi or tersimpan[kode]["file_id"] != sisi[kode][0].file_id:
+        del tersimpan[kode]
+
+
+def tampil_sisi(kode, t, dari_cache):
+    """Pesan hasil baca satu sisi + baris yang tidak terbaca."""
+    st.success(f"✅ {kode}: {t['hitung']['n_sep']:,} SEP berhasil dibaca"
+               + (" (cache)" if dari_cache else ""))
+    if t["gagal"]:
+        with st.expander(f"⚠️ {kode}: {len(t['gagal']):,} baris tidak bisa dibaca — periksa manual di PDF"):
+            st.dataframe(pd.DataFrame(t["gagal"]), hide_index=True, use_container_width=True)
+
+
+for kode, t in tersimpan.items():
+    tampil_sisi(kode, t, True)
+perlu = {kode: v for kode, v in sisi.items() if kode not in tersimpan}
+
+# Admission control server-wide (ukuran & jumlah halaman), sama dengan FPK Converter
+spool = {}
+try:
+    for kode, (up, _, _, _) in list(perlu.items()):
+        alasan = antrian.cek_admisi(up.size)
+        if not alasan:
+            spool[kode] = scratch.spool(up)
+            alasan = antrian.cek_admisi(spool[kode]["size"], jumlah_halaman(spool[kode]["path"]))
+        if alasan:
+            st.error(f"⛔ PDF {kode} ditolak: {alasan}")
+            del perlu[kode]
+    if not perlu and not tersimpan:
+        st.stop()
+
+    ctx = get_script_run_ctx()
+
+    kolom_prog = dict(zip(perlu, st.columns(len(perlu)))) if perlu else {}
+    bar = {kode: kolom_prog[kode].progress(0, text=f"📄 Membaca PDF {perlu[kode][3]}...") for kode in perlu}
+
+    for jenis, kode, val in ekstrak_paralel({k: spool[k]["path"] for k in perlu},
+                                            pengguna=ctx.session_id if ctx else None,
+                                            digest={k: spool[k]["hash"] for k in perlu}):
+        up, tarif, nk, label = perlu[kode]
+        if jenis == "antri":
+            bar[kode].progress(0, text=f"⏳ {label}: menunggu giliran server — posisi antrean #{val}")
+            continue
+        if jenis == "progress":
+            i, n = val
+            bar[kode].progress(i / n, text=f"📄 {label}: halaman {i:,}/{n:,}")
+            continue
+        df_x, bl, err = val
+        bar[kode].empty()
+        if err:
+            st.error(f"❌ PDF {kode}: {err}")
+            continue
+        if jenis == "selesai":
+            baru.add(kode)
+        # Naik kelas dihitung ulang di bawah; yang disimpan hasil dengan naik kelas 0
+        tersimpan[kode] = {"file_id": up.file_id, "bulan": bl,
+                           "hitung": skenario.hitung_jaspel(df_x, tarif, 0),
+                           "gagal": df_x.attrs.get("tidak_terbaca") or []}
+        tampil_sisi(kode, tersimpan[kode], jenis == "cache")
+finally:
+    # Juga saat st.stop()/rerun/exception: file scratch tidak pernah tertinggal
+    for info in spool.values():
+        scratch.hapus(info["path"])
+
+for kode, t in tersimpan.items():
+    nk = skenario.rupiah(sisi[kode][2])
+    hasil[kode] = {**t["hitung"], "naik_kelas": nk, "final": t["hitung"]["subtotal"] + nk}
+    if t["bulan"]:
+        bulan_info = t["bulan"]
+
+hasil_ri, hasil_rj = hasil["RI"], hasil["RJ"]
 
 if hasil_ri is None and hasil_rj is None:
     st.error("❌ Tidak ada data yang berhasil diekstrak.")
     st.stop()
 
+# ── SIMPAN KE GUDANG DATA SEP ────────────────────────────────────────────────
+periode_angka = gudang.periode_ke_angka(bulan_info)
+if periode_angka:
+    tahun_p, bulan_p = periode_angka
+    for kode, tkt, h in (("RI", "RITL", hasil_ri), ("RJ", "RJTL", hasil_rj)):
+        if h is None or kode not in baru:
+            continue
+        try:
+            gudang.simpan(h["df_detail"], f"AUDIT_{tkt}_{bulan_info.upper().replace(' ', '_')}",
+                          tahun_p, bulan_p, tkt, "audit")
+        except Exception as e:
+            print(f"Gagal simpan gudang SEP: {e}")
+
 # ── TOTAL ────────────────────────────────────────────────────────────────────
-total_ri  = hasil_ri["final"] if hasil_ri else 0.0
-total_rj  = hasil_rj["final"] if hasil_rj else 0.0
+# Semua nominal rupiah bulat (int) — aturan pembulatan di fpk.skenario
+total_ri  = hasil_ri["final"] if hasil_ri else 0
+total_rj  = hasil_rj["final"] if hasil_rj else 0
 total_all = total_ri + total_rj
-icha_float = float(icha_val)
+icha_rp   = skenario.rupiah(icha_val)
 
 # ── RINGKASAN METRIK ─────────────────────────────────────────────────────────
 st.markdown('<div class="section-title">📊 Ringkasan Perhitungan</div>', unsafe_allow_html=True)
@@ -428,15 +436,15 @@ c1.markdown(f"""
     </div>
 """, unsafe_allow_html=True)
 
-if icha_float > 0:
-    sel = total_all - icha_float
+if icha_rp > 0:
+    sel = total_all - icha_rp
     cls = "green" if abs(sel) < 1_000_000 else ("yellow" if sel > 0 else "red")
     arah = "lebih besar" if sel > 0 else "lebih kecil"
     c2.markdown(f"""
         <div class="metric-card {cls}">
             <div class="metric-label">⚖️ Selisih vs ICHA</div>
             <div class="metric-value {cls}">{fmt_rp(abs(sel))}</div>
-            <div class="metric-sub">{arah} dari ICHA ({abs(sel/icha_float*100):.2f}%)</div>
+            <div class="metric-sub">{arah} dari ICHA ({abs(sel/icha_rp*100):.2f}%)</div>
         </div>
     """, unsafe_allow_html=True)
 
@@ -472,22 +480,20 @@ for label, h in [("Rawat Inap", hasil_ri), ("Rawat Jalan", hasil_rj)]:
                      column_config={
                          "Biaya Riil RS":   st.column_config.NumberColumn(format="Rp %d"),
                          "Disetujui":       st.column_config.NumberColumn(format="Rp %d"),
-                         "Jasa Pelayanan":  st.column_config.NumberColumn(format="Rp %.0f"),
-                         "Selisih CBG":     st.column_config.NumberColumn(format="Rp %.0f"),
-                         "Jaspel Selisih":  st.column_config.NumberColumn(format="Rp %.0f"),
-                         "Total Jaspel":    st.column_config.NumberColumn(format="Rp %.0f"),
+                         "Jasa Pelayanan":  st.column_config.NumberColumn(format="Rp %d"),
+                         "Selisih CBG":     st.column_config.NumberColumn(format="Rp %d"),
+                         "Jaspel Selisih":  st.column_config.NumberColumn(format="Rp %d"),
+                         "Total Jaspel":    st.column_config.NumberColumn(format="Rp %d"),
                      })
 
 # ── KANTONG BESAR ────────────────────────────────────────────────────────────
 st.markdown('<div class="section-title">🏦 Daftar Jaspel Kantong Besar</div>', unsafe_allow_html=True)
 st.caption("Proporsi berdasarkan data aktual ICHA. Nilai riil tergantung mix tindakan per item di SIMRS.")
 
-rows_kb = []
-for nama, pct in KANTONG.items():
-    val_ri  = total_ri  * pct / 100
-    val_rj  = total_rj  * pct / 100
-    val_tot = val_ri + val_rj
-    rows_kb.append((nama, val_ri, val_rj, val_tot))
+# Sisa terbesar per sisi: Σ kantong = total RI / RJ persis, Total = RI + RJ
+kb_ri, kb_rj = skenario.bagi_kantong(total_ri), skenario.bagi_kantong(total_rj)
+rows_kb = [(nama, int(ri), int(rj), int(ri + rj))
+           for nama, ri, rj in zip(skenario.KANTONG, kb_ri, kb_rj)]
 
 # Render tabel HTML custom
 baris_html = ""
@@ -528,10 +534,10 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # ── PERBANDINGAN VS ICHA ─────────────────────────────────────────────────────
-if icha_float > 0:
+if icha_rp > 0:
     st.markdown('<div class="section-title">⚖️ Analisis Selisih vs ICHA</div>', unsafe_allow_html=True)
-    selisih = total_all - icha_float
-    pct_sel = selisih / icha_float * 100
+    selisih = total_all - icha_rp
+    pct_sel = selisih / icha_rp * 100
 
     c1, c2, c3 = st.columns(3)
     c1.markdown(f"""
@@ -542,7 +548,7 @@ if icha_float > 0:
     c2.markdown(f"""
         <div class="metric-card">
             <div class="metric-label">Sistem ICHA</div>
-            <div class="metric-value">{fmt_rp(icha_float)}</div>
+            <div class="metric-value">{fmt_rp(icha_rp)}</div>
         </div>""", unsafe_allow_html=True)
     cls3 = "green" if abs(selisih) < 1_000_000 else ("yellow" if selisih > 0 else "red")
     c3.markdown(f"""
@@ -560,27 +566,87 @@ if icha_float > 0:
     else:
         st.markdown(f'<div class="warn-box">⚠️ Hitung manual <b>lebih kecil</b> {fmt_rp(abs(selisih))} dari ICHA. Selisih bisa berasal dari jaspel Non-BPJS atau data Naik Kelas yang belum diinput di atas.</div>', unsafe_allow_html=True)
 
+# ── SIMULASI WHAT-IF ─────────────────────────────────────────────────────────
+st.markdown('<div class="section-title">🎛️ Simulasi What-If</div>', unsafe_allow_html=True)
+st.caption("Geser parameter untuk melihat dampaknya secara langsung — data SEP tidak dibaca ulang.")
+
+agg_sisi = {"RI": hasil_ri["agg"] if hasil_ri else None,
+            "RJ": hasil_rj["agg"] if hasil_rj else None}
+
+w1, w2, w3 = st.columns(3)
+wi_ri   = w1.slider("Tarif RI (%)", 20.0, 40.0, 30.0, 0.5, key="wi_tarif_ri", disabled=hasil_ri is None)
+wi_rj   = w2.slider("Tarif RJ (%)", 25.0, 45.0, 35.0, 0.5, key="wi_tarif_rj", disabled=hasil_rj is None)
+wi_rate = w3.slider("Rate Jaspel Selisih (%)", 0.0, 10.0, 5.0, 0.5, key="wi_rate")
+
+sk = skenario.hitung(agg_sisi, [{
+    "tarif_ri": wi_ri / 100, "tarif_rj": wi_rj / 100, "rate_selisih": wi_rate / 100,
+    "nk_ri": nk_ri, "nk_rj": nk_rj,
+}], skenario.KANTONG, icha_rp).iloc[0]
+
+m1, m2, m3 = st.columns(3)
+delta = sk["total"] - total_all
+m1.markdown(f"""
+    <div class="metric-card green">
+        <div class="metric-label">Total Skenario</div>
+        <div class="metric-value green">{fmt_rp(sk["total"])}</div>
+        <div class="metric-sub">RI {fmt_rp(sk["jaspel_ri"])} · RJ {fmt_rp(sk["jaspel_rj"])}</div>
+    </div>""", unsafe_allow_html=True)
+m2.markdown(f"""
+    <div class="metric-card">
+        <div class="metric-label">Δ vs Perhitungan Standar</div>
+        <div class="metric-value">{"+" if delta >= 0 else "−"}{fmt_rp(abs(delta))}</div>
+    </div>""", unsafe_allow_html=True)
+if icha_rp > 0:
+    cls_w = "green" if abs(sk["selisih_icha"]) < 1_000_000 else ("yellow" if sk["selisih_icha"] > 0 else "red")
+    m3.markdown(f"""
+        <div class="metric-card {cls_w}">
+            <div class="metric-label">Selisih Skenario vs ICHA</div>
+            <div class="metric-value {cls_w}">{fmt_rp(sk["selisih_icha"])}</div>
+            <div class="metric-sub">{sk["pct_icha"]:+.2f}%</div>
+        </div>""", unsafe_allow_html=True)
+
+with st.expander("📈 Sensitivitas tarif × rate selisih"):
+    # Satu panggilan vektor untuk seluruh grid skenario
+    geser = [-2.0, -1.0, 0.0, 1.0, 2.0]
+    rates = [0.0, 2.5, 5.0, 7.5, 10.0]
+    grid  = skenario.hitung(agg_sisi, [{
+        "tarif_ri": (wi_ri + g) / 100, "tarif_rj": (wi_rj + g) / 100, "rate_selisih": r / 100,
+        "nk_ri": nk_ri, "nk_rj": nk_rj, "geser": g, "rate": r,
+    } for g in geser for r in rates], icha=icha_rp)
+    nilai = "selisih_icha" if icha_rp > 0 else "total"
+    st.caption("Nilai: " + ("selisih vs ICHA" if icha_rp > 0 else "total jaspel")
+               + " · baris = geser tarif RI & RJ (poin %), kolom = rate selisih (%)")
+    pv = grid.pivot(index="geser", columns="rate", values=nilai)
+    pv.index   = [f"{g:+.1f}" for g in pv.index]
+    pv.columns = [f"{r:g}%" for r in pv.columns]
+    st.dataframe(pv.map(fmt_rp), use_container_width=True)
+
+with st.expander("🏦 Kantong besar skenario"):
+    st.dataframe(pd.DataFrame({"Jenis Jasa Pelayanan": list(skenario.KANTONG),
+                               "Nilai": [fmt_rp(sk[nama]) for nama in skenario.KANTONG]}),
+                 use_container_width=True, hide_index=True)
+
 # ── DOWNLOAD EXCEL ───────────────────────────────────────────────────────────
 st.markdown("---")
 st.markdown('<div class="section-title">⬇️ Export Hasil</div>', unsafe_allow_html=True)
 
-buf = io.BytesIO()
-with pd.ExcelWriter(buf, engine="openpyxl") as w:
-    df_det.to_excel(w, index=False, sheet_name="Ringkasan Komponen")
-
-    # Kantong besar
-    df_kb = pd.DataFrame(rows_kb, columns=["Jenis Jasa Pelayanan","Jaspel RI","Jaspel RJ","Total"])
-    df_kb.to_excel(w, index=False, sheet_name="Kantong Besar")
+df_kb  = pd.DataFrame(rows_kb, columns=["Jenis Jasa Pelayanan","Jaspel RI","Jaspel RJ","Total"])
+sheets = [("Ringkasan Komponen", df_det), ("Kantong Besar", df_kb)]
+if hasil_ri:
+    sheets.append(("Detail RI", hasil_ri["df_detail"]))
+if hasil_rj:
+    sheets.append(("Detail RJ", hasil_rj["df_detail"]))
 
-    # Detail per SEP
-    if hasil_ri:
-        hasil_ri["df_detail"].to_excel(w, index=False, sheet_name="Detail RI")
-    if hasil_rj:
-        hasil_rj["df_detail"].to_excel(w, index=False, sheet_name="Detail RJ")
+# Workbook dibuat di background (xlsxwriter, constant_memory) selagi halaman
+# dirender; kunci berubah hanya bila isi yang diekspor berubah.
+kunci_xlsx = "|".join(f"{n}:{int(pd.util.hash_pandas_object(d, index=False).sum())}"
+                      for n, d in sheets)
+fut_xlsx = excel.xlsx_background(kunci_xlsx, sheets)
 
 st.download_button(
     "⬇️  Download Hasil Audit (.xlsx)",
-    data=buf.getvalue(),
+    data=lambda: fut_xlsx.result(),
+    on_click="ignore",
     file_name=f"audit_jaspel_{bulan_info.replace(' ','_') if bulan_info else 'bpjs'}.xlsx",
     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     use_container_width=True,
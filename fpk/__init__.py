@@ -0,0 +1 @@
+"""Modul bersama FPK Converter & Audit Jaspel (tanpa dependensi Streamlit)."""
@@ -0,0 +1,182 @@
+"""Penjadwal ekstraksi server-wide (semua sesi & semua proses FPK).
+
+- Anggaran slot global: paling banyak SLOT_MAX ekstraksi (JVM tabula /
+  worker pdfplumber) berjalan bersamaan di seluruh server. Slot dikunci
+  lewat flock pada file di SLOT_DIR, jadi Streamlit, fpk.api & daemon
+  fpk.pengawas yang berjalan dari folder aplikasi yang sama berbagi anggaran
+  yang sama (di Windows tanpa fcntl: anggaran per proses).
+- Antrean adil per pengguna: slot kosong dibagikan bergiliran (round-robin)
+  antar pengguna, jadi satu batch besar tidak menahan pengguna lain.
+- Admission control: file terlalu besar / terlalu banyak halaman / antrean
+  pengguna penuh ditolak di depan, bukan membuat container OOM.
+
+Batas bisa diatur lewat env FPK_SLOT_MAX, FPK_SLOT_PER_PENGGUNA,
+FPK_UKURAN_MAX_MB, FPK_HALAMAN_MAX, FPK_ANTRI_PER_PENGGUNA, FPK_SLOT_DIR.
+"""
+import os
+import time
+import itertools
+import threading
+from collections import OrderedDict, deque
+
+try:
+    import fcntl
+except ImportError:  # Windows: anggaran slot hanya per proses
+    fcntl = None
+
+
+def _env_int(nama, default):
+    try:
+        return max(1, int(os.environ.get(nama, default)))
+    except ValueError:
+        return default
+
+
+SLOT_MAX             = _env_int("FPK_SLOT_MAX", min(4, os.cpu_count() or 1))
+SLOT_PER_PENGGUNA    = _env_int("FPK_SLOT_PER_PENGGUNA", max(1, SLOT_MAX // 2))
+# Default = batas upload bawaan Streamlit (server.maxUploadSize); penjaga
+# utama adalah jumlah halaman, ukuran hanya menolak yang jelas tak wajar
+UKURAN_MAX_MB        = _env_int("FPK_UKURAN_MAX_MB", 200)
+HALAMAN_MAX          = _env_int("FPK_HALAMAN_MAX", 2000)
+ANTRI_PER_PENGGUNA   = _env_int("FPK_ANTRI_PER_PENGGUNA", 30)
+SLOT_DIR             = os.environ.get("FPK_SLOT_DIR", os.path.join(".fpk_cache", "slot"))
+POLL_SLOT            = 0.5   # detik; slot proses lain dilepas tanpa notifikasi
+
+_cond     = threading.Condition()
+_menunggu = OrderedDict()   # pengguna → deque[tiket]; urutan = giliran round-robin
+_aktif    = {}              # pengguna → jumlah slot terpakai
+_nomor    = itertools.count(1)
+
+
+# ── ADMISSION CONTROL ───────────────────────────────────────
+def cek_admisi(ukuran: int, halaman: int = None):
+    """Alasan penolakan (str) atau None bila file boleh diproses."""
+    if ukuran > UKURAN_MAX_MB * 1024 * 1024:
+        return f"ukuran {ukuran / 1e6:.1f} MB melebihi batas {UKURAN_MAX_MB} MB"
+    if halaman is not None and halaman > HALAMAN_MAX:
+        return f"{halaman:,} halaman melebihi batas {HALAMAN_MAX:,} halaman"
+    return None
+
+
+def sisa_kuota(pengguna) -> int:
+    """Berapa job lagi yang boleh dimasukkan pengguna ke antrean."""
+    with _cond:
+        return ANTRI_PER_PENGGUNA - len(_menunggu.get(pengguna, ())) - _aktif.get(pengguna, 0)
+
+
+# ── SLOT ANTAR-PROSES ───────────────────────────────────────
+def _kunci_slot():
+    """Kunci satu file slot yang bebas; file terbuka (pemegang lock) atau None bila penuh."""
+    if fcntl is None:
+        return True
+    os.makedirs(SLOT_DIR, exist_ok=True)
+    for i in range(SLOT_MAX):
+        f = open(os.path.join(SLOT_DIR, f"slot{i}.lock"), "a")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return f
+        except OSError:
+            f.close()
+    return None
+
+
+def _buka_slot(slot):
+    # Menutup file melepas flock; proses yang mati juga otomatis melepasnya
+    if slot is not None and slot is not True:
+        slot.close()
+
+
+# ── TIKET ───────────────────────────────────────────────────
+def _bagikan():
+    """Isi slot kosong secara bergiliran; dipanggil dengan _cond terkunci."""
+    total = sum(_aktif.values())
+    while total < SLOT_MAX:
+        for pengguna, dq in _menunggu.items():
+            if dq and _aktif.get(pengguna, 0) < SLOT_PER_PENGGUNA:
+                break
+        else:
+            return
+        slot = _kunci_slot()
+        if slot is None:
+            return   # slot dipakai proses lain; dicoba lagi di tunggu()
+        t = dq.popleft()
+        t["status"] = "jalan"
+        t["slot"]   = slot
+        _aktif[pengguna] = _aktif.get(pengguna, 0) + 1
+        total += 1
+        # Pengguna yang baru dilayani pindah ke belakang giliran
+        _menunggu.move_to_end(pengguna)
+        if not dq:
+            del _menunggu[pengguna]
+        _cond.notify_all()
+
+
+def ambil_tiket(pengguna=None) -> dict:
+    """Masukkan satu job ke antrean pengguna; slot dibagikan bila tersedia."""
+    with _cond:
+        t = {"id": next(_nomor), "pengguna": pengguna, "status": "antri"}
+        _menunggu.setdefault(pengguna, deque()).append(t)
+        _bagikan()
+        return t
+
+
+def tunggu(tiket: dict, timeout: float = None) -> bool:
+    """Blok sampai tiket mendapat slot. False bila timeout / dibatalkan.
+
+    timeout=0 hanya mencoba sekali tanpa menunggu.
+    """
+    batas = None if timeout is None else time.monotonic() + timeout
+    with _cond:
+        while True:
+            _bagikan()
+            if tiket["status"] != "antri":
+                break
+            sisa = POLL_SLOT if batas is None else min(POLL_SLOT, batas - time.monotonic())
+            if sisa <= 0:
+                break
+            _cond.wait(sisa)
+        return tiket["status"] == "jalan"
+
+
+def lepas(tiket: dict):
+    """Kembalikan slot (atau batalkan tiket yang masih antre). Aman dipanggil ulang."""
+    with _cond:
+        if tiket["status"] == "jalan":
+            p = tiket["pengguna"]
+            _buka_slot(tiket.pop("slot", None))
+            _aktif[p] -= 1
+            if not _aktif[p]:
+                del _aktif[p]
+        elif tiket["status"] == "antri":
+            dq = _menunggu.get(tiket["pengguna"])
+            if dq is not None and tiket in dq:
+                dq.remove(tiket)
+                if not dq:
+                    del _menunggu[tiket["pengguna"]]
+        tiket["status"] = "selesai"
+        _bagikan()
+        _cond.notify_all()
+
+
+def posisi(tiket: dict) -> int:
+    """Posisi antrean (1 = berikutnya dilayani); 0 bila sudah/tidak antre."""
+    with _cond:
+        if tiket["status"] != "antri":
+            return 0
+        # Simulasi urutan round-robin atas antrean saat ini
+        antre = [list(dq) for dq in _menunggu.values()]
+        urut  = (t for putaran in itertools.zip_longest(*antre) for t in putaran if t is not None)
+        for i, t in enumerate(urut, 1):
+            if t is tiket:
+                return i
+        return 0
+
+
+def status() -> dict:
+    with _cond:
+        return {
+            "slot":      SLOT_MAX,
+            "aktif":     sum(_aktif.values()),
+            "menunggu":  sum(len(dq) for dq in _menunggu.values()),
+            "pengguna":  len(set(_aktif) | set(_menunggu)),
+        }
@@ -0,0 +1,479 @@
+"""HTTP API lokal untuk konversi & audit FPK tanpa browser (skrip integrasi SIMRS).
+
+Jalankan:
+    python -m fpk.api [--host 127.0.0.1] [--port 8600]
+
+Endpoint:
+    POST /v1/konversi          multipart `pdf`                        → 202 job
+    POST /v1/audit             multipart `ri` / `rj` (+ nk_ri, nk_rj,
+                               tarif_ri, tarif_rj, rate_selisih, icha) → 202 job
+    GET  /v1/job/{id}          status job (antri / jalan / selesai / gagal)
+    GET  /v1/job/{id}/pantau   status di-stream (NDJSON) sampai job selesai
+    GET  /v1/job/{id}/hasil    konversi: baris SEP di-stream per blok
+                               (?format=csv|ndjson, ?kolom=lengkap);
+                               audit: total, komponen & kantong besar (JSON),
+                               atau detail per SEP dengan ?detail=RI|RJ
+    GET  /v1/status            antrean server
+
+Semua endpoint /hasil menerima ?tunggu=1 untuk menunggu job selesai.
+Job dijalankan di thread pool (API_WORKERS) dan tetap melewati admission
+control & penjadwal adil fpk.antrian (antrean milik proses API ini, slot
+ekstraksi dibagi dengan Streamlit & daemon lewat file lock); koneksi
+HTTP/1.1 keep-alive ditangani uvicorn. Set FPK_API_TOKEN untuk mewajibkan
+header `Authorization: Bearer <token>`.
+
+Butuh starlette + uvicorn + python-multipart (sudah ikut terpasang bersama
+Streamlit). Satu proses saja: daftar job disimpan di memori.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from fpk import antrian, riwayat, scratch, triage
+from fpk.metadata import ambil_metadata_pdf, jumlah_halaman
+
+API_WORKERS   = max(1, int(os.environ.get("FPK_API_WORKERS", triage.MAX_WORKERS)))
+KEEPALIVE     = int(os.environ.get("FPK_API_KEEPALIVE", 75))   # detik koneksi idle
+TOKEN         = os.environ.get("FPK_API_TOKEN", "")
+JOB_MAX       = 200     # job selesai yang hasilnya masih disimpan
+BLOK_BARIS    = 2000    # baris per chunk saat stream hasil
+POLL_DETIK    = 0.5
+
+SELESAI = ("selesai", "gagal")
+SISI    = {"RI": "RITL", "RJ": "RJTL"}   # kode sisi audit → tingkat (gudang)
+
+_jobs = OrderedDict()
+_lock = threading.Lock()
+_pool = None
+
+
+# ── JOB ─────────────────────────────────────────────────────
+def _ambil_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="fpk-api")
+        return _pool
+
+
+def _job_baru(jenis: str, pengguna: str, berkas: dict) -> dict:
+    job = {
+        "id":       uuid.uuid4().hex,
+        "jenis":    jenis,
+        "status":   "antri",
+        "pengguna": pengguna,
+        "dibuat":   time.time(),
+        "selesai":  None,
+        "posisi":   {},      # kode → posisi antrean server
+        "progress": {},      # kode → [halaman, total]
+        "error":    None,
+        "ringkas":  None,
+        "hasil":    None,
+        "berkas":   berkas,  # kode → info scratch.spool
+    }
+    with _lock:
+        _jobs[job["id"]] = job
+        selesai = [k for k, j in _jobs.items() if j["status"] in SELESAI]
+        for k in selesai[:max(0, len(selesai) - JOB_MAX)]:
+            del _jobs[k]
+    return job
+
+
+def _jalankan(job: dict, fn):
+    """Bungkus fn(job) di worker: status, error & file scratch selalu dibereskan."""
+    try:
+        job["ringkas"] = fn(job)
+        job["status"]  = "selesai"
+    except Exception as e:
+        job["error"]  = str(e)
+        job["status"] = "gagal"
+    finally:
+        for info in job["berkas"].values():
+            scratch.hapus(info["path"])
+        job["posisi"]  = {}
+        job["selesai"] = time.time()
+
+
+def _publik(job: dict) -> dict:
+    return {k: job[k] for k in ("id", "jenis", "status", "dibuat", "selesai",
+                                "posisi", "progress", "error", "ringkas")}
+
+
+def _aktif(pengguna: str) -> int:
+    with _lock:
+        return sum(1 for j in _jobs.values()
+                   if j["pengguna"] == pengguna and j["status"] not in SELESAI)
+
+
+# ── KERJA: KONVERSI ─────────────────────────────────────────
+def _konversi(job: dict) -> dict:
+    from fpk import validasi
+    from fpk.extract import process_data_incremental
+
+    info = job["berkas"]["pdf"]
+    t    = antrian.ambil_tiket(job["pengguna"])
+    try:
+        while not antrian.tunggu(t, timeout=POLL_DETIK):
+            if t["status"] != "antri":
+                raise RuntimeError("Dibatalkan sebelum mendapat giliran.")
+            job["posisi"] = {"pdf": antrian.posisi(t)}
+        job["posisi"], job["status"] = {}, "jalan"
+        nama, tingkat = ambil_metadata_pdf(info["path"], info["hash"])
+        df, inf = process_data_incremental(info["path"], nama, info["hash"], lengkap=True)
+    finally:
+        antrian.lepas(t)
+
+    filename = f"{nama}.csv"
+    total    = int(df["Disetujui"].sum())
+    _, tahun, bulan = riwayat.periode_dari_nama(nama)
+    if tahun:
+        try:
+            from fpk import gudang
+            gudang.simpan(df, nama, tahun, bulan, tingkat, "converter", info["hash"])
+        except Exception as e:
+            print(f"Gagal simpan gudang SEP: {e}")
+    riwayat.tambah({
+        "waktu":         riwayat.waktu_wib(),
+        "nama_file":     filename,
+        "tingkat":       tingkat,
+        "jumlah":        len(df),
+        "total":         total,
+        "status":        "Belum Diambil",
+        "waktu_selesai": None,
+    })
+    job["hasil"] = {"df": df}
+    return {
+        "filename":  filename,
+        "tingkat":   tingkat,
+        "jumlah":    len(df),
+        "total":     total,
+        "halaman":   inf["halaman"],
+        "ocr":       inf["ocr"],
+        "anomali":   validasi.ringkas(inf["anomali"]),
+        # Hanya jumlah; daftar SEP lengkap bisa ribuan dan ikut tiap poll status
+        "diff":      {k: len(v) for k, v in inf["diff"].items()} if inf["diff"] else None,
+    }
+
+
+# ── KERJA: AUDIT ────────────────────────────────────────────
+def _audit(job: dict, param: dict) -> dict:
+    from fpk import gudang, skenario
+    from fpk.audit_pdf import ekstrak_paralel
+
+    berkas, sisi, error, bulan_info, baru = job["berkas"], {}, {}, "", set()
+    for jenis, kode, val in ekstrak_paralel({k: b["path"] for k, b in berkas.items()},
+                                            pengguna=job["pengguna"],
+                                            digest={k: b["hash"] for k, b in berkas.items()}):
+        if jenis == "antri":
+            job["posisi"][kode] = val
+            continue
+        job["posisi"].pop(kode, None)
+        job["status"] = "jalan"
+        if jenis == "progress":
+            job["progress"][kode] = list(val)
+            continue
+        df, bl, err = val
+        if err:
+            error[kode] = err
+            continue
+        if bl:
+            bulan_info = bl
+        if jenis == "selesai":
+            baru.add(kode)
+        tarif = param[f"tarif_{kode.lower()}"]
+        sisi[kode] = skenario.hitung_jaspel(df, tarif, param[f"nk_{kode.lower()}"],
+                                            param["rate_selisih"])
+        sisi[kode]["tidak_terbaca"] = df.attrs.get("tidak_terbaca", [])
+    if not sisi:
+        raise RuntimeError("; ".join(f"{k}: {e}" for k, e in error.items())
+                           or "Tidak ada data yang berhasil diekstrak.")
+
+    # Sama dengan halaman audit: hanya sisi yang benar-benar diekstrak (bukan cache)
+    periode_angka = gudang.periode_ke_angka(bulan_info)
+    if periode_angka:
+        for kode in baru & set(sisi):
+            tkt = SISI[kode]
+            try:
+                gudang.simpan(sisi[kode]["df_detail"], f"AUDIT_{tkt}_{bulan_info.upper().replace(' ', '_')}",
+                              *periode_angka, tkt, "audit")
+            except Exception as e:
+                print(f"Gagal simpan gudang SEP: {e}")
+
+    job["hasil"] = {kode: h["df_detail"] for kode, h in sisi.items()}
+    # Rupiah bulat; Σ kantong per sisi = total sisi persis (fpk.skenario)
+    total = {kode: sisi[kode]["final"] if kode in sisi else 0 for kode in SISI}
+    total_all = total["RI"] + total["RJ"]
+    kb    = {kode: skenario.bagi_kantong(total[kode]).tolist() for kode in SISI}
+    icha  = skenario.rupiah(param["icha"])
+    ringkas = {
+        "bulan_pelayanan": bulan_info or None,
+        "sisi": {kode: {**{k: v for k, v in h.items() if k not in ("df_detail", "agg", "tidak_terbaca")},
+                        "tidak_terbaca": len(h["tidak_terbaca"])}
+                 for kode, h in sisi.items()},
+        "error":  error,
+        "total":  {"ri": total["RI"], "rj": total["RJ"], "semua": total_all},
+        "kantong": {nama: {"ri": ri, "rj": rj, "total": ri + rj}
+                    for nama, ri, rj in zip(skenario.KANTONG, kb["RI"], kb["RJ"])},
+    }
+    if icha > 0:
+        ringkas["icha"] = {"nilai": icha, "selisih": total_all - icha,
+                           "pct": (total_all - icha) / icha * 100}
+    return ringkas
+
+
+# ── HTTP ────────────────────────────────────────────────────
+def _json(data, status: int = 200):
+    from starlette.responses import JSONResponse
+    return JSONResponse(data, status_code=status)
+
+
+def _pengguna(request) -> str:
+    """Identitas antrean: header X-Pengguna (mis. nama skrip), atau IP klien."""
+    return "api:" + (request.headers.get("x-pengguna") or
+                     (request.client.host if request.client else "anon"))
+
+
+def _cek_token(request):
+    if TOKEN and request.headers.get("authorization", "") != f"Bearer {TOKEN}":
+        return _json({"error": "token tidak valid"}, 401)
+    return None
+
+
+def _cek_body(request, n_file: int):
+    """Tolak body terlalu besar dari Content-Length, sebelum multipart dibaca."""
+    try:
+        ukuran = int(request.headers.get("content-length", 0))
+    except ValueError:
+        ukuran = 0
+    if ukuran > n_file * antrian.UKURAN_MAX_MB * 1024 * 1024 + 64 * 1024:
+        return _json({"error": f"upload melebihi {antrian.UKURAN_MAX_MB} MB per file"}, 413)
+    return None
+
+
+async def _terima(upload, kode: str):
+    """Spool satu upload multipart ke scratch + admission control; (info, alasan)."""
+    from starlette.concurrency import run_in_threadpool
+
+    alasan = antrian.cek_admisi(upload.size or 0)
+    if alasan:
+        return None, f"PDF {kode} ditolak: {alasan}"
+    info   = await run_in_threadpool(scratch.spool, upload.file)
+    alasan = antrian.cek_admisi(info["size"], await run_in_threadpool(jumlah_halaman, info["path"]))
+    if alasan:
+        scratch.hapus(info["path"])
+        return None, f"PDF {kode} ditolak: {alasan}"
+    return info, None
+
+
+def _angka(form, nama: str, default: float) -> float:
+    nilai = form.get(nama)
+    if nilai in (None, ""):
+        return default
+    try:
+        return float(nilai)
+    except (TypeError, ValueError):
+        raise ValueError(f"parameter {nama} harus angka") from None
+
+
+async def konversi(request):
+    tolak = _cek_token(request) or _cek_body(request, 1)
+    if tolak:
+        return tolak
+    pengguna = _pengguna(request)
+    if _aktif(pengguna) >= antrian.ANTRI_PER_PENGGUNA:
+        return _json({"error": f"antrean penuh (maks. {antrian.ANTRI_PER_PENGGUNA} job per pengguna)"}, 429)
+    async with request.form(max_files=1) as form:
+        upload = form.get("pdf")
+        if upload is None or isinstance(upload, str):
+            return _json({"error": "kirim PDF sebagai field multipart `pdf`"}, 400)
+        info, alasan = await _terima(upload, "pdf")
+    if alasan:
+        return _json({"error": alasan}, 413)
+    job = _job_baru("konversi", pengguna, {"pdf": info})
+    _ambil_pool().submit(_jalankan, job, _konversi)
+    return _json(_publik(job), 202)
+
+
+async def audit(request):
+    tolak = _cek_token(request) or _cek_body(request, 2)
+    if tolak:
+        return tolak
+    from fpk.skenario import RATE_SELISIH, TARIF
+
+    pengguna = _pengguna(request)
+    if _aktif(pengguna) >= antrian.ANTRI_PER_PENGGUNA:
+        return _json({"error": f"antrean penuh (maks. {antrian.ANTRI_PER_PENGGUNA} job per pengguna)"}, 429)
+    # File scratch dihapus _jalankan setelah job diserahkan ke pool; sebelum
+    # itu (form salah, upload kedua ditolak, error) dihapus di sini
+    berkas, diserahkan = {}, False
+    try:
+        async with request.form(max_files=2) as form:
+            try:
+                param = {
+                    "tarif_ri":     _angka(form, "tarif_ri", TARIF["RI"]),
+                    "tarif_rj":     _angka(form, "tarif_rj", TARIF["RJ"]),
+                    "nk_ri":        _angka(form, "nk_ri", 0.0),
+                    "nk_rj":        _angka(form, "nk_rj", 0.0),
+                    "rate_selisih": _angka(form, "rate_selisih", RATE_SELISIH),
+                    "icha":         _angka(form, "icha", 0.0),
+                }
+            except ValueError as e:
+                return _json({"error": str(e)}, 400)
+            for kode in SISI:
+                upload = form.get(kode.lower())
+                if upload is None or isinstance(upload, str):
+                    continue
+                info, alasan = await _terima(upload, kode)
+                if alasan:
+                    return _json({"error": alasan}, 413)
+                berkas[kode] = info
+        if not berkas:
+            return _json({"error": "kirim minimal satu PDF sebagai field multipart `ri` / `rj`"}, 400)
+        job = _job_baru("audit", pengguna, berkas)
+        _ambil_pool().submit(_jalankan, job, lambda j: _audit(j, param))
+        diserahkan = True
+    finally:
+        if not diserahkan:
+            for info in berkas.values():
+                scratch.hapus(info["path"])
+    return _json(_publik(job), 202)
+
+
+def _cari(request):
+    with _lock:
+        return _jobs.get(request.path_params["id"])
+
+
+async def _tunggu_selesai(job: dict):
+    while job["status"] not in SELESAI:
+        await asyncio.sleep(POLL_DETIK)
+
+
+async def status_job(request):
+    tolak = _cek_token(request)
+    if tolak:
+        return tolak
+    job = _cari(request)
+    if job is None:
+        return _json({"error": "job tidak ditemukan"}, 404)
+    return _json(_publik(job))
+
+
+async def pantau(request):
+    """Stream status (satu baris JSON per perubahan) sampai job selesai."""
+    from starlette.responses import StreamingResponse
+
+    tolak = _cek_token(request)
+    if tolak:
+        return tolak
+    job = _cari(request)
+    if job is None:
+        return _json({"error": "job tidak ditemukan"}, 404)
+
+    async def aliran():
+        terakhir = None
+        while True:
+            baris = json.dumps(_publik(job))
+            if baris != terakhir:
+                terakhir = baris
+                yield baris + "\n"
+            if job["status"] in SELESAI:
+                return
+            await asyncio.sleep(POLL_DETIK)
+
+    return StreamingResponse(aliran(), media_type="application/x-ndjson")
+
+
+def _stream_df(df, fmt: str, selesai=None):
+    """DataFrame → chunk CSV / NDJSON per BLOK_BARIS; `selesai()` dipanggil setelah chunk terakhir."""
+    for i in range(0, len(df), BLOK_BARIS):
+        blok = df.iloc[i:i + BLOK_BARIS]
+        if fmt == "ndjson":
+            yield blok.to_json(orient="records", lines=True, date_format="iso").rstrip("\n") + "\n"
+        else:
+            yield blok.to_csv(index=False, header=i == 0)
+    if selesai is not None:
+        selesai()
+
+
+async def hasil(request):
+    from starlette.responses import StreamingResponse
+
+    tolak = _cek_token(request)
+    if tolak:
+        return tolak
+    job = _cari(request)
+    if job is None:
+        return _json({"error": "job tidak ditemukan"}, 404)
+    q = request.query_params
+    if job["status"] not in SELESAI:
+        if q.get("tunggu") not in ("1", "true"):
+            return _json({**_publik(job), "error": "job belum selesai"}, 409)
+        await _tunggu_selesai(job)
+    if job["status"] == "gagal":
+        return _json(_publik(job), 422)
+
+    fmt  = "ndjson" if q.get("format") == "ndjson" else "csv"
+    mime = "application/x-ndjson" if fmt == "ndjson" else "text/csv; charset=utf-8"
+    if job["jenis"] == "audit":
+        kode = (q.get("detail") or "").upper()
+        if not kode:
+            return _json(_publik(job))
+        if kode not in job["hasil"]:
+            return _json({"error": f"tidak ada detail {kode}"}, 404)
+        return StreamingResponse(_stream_df(job["hasil"][kode], fmt), media_type=mime)
+
+    ringkas = job["ringkas"]
+    df = job["hasil"]["df"]
+    if q.get("kolom") != "lengkap":
+        df = df[["No.SEP", "Disetujui"]]
+    # Sama dengan tombol download di FPK Converter: status log → Selesai
+    tandai = lambda: riwayat.update_status([ringkas["filename"]], "Selesai", riwayat.waktu_wib())  # noqa: E731
+    headers = {"Content-Disposition": f'attachment; filename="{ringkas["filename"]}"'} if fmt == "csv" else None
+    return StreamingResponse(_stream_df(df, fmt, tandai), media_type=mime, headers=headers)
+
+
+async def status_server(request):
+    tolak = _cek_token(request)
+    if tolak:
+        return tolak
+    with _lock:
+        per_status = {}
+        for j in _jobs.values():
+            per_status[j["status"]] = per_status.get(j["status"], 0) + 1
+    return _json({"antrian": antrian.status(), "job": per_status, "workers": API_WORKERS})
+
+
+def buat_app():
+    from starlette.applications import Starlette
+    from starlette.routing import Route
+
+    return Starlette(routes=[
+        Route("/v1/konversi",         konversi,      methods=["POST"]),
+        Route("/v1/audit",            audit,         methods=["POST"]),
+        Route("/v1/job/{id}",         status_job),
+        Route("/v1/job/{id}/pantau",  pantau),
+        Route("/v1/job/{id}/hasil",   hasil),
+        Route("/v1/status",           status_server),
+    ])
+
+
+def main(argv=None):
+    import uvicorn
+
+    ap = argparse.ArgumentParser(description="HTTP API lokal FPK Converter & Audit Jaspel")
+    ap.add_argument("--host", default=os.environ.get("FPK_API_HOST", "127.0.0.1"))
+    ap.add_argument("--port", type=int, default=int(os.environ.get("FPK_API_PORT", 8600)))
+    args = ap.parse_args(argv)
+    uvicorn.run(buat_app(), host=args.host, port=args.port,
+                timeout_keep_alive=KEEPALIVE, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
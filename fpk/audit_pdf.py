@@ -0,0 +1,258 @@
+import io
+import re
+import uuid
+import queue
+import threading
+import contextlib
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from fpk import antrian, ocr, page_cache, proses, scratch
+from fpk.metadata import file_hash, probe_metadata
+
+RE_BULAN = re.compile(r"Bulan Pelayanan\s*:\s*(.+)")
+
+ERR_KOSONG = ("Tidak ada data SEP ditemukan. Pastikan format PDF adalah "
+              "Rincian Data Hasil Verifikasi dari BPJS.")
+
+POLL_DETIK = 0.2
+CACHE_MAX  = 8      # hasil ekstraksi (DataFrame SEP) per hash upload
+
+_cache      = OrderedDict()
+_cache_lock = threading.Lock()
+
+_antrian   = None   # parent: ctx.Queue progress; worker: diisi oleh _init_worker
+_pool_lock = threading.Lock()
+
+# Progress per run yang masih berjalan: {run_id: {kode: (i, n)}}. Antrian
+# dipakai bersama semua run, jadi pesan run lain disimpan di sini, bukan dibuang.
+_progres      = {}
+_progres_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def _buka(src):
+    """bytes → BytesIO; path (file scratch) → memory-map read-only."""
+    if isinstance(src, (bytes, bytearray)):
+        yield io.BytesIO(src)
+    else:
+        with scratch.peta(src) as mm:
+            yield mm
+
+
+def extract_pdf(data, progress=None):
+    """Extract 6 kolom FPK (bertipe, fpk.skema) dari PDF FPK BPJS (path atau bytes).
+
+    Baris dibaca parser tata letak (fpk.tata_letak) dari posisi kata, jadi
+    sel terbungkus & kode PPK selain 1028 ikut terbaca; baris yang gagal
+    dibaca ada di df.attrs["tidak_terbaca"] ([{halaman, baris, alasan}]).
+    Halaman yang sudah pernah dikonversi FPK Converter (cache halaman) tidak
+    di-parse ulang, asal barisnya lolos pola kolom parser ini. Halaman hasil scan (tanpa teks) dibaca lewat OCR
+    (fpk.ocr) di process pool, paralel dengan halaman berteks. Mengembalikan
+    (df, bulan_pelayanan, error). Bila `progress` diberikan, dipanggil
+    progress(halaman_selesai, total_halaman).
+    """
+    from fpk import skema, tata_letak
+
+    gagal = []
+    try:
+        # Bulan pelayanan dari probe header (cache per hash), tanpa parse ulang
+        bulan_pel = probe_metadata(data)["bulan_pelayanan"]
+        hashes    = page_cache.page_hashes(data)
+        # Cache halaman dipakai bersama FPK Converter (sel mentah tabula):
+        # halaman yang barisnya tidak lolos pola kolom di-parse ulang
+        cached    = {h: rows for h, rows in page_cache.ambil_halaman(hashes).items()
+                     if tata_letak.baris_valid(rows)}
+        scan      = {p for p in ocr.halaman_tanpa_teks(data)
+                     if p > len(hashes) or hashes[p - 1] not in cached}
+        ambil_ocr = ocr.ocr_async(data, sorted(scan), hashes) if scan and ocr.tersedia() else None
+        # Halaman 1 tetap di-parse bila bulan belum diketahui (fallback judul)
+        lewati    = scan | {i for i, h in enumerate(hashes, 1)
+                            if h in cached and (bulan_pel or i > 1)}
+
+        per_hal = []
+        with _buka(data) as f:
+            for i, n, hasil in tata_letak.urai_pdf(f, lewati):
+                if i in scan:
+                    per_hal.append([])
+                    continue
+                if hasil is None:
+                    per_hal.append(cached[hashes[i - 1]])
+                else:
+                    for t in hasil["teks"] if not bulan_pel else ():
+                        m = RE_BULAN.search(t)
+                        if m:
+                            bulan_pel = m.group(1).strip()
+                            break
+                    per_hal.append(hasil["rows"])
+                    gagal.extend({"halaman": i, **g} for g in hasil["gagal"])
+                if progress is not None:
+                    progress(i, n)
+
+        if ambil_ocr is not None:
+            baru = {}
+            for i, text in ambil_ocr().items():
+                per_hal[i - 1] = tata_letak.baris_dari_teks(text)
+                if not bulan_pel:
+                    m = RE_BULAN.search(text)
+                    if m:
+                        bulan_pel = m.group(1).strip()
+                if i <= len(hashes):
+                    baru[hashes[i - 1]] = [list(r) for r in per_hal[i - 1]]
+            page_cache.simpan_halaman(baru)
+            if progress is not None:
+                progress(n, n)
+    except Exception as e:
+        return None, None, str(e)
+
+    rows = [r for baris in per_hal for r in baris]
+    if not rows:
+        if scan and ambil_ocr is None:
+            return None, None, ocr.ERR_OCR
+        if gagal:
+            return None, None, f"{ERR_KOSONG} ({len(gagal)} baris tidak sesuai format)"
+        return None, None, ERR_KOSONG
+
+    df = skema.dari_rows(rows).drop_duplicates(subset=["No.SEP"]).reset_index(drop=True)
+    df.attrs["tidak_terbaca"] = gagal
+    return df, bulan_pel, None
+
+
+# ── EKSTRAKSI PARALEL ───────────────────────────────────────
+def _init_worker(antrian):
+    global _antrian
+    _antrian = antrian
+
+
+def _ekstrak_worker(data, tag):
+    return extract_pdf(data, lambda i, n: _antrian.put((tag, i, n)))
+
+
+def _ambil_pool():
+    """Pool ekstraksi (spawn, max 2 worker) dipakai ulang antar-rerun."""
+    global _antrian
+    with _pool_lock:
+        if _antrian is None:
+            _antrian = multiprocessing.get_context("spawn").Queue()
+        return proses.ambil_pool("ekstraksi", 2, initializer=_init_worker,
+                                 initargs=(_antrian,))
+
+
+def _reset_pool(pool):
+    """Buang pool yang rusak beserta antriannya agar dibuat ulang."""
+    global _antrian
+    with _pool_lock:
+        if proses.reset_pool("ekstraksi", pool):
+            _antrian = None
+
+
+def _kuras(run_id: str) -> dict:
+    """Ambil progress terbaru per kode milik run ini dari antrian.
+
+    Pesan run lain yang masih aktif disimpan untuk run tersebut; pesan run
+    yang sudah selesai dibuang.
+    """
+    with _progres_lock:
+        while True:
+            try:
+                (rid, kode), i, n = _antrian.get_nowait()
+            except (queue.Empty, AttributeError):
+                break
+            if rid in _progres:
+                _progres[rid][kode] = (i, n)
+        terbaru, _progres[run_id] = _progres.get(run_id, {}), {}
+    return terbaru
+
+
+def _cache_ambil(digest: str):
+    with _cache_lock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            return _cache[digest]
+    return None
+
+
+def _cache_simpan(digest: str, hasil):
+    with _cache_lock:
+        _cache[digest] = hasil
+        _cache.move_to_end(digest)
+        while len(_cache) > CACHE_MAX:
+            _cache.popitem(last=False)
+
+
+def ekstrak_paralel(data_map: dict, pengguna=None, digest: dict = None):
+    """Ekstrak beberapa PDF sekaligus di process pool.
+
+    `data_map` = {kode: path atau bytes}; path (file scratch) lebih disukai
+    karena worker cukup menerima path lalu memory-map, bukan salinan bytes.
+    `digest` = {kode: sha256} bila hash sudah dihitung saat spool.
+
+    Upload yang sama (hash) langsung dijawab dari cache dengan event
+    ("cache", kode, hasil). Sisanya menunggu slot dari
+    penjadwal server-wide (fpk.antrian) — selama antre yield ("antri", kode,
+    posisi) — lalu yield ("progress", kode, (i, n)) selama berjalan dan
+    ("selesai", kode, (df, bulan, err)) begitu satu sisi selesai, sehingga
+    pemanggil bisa langsung lanjut menghitung sisi itu.
+    """
+    digest = {kode: (digest or {}).get(kode) or file_hash(data)
+              for kode, data in data_map.items()}
+    baru   = {}
+    for kode, data in data_map.items():
+        hasil = _cache_ambil(digest[kode])
+        if hasil is None:
+            baru[kode] = data
+        else:
+            yield "cache", kode, hasil
+    if not baru:
+        return
+
+    run_id = uuid.uuid4().hex
+    with _progres_lock:
+        _progres[run_id] = {}
+    tiket  = {kode: antrian.ambil_tiket(pengguna) for kode in baru}
+    futs, diproses, posisi, pool = {}, set(), {}, None
+    try:
+        while len(diproses) < len(baru):
+            # Sisi yang sudah mendapat slot langsung dikirim ke pool
+            siap = {k: baru[k] for k, t in tiket.items()
+                    if k not in futs.values() and antrian.tunggu(t, timeout=0)}
+            if siap:
+                pool = _ambil_pool()
+                futs.update({pool.submit(_ekstrak_worker, data, (run_id, kode)): kode
+                             for kode, data in siap.items()})
+            for kode, t in tiket.items():
+                p = antrian.posisi(t)
+                if p and posisi.get(kode) != p:
+                    posisi[kode] = p
+                    yield "antri", kode, p
+
+            aktif = [f for f in futs if f not in diproses]
+            if aktif:
+                selesai, _ = wait(aktif, timeout=POLL_DETIK, return_when=FIRST_COMPLETED)
+            else:
+                antrian.tunggu(next(t for k, t in tiket.items() if k not in futs.values()),
+                               timeout=POLL_DETIK)
+                selesai = set()
+            for kode, val in _kuras(run_id).items():
+                yield "progress", kode, val
+            for fut in selesai:
+                diproses.add(fut)
+                kode = futs[fut]
+                antrian.lepas(tiket[kode])
+                try:
+                    hasil = fut.result()
+                except BrokenProcessPool as e:
+                    _reset_pool(pool)
+                    hasil = (None, None, str(e))
+                except Exception as e:
+                    hasil = (None, None, str(e))
+                if hasil[2] is None:
+                    _cache_simpan(digest[kode], hasil)
+                yield "selesai", kode, hasil
+    finally:
+        with _progres_lock:
+            _progres.pop(run_id, None)
+        for t in tiket.values():
+            antrian.lepas(t)
@@ -0,0 +1,133 @@
+"""Benchmark memori hot path tabula → DataFrame bertipe (data sintetis).
+
+    python -m fpk.bench_memori [--halaman 2000] [--baris 30] [--objek]
+
+Membandingkan jalur lama (concat → iloc.copy() → filter boolean →
+reset_index) dengan extract.pilih_baris, keduanya diikuti skema.ketik.
+Input meniru keluaran tabula lattice: satu tabel per halaman, baris header,
+kolom ekstra kosong, plus tabel kecil non-data. `--objek` memakai kolom
+object seperti pandas < 3 / tanpa pyarrow (di situ concat & copy menyalin
+seluruh sel). Metrik per langkah diambil dari extract.langkah; skema.ketik sama di kedua
+jalur dan diukur terpisah. Gagal (exit 1) bila hasil berbeda atau memori
+tahap pilih baris jalur baru (puncak heap + alokasi Arrow) tidak lebih kecil.
+"""
+import gc
+import sys
+import argparse
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from fpk import extract
+from fpk.profil import tabel_memori
+from fpk.skema import KOLOM, ketik
+
+HEADER = ["No. Urut", "No.SEP", "Tgl. Verifikasi", "Biaya Riil RS", "Diajukan", "Disetujui", None]
+
+
+def tabel_sintetis(halaman: int, baris: int, seed: int = 0) -> list:
+    """List DataFrame seperti tabula.read_pdf(..., pandas_options={'header': None})."""
+    rng   = np.random.default_rng(seed)
+    rp    = lambda: f"{int(rng.integers(100_000, 50_000_000)):,}"
+    out, k = [], 0
+    for p in range(halaman):
+        rows = [HEADER]
+        for _ in range(baris):
+            k += 1
+            rows.append([str(k), f"1028R{int(rng.integers(0, 10**14)):014d}",
+                         f"2026-03-{k % 28 + 1:02d}", rp(), rp(), rp(), None])
+        out.append(pd.DataFrame(rows))
+        if p % 10 == 0:
+            out.append(pd.DataFrame([["Catatan", "hal", p]]))
+    return out
+
+
+def _pilih_baris_lama(df_list):
+    """Jalur lama extract.pilih_baris + reset_index lama di skema.ketik (pembanding)."""
+    cleaned = [df for df in df_list if df.shape[1] >= 6 and len(df) > 1]
+    with extract.langkah("concat", cleaned):
+        df = pd.concat(cleaned, ignore_index=True)
+    with extract.langkah("iloc_copy", df):
+        df_data = df.iloc[:, :6].copy()
+    with extract.langkah("filter", df_data):
+        df_data = df_data[pd.to_numeric(df_data.iloc[:, 0], errors="coerce").notna()]
+    df_data.columns = KOLOM
+    with extract.langkah("reset_index", df_data):
+        df_data = df_data.reset_index(drop=True)
+    return df_data
+
+
+def _tahap(fn, *args):
+    """fn(*args) → (hasil, puncak heap relatif awal tahap)."""
+    extract._rekam.puncak = 0
+    tracemalloc.reset_peak()
+    awal, _ = tracemalloc.get_traced_memory()
+    hasil  = fn(*args)
+    puncak = max(extract._rekam.puncak, tracemalloc.get_traced_memory()[1]) - awal
+    return hasil, puncak
+
+
+def ukur(pilih, df_list) -> dict:
+    """Tahap pilih baris lalu skema.ketik, masing-masing dengan perekam memori."""
+    gc.collect()
+    extract._rekam.memori = memori = {}
+    try:
+        df_data, puncak = _tahap(pilih, df_list)
+        # Durasi = jumlah durasi langkah (tanpa biaya pengukuran ukuran masukan)
+        arrow = sum(m["arrow"] for m in memori.values())
+        detik = sum(m["detik"] for m in memori.values())
+
+        def _ketik(df_data):
+            with extract.langkah("ketik", df_data):
+                return ketik(df_data)
+        df, puncak_ketik = _tahap(_ketik, df_data)
+    finally:
+        extract._rekam.memori = None
+    return {"df": df, "memori": memori, "puncak": puncak, "arrow": arrow, "detik": detik,
+            "puncak_ketik": puncak_ketik, "detik_ketik": memori["ketik"]["detik"]}
+
+
+def _ubah(lama, baru) -> str:
+    """Perubahan relatif jalur baru terhadap lama, mis. '-75%'."""
+    return f"{(baru / lama - 1) * 100:+.0f}%" if lama else "-"
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m fpk.bench_memori",
+                                 description="Benchmark memori tabula → DataFrame.")
+    ap.add_argument("--halaman", type=int, default=2000)
+    ap.add_argument("--baris", type=int, default=30, help="baris SEP per halaman")
+    ap.add_argument("--objek", action="store_true",
+                    help="kolom string object (perilaku pandas < 3 / tanpa pyarrow)")
+    args = ap.parse_args(argv)
+    if args.objek:
+        pd.set_option("future.infer_string", False)
+
+    df_list = tabel_sintetis(args.halaman, args.baris)
+    print(f"{len(df_list)} tabel sintetis · {args.halaman * args.baris} SEP")
+
+    tracemalloc.start()
+    try:
+        hasil = {"lama": ukur(_pilih_baris_lama, df_list),
+                 "baru": ukur(extract.pilih_baris, df_list)}
+    finally:
+        tracemalloc.stop()
+
+    for nama, h in hasil.items():
+        print(f"\n[{nama}] pilih baris: puncak heap {h['puncak'] / 1e6:.1f} MB · alokasi Arrow "
+              f"{h['arrow'] / 1e6:.1f} MB · {h['detik']:.2f} s — ketik: puncak "
+              f"{h['puncak_ketik'] / 1e6:.1f} MB · {h['detik_ketik']:.2f} s (dengan tracemalloc)")
+        print(tabel_memori(h["memori"]), end="")
+
+    lama, baru = hasil["lama"], hasil["baru"]
+    sama = lama["df"].equals(baru["df"])
+    print(f"\nHasil identik: {'ya' if sama else 'TIDAK'} · perubahan pilih baris: puncak heap "
+          f"{_ubah(lama['puncak'], baru['puncak'])}, alokasi Arrow {_ubah(lama['arrow'], baru['arrow'])}, "
+          f"waktu {_ubah(lama['detik'], baru['detik'])}")
+    if not sama or baru["puncak"] + baru["arrow"] >= lama["puncak"] + lama["arrow"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark cold start halaman login (login-to-interactive).
+
+    python -m fpk.bench_startup [--budget 2.0] [--ulang 3] [app.py audit.py]
+
+Tiap ulangan dijalankan di interpreter baru (cold import). Gagal (exit 1)
+bila median melewati budget atau modul berat ikut terimpor di halaman login.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+MODUL_BERAT = ("pandas", "tabula", "pdfplumber", "pyarrow", "numpy")
+
+_PROBE = r"""
+import sys, time, json
+t0 = time.perf_counter()
+import streamlit
+t_import = time.perf_counter() - t0
+from streamlit.testing.v1 import AppTest
+sebelum = {m for m in {MODUL} if m in sys.modules}
+at = AppTest.from_file({SCRIPT}, default_timeout=60)
+t1 = time.perf_counter()
+at.run()
+t_run = time.perf_counter() - t1
+berat = sorted(m for m in {MODUL} if m in sys.modules and m not in sebelum)
+print(json.dumps({"import_streamlit": t_import, "render_login": t_run,
+                  "total": t_import + t_run, "modul_berat": berat,
+                  "error": [str(e.value) for e in at.exception]}))
+"""
+
+
+def ukur(script: str) -> dict:
+    kode = (_PROBE.replace("{MODUL}", repr(set(MODUL_BERAT)))
+                  .replace("{SCRIPT}", repr(os.path.abspath(script))))
+    out = subprocess.run([sys.executable, "-c", kode], capture_output=True, text=True,
+                         cwd=os.path.dirname(os.path.abspath(script)), check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m fpk.bench_startup")
+    ap.add_argument("scripts", nargs="*", default=["app.py", "audit.py"])
+    ap.add_argument("--budget", type=float, default=2.0, help="batas median total (detik)")
+    ap.add_argument("--ulang", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    gagal = False
+    for script in args.scripts:
+        hasil = [ukur(script) for _ in range(args.ulang)]
+        med   = statistics.median(h["total"] for h in hasil)
+        berat = sorted({m for h in hasil for m in h["modul_berat"]})
+        error = [e for h in hasil for e in h["error"]]
+        print(f"{script}: median {med:.3f} s "
+              f"(import streamlit {statistics.median(h['import_streamlit'] for h in hasil):.3f} s, "
+              f"render login {statistics.median(h['render_login'] for h in hasil):.3f} s)"
+              f" · modul berat: {', '.join(berat) or '-'}")
+        if error:
+            print(f"  error: {error[0]}")
+        if med > args.budget or berat or error:
+            gagal = True
+    sys.exit(1 if gagal else 0)
+
+
+if __name__ == "__main__":
+    main()
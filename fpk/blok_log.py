@@ -0,0 +1,149 @@
+"""Blok HTML rekap & riwayat konversi, dirender sekali per versi log.
+
+Rerun Streamlit cukup membaca riwayat.versi() (satu query kecil); selama
+versi sama, data & HTML diambil dari cache modul ini tanpa query agregat
+ulang. Tiap blok dikirim sebagai satu elemen markdown, jadi jumlah elemen
+tidak tumbuh dengan panjang riwayat.
+"""
+import threading
+from collections import OrderedDict
+
+from fpk import riwayat
+
+CACHE_MAX = 64
+
+_cache = OrderedDict()
+_lock  = threading.Lock()
+
+
+def _memo(kunci, buat):
+    with _lock:
+        if kunci in _cache:
+            _cache.move_to_end(kunci)
+            return _cache[kunci]
+    nilai = buat()
+    with _lock:
+        _cache[kunci] = nilai
+        while len(_cache) > CACHE_MAX:
+            _cache.popitem(last=False)
+    return nilai
+
+
+def _rp(n) -> str:
+    return f"Rp {n:,.0f}".replace(",", ".")
+
+
+# ── DATA ────────────────────────────────────────────────────
+def data(versi: int) -> dict:
+    """Ringkasan, rekap per periode & daftar periode untuk satu versi log."""
+    def buat():
+        ringkas = riwayat.ringkasan()
+        ada     = ringkas["total_entri"] > 0
+        return {
+            "ringkas":    ringkas,
+            "rekap_rows": riwayat.rekap_periode() if ada else [],
+            "periode":    riwayat.daftar_periode() if ada else [],
+        }
+    return _memo(("data", versi), buat)
+
+
+# ── REKAP PER BULAN ─────────────────────────────────────────
+def rekap_bulan(versi: int) -> str:
+    def buat():
+        rekap = {}
+        for r in data(versi)["rekap_rows"]:
+            if r['periode'] not in rekap:
+                rekap[r['periode']] = {'total': 0, 'count': 0, 'konversi': 0, 'tingkats': set()}
+            rekap[r['periode']]['total']    += r['total']
+            rekap[r['periode']]['count']    += r['count']
+            rekap[r['periode']]['konversi'] += r['konversi']
+            rekap[r['periode']]['tingkats'].add(r['tingkat'] or '')
+
+        kartu = []
+        for p, r in rekap.items():
+            tkt_str = " · ".join(sorted(t for t in r['tingkats'] if t))
+            kartu.append(f"""
+        <div class="rekap-card">
+            <div class="rekap-left">
+                <div class="rekap-period">{p}</div>
+                <div class="rekap-meta">{r['konversi']}x konversi &nbsp;·&nbsp; {r['count']} SEP &nbsp;·&nbsp; {tkt_str}</div>
+            </div>
+            <div class="rekap-total">{_rp(r['total'])}</div>
+        </div>""")
+        return "".join(kartu)
+    return _memo(("rekap", versi), buat)
+
+
+# ── RINGKASAN LOG ───────────────────────────────────────────
+def ringkasan(versi: int, dark: bool) -> str:
+    def buat():
+        r    = data(versi)["ringkas"]
+        dim  = '#334155' if dark else '#94a3b8'
+        surf = 'rgba(255,255,255,0.03)' if dark else 'rgba(0,0,0,0.02)'
+        bdr  = 'rgba(255,255,255,0.07)' if dark else 'rgba(0,0,0,0.08)'
+        th   = '#f1f5f9' if dark else '#1e293b'
+        return f"""
+    <div style="display:grid; grid-template-columns:1fr 1fr 1fr 1fr; gap:0.6rem; margin-bottom:1rem;">
+        <div style="background:{surf}; border:1px solid {bdr}; border-radius:12px; padding:0.9rem 1rem;">
+            <div style="color:{dim}; font-size:9px; font-weight:700; letter-spacing:2px; text-transform:uppercase; margin-bottom:4px;">Total Konversi</div>
+            <div style="color:{th}; font-size:1.3rem; font-weight:800;">{r['total_entri']}</div>
+        </div>
+        <div style="background:{surf}; border:1px solid {bdr}; border-radius:12px; padding:0.9rem 1rem;">
+            <div style="color:{dim}; font-size:9px; font-weight:700; letter-spacing:2px; text-transform:uppercase; margin-bottom:4px;">Selesai</div>
+            <div style="color:#34d399; font-size:1.3rem; font-weight:800;">{r['total_selesai']}</div>
+        </div>
+        <div style="background:{surf}; border:1px solid {bdr}; border-radius:12px; padding:0.9rem 1rem;">
+            <div style="color:{dim}; font-size:9px; font-weight:700; letter-spacing:2px; text-transform:uppercase; margin-bottom:4px;">Pending</div>
+            <div style="color:#fbbf24; font-size:1.3rem; font-weight:800;">{r['total_pending']}</div>
+        </div>
+        <div style="background:{surf}; border:1px solid {bdr}; border-radius:12px; padding:0.9rem 1rem; overflow:hidden;">
+            <div style="color:{dim}; font-size:9px; font-weight:700; letter-spacing:2px; text-transform:uppercase; margin-bottom:4px;">Total Nominal</div>
+            <div style="color:#818cf8; font-size:0.8rem; font-weight:800; white-space:nowrap;">{_rp(r['total_nominal'])}</div>
+        </div>
+    </div>
+    """
+    return _memo(("ringkasan", versi, dark), buat)
+
+
+# ── DAFTAR RIWAYAT ──────────────────────────────────────────
+def _item(item) -> str:
+    tkt      = item.get('tingkat', '')
+    t_cls    = tkt.lower() if tkt in ('RITL', 'RJTL', 'RITP', 'RJTP') else 'other'
+    badge    = f'<span class="log-badge {t_cls}">{tkt}</span>' if tkt else ''
+    status   = item.get('status', 'Belum Diambil')
+    wkt_sel  = item.get('waktu_selesai')
+
+    if status == 'Selesai':
+        status_html  = '<span class="status-selesai">✓ Selesai</span>'
+        footer_extra = f'<span class="log-item-sep">·</span><span class="log-item-time">📥 {wkt_sel}</span>' if wkt_sel else ''
+    else:
+        status_html  = '<span class="status-pending">⏳ Belum Diambil</span>'
+        footer_extra = ''
+
+    return f"""
+        <div class="log-item">
+            <div class="log-item-name">📄 {item['nama_file']} {badge} {status_html}</div>
+            <div class="log-item-footer">
+                <span class="log-item-time">🕓 {item['waktu']}</span>
+                <span class="log-item-sep">·</span>
+                <span class="log-item-total">{_rp(item['total'])}</span>
+                <span class="log-item-sep">·</span>
+                <span class="log-item-count">{item['jumlah']} SEP</span>
+                {footer_extra}
+            </div>
+        </div>"""
+
+
+def daftar(versi: int, periode=None, tingkat=None, status=None,
+           limit: int = 10, offset: int = 0) -> dict:
+    """{"html", "pending" (nama file belum diambil), "n_filter"} untuk satu halaman riwayat."""
+    def buat():
+        items, n_filter = riwayat.query(periode=periode, tingkat=tingkat, status=status,
+                                        limit=limit, offset=offset)
+        return {
+            "html":     "".join(_item(it) for it in items),
+            "pending":  list(dict.fromkeys(it['nama_file'] for it in items
+                                           if it.get('status') != 'Selesai')),
+            "n_filter": n_filter,
+        }
+    return _memo(("daftar", versi, periode, tingkat, status, limit, offset), buat)
@@ -0,0 +1,48 @@
+import io
+import json
+import zipfile
+import tempfile
+
+# Di atas batas ini ZIP di-spool ke disk, bukan RAM
+SPOOL_MAX = 32 * 1024 * 1024
+
+
+def tulis_zip(results, waktu: str):
+    """Tulis semua CSV hasil + manifest.json ke ZIP, satu file per langkah.
+
+    Tiap CSV ditulis langsung ke entri ZIP lewat stream, jadi tidak ada
+    bytes CSV lengkap yang ditahan di memori. Mengembalikan file-like
+    yang sudah di-seek ke awal.
+    """
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX)
+    manifest = {"dibuat": waktu, "jumlah_file": len(results), "files": []}
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for res in results:
+            with zf.open(res["filename"], "w") as raw:
+                with io.TextIOWrapper(raw, encoding="utf-8", newline="") as txt:
+                    res["df"].to_csv(txt, index=False)
+            manifest["files"].append({
+                "nama_file": res["filename"],
+                "tingkat":   res["tingkat"],
+                "jumlah":    int(res["count"]),
+                "total":     int(res["total"]),
+            })
+        manifest["total_sep"]     = sum(f["jumlah"] for f in manifest["files"])
+        manifest["total_nominal"] = sum(f["total"] for f in manifest["files"])
+        zf.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
+    out.seek(0)
+    return out
+
+
+def zip_bytes(results, waktu: str) -> bytes:
+    """Bytes ZIP untuk st.download_button (dipanggil lazy saat tombol diklik).
+
+    Bytes tidak terhindarkan di sini: download_button mengubah data apa pun
+    (termasuk file object) menjadi bytes dan menyimpannya di media storage
+    Streamlit yang ada di memori. Spool tetap berguna: ZIP besar dibangun di
+    disk, jadi yang ada di RAM hanya satu salinan hasil read() — bukan buffer
+    BytesIO plus salinannya. Pemanggil di luar Streamlit sebaiknya memakai
+    tulis_zip dan men-stream file object-nya.
+    """
+    with tulis_zip(results, waktu) as f:
+        return f.read()
@@ -0,0 +1,97 @@
+"""Export xlsx cepat untuk workbook audit.
+
+Pakai xlsxwriter mode `constant_memory` (baris ditulis berurutan lalu
+di-flush ke disk, memori tetap kecil walau sheet detail 50rb+ baris).
+Format rupiah & tanggal dipasang per kolom lewat `set_column`, bukan per sel.
+Bila xlsxwriter tidak terpasang, jatuh ke pandas + openpyxl.
+"""
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+FORMAT_RP  = '"Rp" #,##0'
+FORMAT_TGL = "yyyy-mm-dd"
+
+# Kolom bernilai rupiah di sheet audit
+KOLOM_RP = {
+    "Biaya Riil RS", "Diajukan", "Disetujui", "Jasa Pelayanan", "Selisih CBG",
+    "Jaspel Selisih", "Total Jaspel", "Jaspel RI", "Jaspel RJ", "Total",
+}
+
+LEBAR_MIN, LEBAR_MAX = 10, 48
+
+_pool    = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fpk-xlsx")
+_jobs    = {}
+_lock    = threading.Lock()
+JOBS_MAX = 4
+
+
+def _kolom_list(s):
+    """Satu kolom → list nilai Python (NaN/NA → None agar jadi sel kosong)."""
+    if s.isna().any():
+        s = s.astype(object).where(s.notna(), None)
+    return s.tolist()
+
+
+def _tulis_xlsxwriter(sheets, out):
+    import xlsxwriter
+    from pandas.api.types import is_datetime64_any_dtype
+
+    wb = xlsxwriter.Workbook(out, {"constant_memory": True, "in_memory": False})
+    try:
+        f_head = wb.add_format({"bold": True})
+        f_rp   = wb.add_format({"num_format": FORMAT_RP})
+        f_tgl  = wb.add_format({"num_format": FORMAT_TGL})
+        for nama, df in sheets:
+            ws = wb.add_worksheet(nama[:31])
+            for j, kol in enumerate(df.columns):
+                isi   = df[kol].head(200).astype(str).str.len().max() if len(df) else 0
+                lebar = min(max(len(str(kol)), int(isi or 0), LEBAR_MIN) + 2, LEBAR_MAX)
+                if kol in KOLOM_RP:
+                    fmt = f_rp
+                elif is_datetime64_any_dtype(df[kol]):
+                    fmt, lebar = f_tgl, max(LEBAR_MIN, len(str(kol))) + 2
+                else:
+                    fmt = None
+                ws.set_column(j, j, lebar, fmt)
+            ws.write_row(0, 0, [str(k) for k in df.columns], f_head)
+            ws.freeze_panes(1, 0)
+            for i, baris in enumerate(zip(*(_kolom_list(df[k]) for k in df.columns)), 1):
+                ws.write_row(i, 0, baris)
+    finally:
+        wb.close()
+
+
+def _tulis_openpyxl(sheets, out):
+    import pandas as pd
+
+    with pd.ExcelWriter(out, engine="openpyxl") as w:
+        for nama, df in sheets:
+            df.to_excel(w, index=False, sheet_name=nama[:31])
+
+
+def xlsx_bytes(sheets) -> bytes:
+    """`sheets` = [(nama_sheet, DataFrame), ...] → bytes .xlsx."""
+    buf = io.BytesIO()
+    try:
+        _tulis_xlsxwriter(sheets, buf)
+    except ImportError:
+        buf = io.BytesIO()
+        _tulis_openpyxl(sheets, buf)
+    return buf.getvalue()
+
+
+def xlsx_background(kunci: str, sheets):
+    """Mulai membuat xlsx di thread background; Future dipakai ulang per `kunci`.
+
+    Halaman bisa langsung tampil; tombol download cukup memanggil
+    `.result()` yang biasanya sudah selesai saat pengguna mengklik.
+    """
+    with _lock:
+        fut = _jobs.get(kunci)
+        if fut is None:
+            fut = _pool.submit(xlsx_bytes, sheets)
+            _jobs[kunci] = fut
+            while len(_jobs) > JOBS_MAX:
+                _jobs.pop(next(iter(_jobs)))
+        return fut
@@ -0,0 +1,355 @@
+import sys
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import tabula
+
+from fpk import ocr, page_cache, validasi
+from fpk.tata_letak import baris_dari_teks, urai_pdf
+from fpk.skema import KOLOM, dari_rows, ketik
+
+KOLOM_CSV = ['No.SEP', 'Disetujui']
+
+# Pratinjau: berhenti setelah sekian baris atau sekian detik, mana dulu
+PRATINJAU_BARIS = 200
+PRATINJAU_DETIK = 0.5
+
+
+# Perekam per thread (diisi oleh fpk.profil): durasi panggilan tabula
+# (`catat`) & memori per langkah hot path (`memori`)
+_rekam = threading.local()
+
+
+def _ukuran(masukan) -> int:
+    """Byte data satu DataFrame / list DataFrame (string ikut dihitung)."""
+    frames = masukan if isinstance(masukan, list) else [masukan]
+    return int(sum(df.memory_usage(index=False, deep=True).sum() for df in frames))
+
+
+@contextmanager
+def langkah(nama: str, masukan=None):
+    """Catat memori satu langkah hot path bila perekam memori aktif.
+
+    Per nama langkah: jumlah panggilan, puncak heap Python di atas awal
+    langkah (tracemalloc), byte yang dialokasikan di pool Arrow (string
+    pandas ≥ 3 berbasis pyarrow tidak terlihat oleh tracemalloc), selisih
+    blok objek Python yang masih hidup, dan durasi. Bila `masukan` diberikan,
+    salinan = (puncak + alokasi Arrow) / ukuran masukan — berapa kali data
+    masukan disalin. Tanpa perekam (jalur normal) biayanya satu getattr.
+
+    reset_peak bersifat global, jadi hanya dipakai bila tidak ada job profil
+    lain yang berjalan; selama job profil tumpang tindih, puncak langkah
+    dicatat sebagai pertambahan memori bersih (batas bawah).
+    """
+    memori = getattr(_rekam, 'memori', None)
+    if memori is None or not tracemalloc.is_tracing():
+        yield
+        return
+    pool = sys.modules['pyarrow'].default_memory_pool() if 'pyarrow' in sys.modules else None
+    # reset_peak menghapus puncak global; simpan dulu untuk laporan total.
+    # Ukuran masukan dihitung sebelum reset supaya tidak ikut terukur.
+    profil  = sys.modules.get('fpk.profil')
+    sendiri = profil is None or profil.jumlah_aktif() <= 1
+    _rekam.puncak = max(getattr(_rekam, 'puncak', 0), tracemalloc.get_traced_memory()[1])
+    ukuran = _ukuran(masukan) if masukan is not None else 0
+    if sendiri:
+        tracemalloc.reset_peak()
+    awal, _ = tracemalloc.get_traced_memory()
+    arrow0  = pool.total_bytes_allocated() if pool else 0
+    blok0   = sys.getallocatedblocks()
+    t0      = time.perf_counter()
+    try:
+        yield
+    finally:
+        detik  = time.perf_counter() - t0
+        objek  = sys.getallocatedblocks() - blok0
+        arrow  = pool.total_bytes_allocated() - arrow0 if pool else 0
+        kini, puncak = tracemalloc.get_traced_memory()
+        _rekam.puncak = max(_rekam.puncak, puncak)
+        if not sendiri:
+            puncak = kini
+        m = memori.setdefault(nama, {'panggilan': 0, 'puncak': 0, 'arrow': 0, 'objek': 0,
+                                     'detik': 0.0, 'byte': 0, 'masukan': 0})
+        m['panggilan'] += 1
+        m['puncak']     = max(m['puncak'], puncak - awal)
+        m['arrow']     += arrow
+        m['objek']     += objek
+        m['detik']     += detik
+        if masukan is not None:
+            m['byte']    += puncak - awal + arrow
+            m['masukan'] += ukuran
+
+
+def baca_tabel(pdf_path, pages='all'):
+    t0 = time.perf_counter()
+    with langkah('tabula'):
+        df_list = tabula.read_pdf(pdf_path, pages=pages, multiple_tables=True,
+                                  lattice=True, pandas_options={'header': None})
+    catat = getattr(_rekam, 'catat', None)
+    if catat is not None:
+        catat.append({'pages': pages, 'detik': time.perf_counter() - t0, 'tabel': len(df_list)})
+    return df_list
+
+
+def _tabel_dari_json(raw) -> list:
+    """Tabel JSON tabula-java → df_list, sama dengan read_pdf(pandas_options={'header': None})."""
+    dfs = []
+    for tabel in raw:
+        if not tabel['data']:
+            continue
+        df = pd.DataFrame([[e['text'] or np.nan for e in row] for row in tabel['data']])
+        for c in df.columns:
+            try:
+                df[c] = pd.to_numeric(df[c], errors='raise')
+            except (ValueError, TypeError):
+                pass
+        dfs.append(df)
+    return dfs
+
+
+def _baca_batch(pdf_path, pages) -> dict:
+    """{halaman: df_list} untuk `pages` dalam satu JVM (mode batch tabula-java).
+
+    Tiap halaman disalin ke PDF satu halaman (pypdfium2) di folder sementara;
+    tabula-java menulis satu JSON per file, jadi hasilnya bisa dipetakan
+    kembali ke nomor halaman (JSON read_pdf tidak membawa nomor halaman).
+    """
+    import os
+    import json
+    import tempfile
+    import pypdfium2 as pdfium
+
+    t0, hasil = time.perf_counter(), {}
+    with tempfile.TemporaryDirectory(prefix='fpk_tabula_') as d:
+        src = pdfium.PdfDocument(pdf_path)
+        try:
+            for p in pages:
+                dst = pdfium.PdfDocument.new()
+                dst.import_pages(src, [p - 1])
+                dst.save(os.path.join(d, f'{p}.pdf'))
+                dst.close()
+        finally:
+            src.close()
+        with langkah('tabula'):
+            tabula.convert_into_by_batch(d, output_format='json', lattice=True)
+            for nama in os.listdir(d):
+                stem, ext = os.path.splitext(nama)
+                if ext == '.json' and stem.isdigit():
+                    with open(os.path.join(d, nama)) as f:
+                        hasil[int(stem)] = _tabel_dari_json(json.load(f))
+    catat = getattr(_rekam, 'catat', None)
+    if catat is not None:
+        catat.append({'pages': list(pages), 'detik': time.perf_counter() - t0,
+                      'tabel': sum(len(v) for v in hasil.values())})
+    return hasil
+
+
+def baca_tabel_halaman(pdf_path, pages):
+    """Generator (halaman, df_list) per halaman di `pages`, berurutan.
+
+    Dengan jpype tabula berjalan in-process, jadi cukup satu read_pdf per
+    halaman. Tanpa jpype tiap read_pdf menyalakan JVM baru; semua halaman
+    diekstrak sekaligus lewat _baca_batch (halaman yang tidak menghasilkan
+    JSON dibaca ulang satu per satu).
+    """
+    pages = list(pages)
+    if _jpype_tersedia() or len(pages) <= 1:
+        for p in pages:
+            yield p, baca_tabel(pdf_path, pages=p)
+        return
+    hasil = _baca_batch(pdf_path, pages)
+    for p in pages:
+        yield p, hasil[p] if p in hasil else baca_tabel(pdf_path, pages=p)
+
+
+def _baris_data(no_urut: pd.Series) -> np.ndarray:
+    """Mask baris data = No. Urut numerik (semantik pd.to_numeric).
+
+    Angka bulat dicek dengan regex string (tanpa membuat objek float/str per
+    sel); to_numeric hanya untuk sisa baris yang tidak cocok (header, dll).
+    """
+    if pd.api.types.is_numeric_dtype(no_urut):
+        return no_urut.notna().to_numpy()
+    ok = no_urut.str.fullmatch(r'\s*\d+\s*').fillna(False).to_numpy(dtype=bool, copy=True)
+    if not ok.all():
+        sisa = np.flatnonzero(~ok)
+        ok[sisa] = pd.to_numeric(no_urut.iloc[sisa], errors='coerce').notna().to_numpy()
+    return ok
+
+
+def pilih_baris(df_list):
+    """Gabung tabel tabula, ambil 6 kolom pertama dari baris data (belum dibersihkan).
+
+    Satu concat tabel sumber; 6 kolom diambil sebagai view (tanpa .copy())
+    dan baris non-data dibuang dengan satu take posisi, hanya bila ada.
+    Index baru dipasang sebagai metadata, jadi data disalin paling banyak
+    dua kali (concat + take), bukan empat.
+    """
+    cleaned = [df for df in df_list if df.shape[1] >= 6 and len(df) > 1]
+    if not cleaned:
+        return pd.DataFrame(columns=KOLOM)
+    with langkah('concat', cleaned):
+        df_data = pd.concat(cleaned, ignore_index=True).iloc[:, :6]
+    with langkah('filter', df_data):
+        ok = _baris_data(df_data.iloc[:, 0])
+        if not ok.all():
+            df_data = df_data.iloc[np.flatnonzero(ok)]
+    df_data.columns = KOLOM
+    df_data.index   = pd.RangeIndex(len(df_data))
+    return df_data
+
+
+def bersihkan(df_data):
+    """Normalisasi No.SEP & Disetujui → DataFrame 2 kolom siap CSV."""
+    return ketik(df_data)[KOLOM_CSV]
+
+
+def _cek_tabel(df_list, scan=()):
+    if not any(df.shape[1] >= 6 and len(df) > 1 for df in df_list):
+        if scan:
+            raise ValueError(ocr.ERR_OCR)
+        if not df_list:
+            raise ValueError("PDF tidak terbaca.")
+        raise ValueError("Tidak ada tabel data SEP di PDF.")
+
+
+# ── OCR HALAMAN SCAN ────────────────────────────────────────
+def _mulai_ocr(pdf_path, halaman, hashes=None):
+    """Mulai OCR halaman scan di background; ambil() → {halaman: rows}.
+
+    Tabula tidak membaca halaman gambar, jadi OCR berjalan paralel dengan
+    ekstraksi halaman berteks. {} bila tidak ada halaman scan / OCR tidak tersedia.
+    """
+    if not halaman or not ocr.tersedia():
+        return dict
+    ambil = ocr.ocr_async(pdf_path, halaman, hashes)
+    return lambda: {p: [list(r) for r in baris_dari_teks(t)] for p, t in ambil().items()}
+
+
+def _sisipkan_ocr(df_data, baris_ocr: dict):
+    """Gabung baris OCR ke baris tabula, urut No. Urut (tabula tidak memberi nomor halaman)."""
+    rows = [r for p in sorted(baris_ocr) for r in baris_ocr[p]]
+    if not rows:
+        return df_data
+    df   = pd.concat([df_data, pd.DataFrame(rows, columns=KOLOM)], ignore_index=True)
+    urut = pd.to_numeric(df['No. Urut'], errors='coerce')
+    return df.iloc[urut.argsort(kind='stable')].reset_index(drop=True)
+
+
+def process_data(pdf_path, lengkap: bool = False):
+    """lengkap=True → 6 kolom bertipe (fpk.skema); default 2 kolom CSV."""
+    scan      = ocr.halaman_tanpa_teks(pdf_path)
+    ambil_ocr = _mulai_ocr(pdf_path, scan)
+    df_list   = baca_tabel(pdf_path)
+    baris_ocr = ambil_ocr()
+    if not any(baris_ocr.values()):
+        _cek_tabel(df_list, scan)
+    df_data = _sisipkan_ocr(pilih_baris(df_list), baris_ocr)
+    with langkah('ketik', df_data):
+        df = ketik(df_data)
+    return df if lengkap else df[KOLOM_CSV]
+
+
+# ── PRATINJAU CEPAT ─────────────────────────────────────────
+def pratinjau(pdf_path, n_baris: int = PRATINJAU_BARIS, batas_detik: float = PRATINJAU_DETIK):
+    """Baris awal dokumen untuk preview, tanpa menunggu ekstraksi penuh.
+
+    Halaman dibaca berurutan dengan parser tata letak (pdfminer, tanpa JVM)
+    dan berhenti begitu `n_baris` terkumpul atau `batas_detik` habis, jadi
+    waktunya tidak bergantung pada jumlah halaman. Mengembalikan
+    (df bertipe, halaman_dibaca); df kosong bila halaman awal hasil scan.
+    """
+    t0, rows, dibaca = time.perf_counter(), [], 0
+    with open(pdf_path, 'rb') as f:
+        halaman = urai_pdf(f)
+        try:
+            for i, _, hasil in halaman:
+                dibaca = i
+                rows.extend(hasil['rows'])
+                if len(rows) >= n_baris or time.perf_counter() - t0 > batas_detik:
+                    break
+        finally:
+            halaman.close()
+    return dari_rows(rows[:n_baris]), dibaca
+
+
+# ── INKREMENTAL PER HALAMAN ─────────────────────────────────
+def _jpype_tersedia() -> bool:
+    try:
+        import jpype  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def process_data_incremental(pdf_path, nama: str = None, digest: str = None,
+                             lengkap: bool = False, lapor=None):
+    """Seperti process_data, tapi hanya halaman yang content stream-nya berubah
+    yang diekstrak ulang; halaman lain diambil dari cache fingerprint.
+
+    Mengembalikan (df, info); df 6 kolom bertipe bila `lengkap`, selain itu
+    2 kolom CSV. info['anomali'] = mask flag per baris dari fpk.validasi;
+    info['ocr'] = jumlah halaman scan yang dibaca lewat OCR. Bila `nama`
+    diberikan, info['diff'] berisi SEP yang ditambah/dihapus/berubah
+    dibanding konversi terakhir nama itu.
+
+    Bila `lapor` diberikan, lapor(halaman_selesai, total_halaman, df_potongan)
+    dipanggil dari thread ekstraksi tiap potongan selesai (halaman cache
+    sekaligus di awal, lalu per halaman) — df_potongan 6 kolom bertipe.
+    """
+    hashes = page_cache.page_hashes(pdf_path)
+    if not hashes:
+        raise ValueError("PDF tidak terbaca.")
+    cached  = page_cache.ambil_halaman(hashes)
+    missing = [i + 1 for i, h in enumerate(hashes) if h not in cached]
+
+    # Halaman scan yang belum di-cache di-OCR paralel dengan tabula
+    tanpa_teks = ocr.halaman_tanpa_teks(pdf_path) if missing else []
+    scan       = [p for p in tanpa_teks if p <= len(hashes) and hashes[p - 1] not in cached]
+    ambil_ocr  = _mulai_ocr(pdf_path, scan, hashes)
+
+    baris   = dict(cached)
+    selesai = len(hashes) - len(missing)
+    if lapor is not None and selesai:
+        lapor(selesai, len(hashes), dari_rows([r for h in hashes if h in cached for r in cached[h]]))
+    for p, df_list in baca_tabel_halaman(pdf_path, [p for p in missing if p not in scan]):
+        df_p = pilih_baris(df_list)
+        baris[hashes[p - 1]] = df_p.values.tolist()
+        selesai += 1
+        if lapor is not None:
+            lapor(selesai, len(hashes), ketik(df_p))
+    baris_ocr = ambil_ocr()
+    n_ocr     = len(baris_ocr)
+    for p, r in baris_ocr.items():
+        baris[hashes[p - 1]] = r
+    if lapor is not None and scan:
+        lapor(len(hashes), len(hashes), dari_rows([r for rs in baris_ocr.values() for r in rs]))
+    # Halaman scan tanpa OCR tidak di-cache, supaya terbaca begitu OCR dipasang
+    page_cache.simpan_halaman({hashes[p - 1]: baris[hashes[p - 1]] for p in missing
+                               if hashes[p - 1] in baris})
+    rows = [r for h in hashes for r in baris.get(h, [])]
+    if not rows:
+        raise ValueError(ocr.ERR_OCR if scan else "Tidak ada tabel data SEP di PDF.")
+    df_data = pd.DataFrame(rows, columns=KOLOM)
+
+    with langkah('ketik', df_data):
+        df = ketik(df_data)
+    info = {
+        'halaman':    len(hashes),
+        'diekstrak':  len(missing),
+        'dari_cache': len(hashes) - len(missing),
+        'ocr':        n_ocr,
+        'diff':       None,
+        'anomali':    validasi.periksa(df),
+    }
+    if nama:
+        baru_sep = page_cache.seps_dokumen(df['No.SEP'], df['Disetujui'].astype(int))
+        lama = page_cache.ambil_dokumen(nama)
+        if lama is not None and lama['hash'] != digest:
+            info['diff'] = page_cache.diff_sep(lama['seps'], baru_sep)
+        page_cache.simpan_dokumen(nama, digest, baru_sep)
+    return (df if lengkap else df[KOLOM_CSV]), info
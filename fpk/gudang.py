@@ -0,0 +1,107 @@
+import os
+import time
+
+import pandas as pd
+
+from fpk.riwayat import BULAN_ORDER
+
+GUDANG_DIR = "gudang_sep"
+
+# Partisi hive: gudang_sep/tahun=2026/bulan=3/tingkat=RITL/<nama>.parquet
+PARTISI = ["tahun", "bulan", "tingkat"]
+
+
+def periode_ke_angka(periode: str):
+    """'MARET 2026' → (2026, 3); None bila tidak dikenali."""
+    bagian = (periode or "").upper().split()
+    if len(bagian) < 2 or bagian[0] not in BULAN_ORDER or not bagian[-1].isdigit():
+        return None
+    return int(bagian[-1]), BULAN_ORDER.index(bagian[0]) + 1
+
+
+# ── SIMPAN ──────────────────────────────────────────────────
+def simpan(df: pd.DataFrame, nama: str, tahun: int, bulan: int, tingkat: str,
+           sumber: str, digest: str = None) -> str:
+    """Simpan baris per SEP ke partisi periode/tingkat.
+
+    Satu file per `nama` dalam partisi, jadi konversi ulang (revisi) dengan
+    nama yang sama menggantikan data lama, bukan menduplikasi.
+    """
+    out = pd.DataFrame({
+        "no_sep":     df["No.SEP"].astype("string"),
+        "disetujui":  pd.to_numeric(df["Disetujui"], errors="coerce").astype("Int64"),
+        "biaya_riil": (pd.to_numeric(df["Biaya Riil RS"], errors="coerce").astype("Int64")
+                       if "Biaya Riil RS" in df.columns else pd.array([pd.NA] * len(df), dtype="Int64")),
+        "sumber":     sumber,
+        "nama":       nama,
+        "hash":       digest or "",
+        "dibuat":     time.time(),
+    })
+    folder = os.path.join(GUDANG_DIR, f"tahun={tahun}", f"bulan={bulan}", f"tingkat={tingkat}")
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f"{nama}.parquet")
+    tmp  = os.path.join(folder, f".{nama}.parquet.tmp")  # diabaikan pyarrow saat baca
+    out.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    return path
+
+
+# ── BACA & QUERY ────────────────────────────────────────────
+def baca(tahun=None, bulan=None, tingkat=None, kolom=None) -> pd.DataFrame:
+    """Baca baris SEP dengan partition pruning; SEP ganda per periode diambil yang terbaru."""
+    if not os.path.isdir(GUDANG_DIR):
+        return pd.DataFrame(columns=["no_sep", "disetujui", "biaya_riil"] + PARTISI)
+    filters = []
+    for key, val in (("tahun", tahun), ("bulan", bulan), ("tingkat", tingkat)):
+        if val is None:
+            continue
+        vals = list(val) if isinstance(val, (list, tuple, set)) else [val]
+        filters.append((key, "in", vals))
+    if kolom is not None:
+        kolom = list(dict.fromkeys(list(kolom) + ["no_sep", "dibuat"] + PARTISI))
+    df = pd.read_parquet(GUDANG_DIR, engine="pyarrow", columns=kolom,
+                         filters=filters or None, partitioning="hive")
+    if df.empty:
+        return df
+    for p in PARTISI:
+        df[p] = df[p].astype(str if p == "tingkat" else int)
+    df = df.sort_values("dibuat")
+    if "biaya_riil" in df.columns:
+        # Biaya riil bisa hanya ada di salah satu sumber (audit); bawa ke baris terbaru
+        df["biaya_riil"] = df.groupby(["no_sep", "tahun", "bulan"])["biaya_riil"].transform("last")
+    df = (df.drop_duplicates(subset=["no_sep", "tahun", "bulan"], keep="last")
+            .reset_index(drop=True))
+    return df
+
+
+def total_bulanan(tahun=None, tingkat=None) -> pd.DataFrame:
+    """Jumlah SEP & total Disetujui per (tahun, bulan, tingkat)."""
+    df = baca(tahun=tahun, tingkat=tingkat, kolom=["disetujui"])
+    if df.empty:
+        return pd.DataFrame(columns=["tahun", "bulan", "tingkat", "n_sep", "total"])
+    return (df.groupby(["tahun", "bulan", "tingkat"], observed=True)
+              .agg(n_sep=("no_sep", "size"), total=("disetujui", "sum"))
+              .reset_index()
+              .sort_values(["tahun", "bulan", "tingkat"]))
+
+
+def distribusi_selisih(tahun=None, bulan=None, tingkat=None,
+                       q=(0.05, 0.25, 0.5, 0.75, 0.95)) -> pd.Series:
+    """Statistik selisih CBG − biaya riil (hanya SEP yang punya biaya riil)."""
+    df = baca(tahun=tahun, bulan=bulan, tingkat=tingkat, kolom=["disetujui", "biaya_riil"])
+    sel = (df["disetujui"] - df["biaya_riil"]).dropna().astype("int64") if not df.empty else pd.Series(dtype="int64")
+    hasil = sel.describe()
+    for x in q:
+        hasil[f"p{int(x * 100)}"] = sel.quantile(x) if len(sel) else float("nan")
+    return hasil
+
+
+def outlier_teratas(n: int = 20, tahun=None, bulan=None, tingkat=None,
+                    kolom: str = "disetujui") -> pd.DataFrame:
+    """n SEP dengan nilai `kolom` (disetujui / selisih) terbesar secara absolut."""
+    df = baca(tahun=tahun, bulan=bulan, tingkat=tingkat, kolom=["disetujui", "biaya_riil"])
+    if df.empty:
+        return df
+    df["selisih"] = df["disetujui"] - df["biaya_riil"]
+    nilai = df[kolom].abs().astype("float64")
+    return df.loc[nilai.nlargest(n).index].reset_index(drop=True)
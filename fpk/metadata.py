@@ -0,0 +1,194 @@
+import io
+import re
+import zlib
+import hashlib
+import threading
+from collections import OrderedDict
+
+# ── POLA METADATA ───────────────────────────────────────────
+BULAN_POLA = (r"(JANUARI|FEBRUARI|MARET|APRIL|MEI|JUNI|JULI|"
+              r"AGUSTUS|SEPTEMBER|OKTOBER|NOVEMBER|DESEMBER)")
+RE_BULAN   = re.compile(f"{BULAN_POLA}\\s+(\\d{{4}})", re.IGNORECASE)
+RE_TINGKAT = re.compile(r"Tingkat\s+Pelayanan\s*:\s*(RITL|RJTL|RITP|RJTP)", re.IGNORECASE)
+RE_BULAN_PEL = re.compile(r"Bulan Pelayanan\s*:\s*([^\n]+)")
+
+# Operator teks di content stream: (literal) Tj / ' / "  dan  [ ... ] TJ
+_RE_TJ  = re.compile(rb"\((?:\\.|[^\\)])*\)\s*(?:Tj|'|\")|\[(?:\\.|[^\]])*\]\s*TJ", re.S)
+_RE_LIT = re.compile(rb"\(((?:\\.|[^\\)])*)\)", re.S)
+_RE_ESC = re.compile(rb"\\([nrtbf()\\]|[0-7]{1,3})")
+_ESC    = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f",
+           b"(": b"(", b")": b")", b"\\": b"\\"}
+
+# Porsi atas halaman 1 yang berisi header FPK
+HEADER_RATIO = 0.35
+CHUNK        = 1 << 20
+CACHE_MAX    = 256
+
+_cache      = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# ── HASH FILE ───────────────────────────────────────────────
+def file_hash(src) -> str:
+    """SHA-256 dari path, bytes, atau file-like (dibaca per chunk)."""
+    h = hashlib.sha256()
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        h.update(src)
+        return h.hexdigest()
+    if isinstance(src, str):
+        with open(src, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK), b""):
+                h.update(chunk)
+        return h.hexdigest()
+    pos = src.tell()
+    src.seek(0)
+    for chunk in iter(lambda: src.read(CHUNK), b""):
+        h.update(chunk)
+    src.seek(pos)
+    return h.hexdigest()
+
+
+# ── PARSE TEKS HEADER ───────────────────────────────────────
+def parse_header(text: str) -> dict:
+    """Cari bulan, tahun, tingkat pelayanan & bulan pelayanan dari teks header."""
+    m_b = RE_BULAN.search(text)
+    m_t = RE_TINGKAT.search(text)
+    m_p = RE_BULAN_PEL.search(text)
+    return {
+        "bulan":           m_b.group(1).upper() if m_b else None,
+        "tahun":           m_b.group(2) if m_b else None,
+        "tingkat":         m_t.group(1).upper() if m_t else None,
+        "bulan_pelayanan": m_p.group(1).strip() if m_p else "",
+    }
+
+
+def _lengkap(meta: dict) -> bool:
+    return bool(meta["bulan"] and meta["tingkat"])
+
+
+def nama_dari_meta(meta: dict):
+    """Bentuk (nama_file, tingkat) persis seperti konvensi FPK_{tingkat}_{bulan}_{tahun}."""
+    if meta.get("bulan"):
+        tingkat = meta.get("tingkat") or "FPK"
+        return f"FPK_{tingkat}_{meta['bulan']}_{meta['tahun']}", tingkat
+    if meta.get("tingkat"):
+        return f"FPK_{meta['tingkat']}", meta["tingkat"]
+    return "Hasil_Konversi_FPK", "UNKNOWN"
+
+
+# ── PROBE CEPAT ─────────────────────────────────────────────
+def _buka(src):
+    """Path → file biner; bytes → BytesIO (tanpa tulis file temp)."""
+    if isinstance(src, (bytes, bytearray, memoryview)):
+        return io.BytesIO(src)
+    return open(src, "rb")
+
+
+def _unescape(raw: bytes) -> bytes:
+    def rep(m):
+        k = m.group(1)
+        return _ESC.get(k) or bytes([int(k, 8) & 0xFF])
+    return _RE_ESC.sub(rep, raw)
+
+
+def _teks_stream(src) -> str:
+    """Ambil string literal dari content stream halaman 1 tanpa layout analysis."""
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdftypes import resolve1
+
+    with _buka(src) as f:
+        doc  = PDFDocument(PDFParser(f))
+        page = next(PDFPage.create_pages(doc), None)
+        if page is None:
+            return ""
+        contents = page.contents if isinstance(page.contents, list) else [page.contents]
+        data = b""
+        for c in contents:
+            stream = resolve1(c)
+            try:
+                data += stream.get_data()
+            except Exception:
+                # Filter yang tidak didukung → biarkan fallback yang menangani
+                raw = getattr(stream, "rawdata", b"") or b""
+                try:
+                    data += zlib.decompress(raw)
+                except Exception:
+                    pass
+
+    baris = []
+    for op in _RE_TJ.finditer(data):
+        parts = [_unescape(m.group(1)) for m in _RE_LIT.finditer(op.group(0))]
+        baris.append(b"".join(parts).decode("latin-1"))
+    return "\n".join(baris)
+
+
+def _teks_header(src, full: bool = False) -> str:
+    """Fallback: extract_text pdfplumber hanya untuk area header halaman 1."""
+    import pdfplumber
+    with _buka(src) as f, pdfplumber.open(f, pages=[1]) as pdf:
+        page = pdf.pages[0]
+        if not full:
+            page = page.crop((0, 0, page.width, page.height * HEADER_RATIO))
+        return page.extract_text() or ""
+
+
+def jumlah_halaman(src):
+    """Jumlah halaman dari /Count page tree (tanpa parsing halaman); None bila gagal."""
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdftypes import resolve1
+
+    try:
+        with _buka(src) as f:
+            doc = PDFDocument(PDFParser(f))
+            return int(resolve1(resolve1(doc.catalog["Pages"])["Count"]))
+    except Exception as e:
+        print(f"Gagal hitung halaman: {e}")
+        return None
+
+
+def probe_metadata(pdf_path, digest: str = None) -> dict:
+    """Metadata halaman 1 (bulan, tahun, tingkat) dengan cache per hash file.
+
+    `pdf_path` boleh path atau bytes PDF.
+
+    Urutan: content stream mentah → crop header → seluruh halaman 1.
+    """
+    digest = digest or file_hash(pdf_path)
+    with _cache_lock:
+        if digest in _cache:
+            _cache.move_to_end(digest)
+            return dict(_cache[digest])
+
+    meta = {"bulan": None, "tahun": None, "tingkat": None, "bulan_pelayanan": ""}
+    for sumber in (_teks_stream,
+                   _teks_header,
+                   lambda p: _teks_header(p, full=True)):
+        try:
+            hasil = parse_header(sumber(pdf_path))
+        except Exception as e:
+            print(f"Gagal baca metadata: {e}")
+            continue
+        for k, v in hasil.items():
+            if v and not meta[k]:
+                meta[k] = v
+        if _lengkap(meta):
+            break
+    meta["hash"] = digest
+
+    with _cache_lock:
+        _cache[digest] = dict(meta)
+        while len(_cache) > CACHE_MAX:
+            _cache.popitem(last=False)
+    return meta
+
+
+def ambil_metadata_pdf(pdf_path, digest: str = None):
+    """Nama file output & tingkat pelayanan dari halaman 1 PDF FPK."""
+    try:
+        return nama_dari_meta(probe_metadata(pdf_path, digest))
+    except Exception as e:
+        print(f"Gagal baca metadata: {e}")
+        return "Hasil_Konversi_FPK", "UNKNOWN"
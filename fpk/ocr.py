@@ -0,0 +1,189 @@
+"""OCR fallback untuk halaman FPK hasil scan (tanpa lapisan teks).
+
+Halaman tanpa teks dideteksi dari content stream (murah, tanpa layout),
+dirender dengan pypdfium2, lalu dibaca Tesseract di process pool. Render
+disimpan di cache disk per hash halaman; baris hasil OCR disimpan pemanggil
+di cache halaman (fpk.page_cache) seperti halaman biasa, jadi halaman scan
+yang sama tidak di-OCR dua kali.
+
+Opsional: butuh paket pytesseract + binary tesseract. Bila tidak ada,
+`tersedia()` False dan pemanggil memberi pesan error yang jelas.
+"""
+import os
+import re
+import glob
+import functools
+from concurrent.futures.process import BrokenProcessPool
+
+from fpk import page_cache, proses
+
+DPI         = int(os.environ.get("FPK_OCR_DPI", 300))
+BAHASA      = os.environ.get("FPK_OCR_LANG", "eng")
+KONFIG      = "--psm 6"         # satu blok teks seragam: baris tabel utuh
+OCR_WORKERS = max(1, min(int(os.environ.get("FPK_OCR_WORKERS", 2)), os.cpu_count() or 1))
+RENDER_MAX  = 200               # file PNG di cache render
+
+ERR_OCR = ("PDF berisi halaman hasil scan (tanpa teks), tapi OCR Tesseract "
+           "tidak tersedia di server.")
+
+RE_TEKS   = re.compile(rb"\bBT\b")
+RE_INLINE = re.compile(rb"\bBI\b")
+
+
+@functools.lru_cache(maxsize=1)
+def tersedia() -> bool:
+    """True bila pytesseract terpasang dan binary tesseract bisa dipanggil."""
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+# ── DETEKSI ─────────────────────────────────────────────────
+def halaman_tanpa_teks(src) -> list:
+    """Nomor halaman (1-based) yang berisi gambar tapi tanpa operator teks.
+
+    Halaman dengan Form XObject dianggap berteks (teks bisa ada di dalamnya);
+    halaman kosong tanpa gambar tidak perlu di-OCR.
+    """
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdftypes import resolve1
+
+    hasil = []
+    try:
+        with page_cache.buka(src) as f:
+            doc = PDFDocument(PDFParser(f))
+            for i, page in enumerate(PDFPage.create_pages(doc), 1):
+                contents = page.contents if isinstance(page.contents, list) else [page.contents]
+                data = b"".join(resolve1(c).get_data() for c in contents if c is not None)
+                if RE_TEKS.search(data):
+                    continue
+                xobj  = resolve1((page.resources or {}).get("XObject")) or {}
+                jenis = {getattr(resolve1(resolve1(x).get("Subtype")), "name", None)
+                         for x in xobj.values()}
+                if "Form" in jenis:
+                    continue
+                if "Image" in jenis or RE_INLINE.search(data):
+                    hasil.append(i)
+    except Exception as e:
+        print(f"Gagal deteksi halaman scan: {e}")
+    return hasil
+
+
+def rapikan(teks: str) -> str:
+    """Normalisasi salah baca OCR yang umum pada tabel FPK."""
+    teks = re.sub(r"[|\[\]{}]", " ", teks)                   # garis sel terbaca sebagai karakter
+    return re.sub(r"(?<=\d)\.(?=\d{3}(?!\d))", ",", teks)    # pemisah ribuan "." → ","
+
+
+# ── RENDER + OCR (WORKER) ───────────────────────────────────
+def _render_path(render_dir, h, dpi):
+    return os.path.join(render_dir, f"{h}_{dpi}.png")
+
+
+def _ocr_worker(src, tugas, render_dir: str, dpi: int) -> dict:
+    """OCR sekelompok halaman [(no, hash)]; dokumen dibuka sekali per kelompok."""
+    import pypdfium2 as pdfium
+    import pytesseract
+    from PIL import Image
+
+    hasil, doc = {}, None
+    try:
+        for p, h in tugas:
+            path = _render_path(render_dir, h, dpi) if h else None
+            img  = None
+            if path and os.path.exists(path):
+                try:
+                    img = Image.open(path)
+                    img.load()
+                except OSError:
+                    img = None
+            if img is None:
+                if doc is None:
+                    doc = pdfium.PdfDocument(src)
+                img = doc[p - 1].render(scale=dpi / 72, grayscale=True).to_pil()
+                if path:
+                    try:
+                        tmp = f"{path}.{os.getpid()}.tmp"
+                        img.save(tmp, format="PNG")
+                        os.replace(tmp, path)
+                    except OSError as e:
+                        print(f"Gagal simpan cache render: {e}")
+            try:
+                hasil[p] = rapikan(pytesseract.image_to_string(img, lang=BAHASA, config=KONFIG))
+            except Exception as e:
+                # Exception pytesseract tidak bisa di-pickle → pool rusak; kirim sebagai teks
+                raise RuntimeError(f"OCR halaman {p} gagal: {e}") from None
+    finally:
+        if doc is not None:
+            doc.close()
+    return hasil
+
+
+# ── POOL ────────────────────────────────────────────────────
+def _ambil_pool():
+    return proses.ambil_pool("ocr", OCR_WORKERS)
+
+
+def _reset_pool(pool=None):
+    proses.reset_pool("ocr", pool)
+
+
+def _pangkas_render(render_dir):
+    """Batasi cache render ke RENDER_MAX file terbaru."""
+    try:
+        files = sorted(glob.glob(os.path.join(render_dir, "*.png")), key=os.path.getmtime)
+        for f in files[:-RENDER_MAX]:
+            os.unlink(f)
+    except OSError:
+        pass
+
+
+def ocr_async(src, halaman, hashes=None):
+    """Mulai OCR halaman `halaman` (1-based) di process pool, tanpa menunggu.
+
+    `src` = path atau bytes PDF. Mengembalikan fungsi `ambil()` → {no: teks};
+    jadi pemanggil bisa mengekstrak halaman berteks sambil OCR berjalan.
+    """
+    halaman = list(halaman)
+    if not halaman:
+        return dict
+    hashes = hashes or page_cache.page_hashes(src)
+    tugas  = [(p, hashes[p - 1] if p <= len(hashes) else None) for p in halaman]
+    render_dir = os.path.join(page_cache.CACHE_DIR, "render")
+    os.makedirs(render_dir, exist_ok=True)
+    sumber = src if isinstance(src, str) else bytes(src)
+
+    # Satu kelompok per worker: bytes PDF dikirim sekali per worker, bukan per halaman
+    n        = min(OCR_WORKERS, len(tugas))
+    kelompok = [tugas[i::n] for i in range(n)]
+    pool = _ambil_pool()
+    try:
+        futs = [pool.submit(_ocr_worker, sumber, k, render_dir, DPI) for k in kelompok]
+    except (BrokenProcessPool, RuntimeError):
+        _reset_pool(pool)
+        pool = _ambil_pool()
+        futs = [pool.submit(_ocr_worker, sumber, k, render_dir, DPI) for k in kelompok]
+
+    def ambil() -> dict:
+        hasil = {}
+        try:
+            for f in futs:
+                hasil.update(f.result())
+        except BrokenProcessPool:
+            _reset_pool(pool)
+            raise
+        finally:
+            _pangkas_render(render_dir)
+        return hasil
+
+    return ambil
+
+
+def ocr_halaman(src, halaman, hashes=None) -> dict:
+    """Versi blocking dari ocr_async: {no_halaman: teks}."""
+    return ocr_async(src, halaman, hashes)()
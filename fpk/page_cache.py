@@ -0,0 +1,186 @@
+import io
+import os
+import json
+import time
+import hashlib
+import sqlite3
+from collections import Counter
+
+CACHE_DIR = ".fpk_cache"
+DB_FILE   = os.path.join(CACHE_DIR, "halaman.sqlite")
+
+# Batas jumlah halaman di cache; yang paling lama tidak dipakai dibuang dulu
+HALAMAN_MAX = int(os.environ.get("FPK_CACHE_HALAMAN_MAX", "50000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS halaman (
+    hash    TEXT PRIMARY KEY,
+    rows    TEXT NOT NULL,
+    dipakai REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS halaman_dipakai ON halaman (dipakai);
+CREATE TABLE IF NOT EXISTS dokumen (
+    nama    TEXT PRIMARY KEY,
+    hash    TEXT,
+    seps    TEXT NOT NULL,
+    waktu   REAL NOT NULL
+);
+"""
+
+
+def _conn():
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    con = sqlite3.connect(DB_FILE, timeout=30)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(SCHEMA)
+    return con
+
+
+# ── FINGERPRINT HALAMAN ─────────────────────────────────────
+def buka(src):
+    """Path → file biner; bytes → BytesIO."""
+    return io.BytesIO(src) if isinstance(src, (bytes, bytearray)) else open(src, "rb")
+
+
+def _sidik(obj, memo: dict) -> bytes:
+    """Digest objek PDF yang sudah di-resolve (dict, array, stream, nilai).
+
+    Referensi tidak langsung di-memo per objid, jadi font yang dipakai
+    banyak halaman cukup di-hash sekali per dokumen.
+    """
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+
+    if isinstance(obj, PDFObjRef):
+        if obj.objid not in memo:
+            memo[obj.objid] = b"siklus"
+            memo[obj.objid] = _sidik(obj.resolve(), memo)
+        return memo[obj.objid]
+    h = hashlib.sha1(type(obj).__name__.encode())
+    if isinstance(obj, PDFStream):
+        h.update(_sidik(obj.attrs, memo))
+        raw = obj.rawdata
+        h.update(raw if raw is not None else obj.get_data())
+    elif isinstance(obj, dict):
+        for k in sorted(obj, key=str):
+            h.update(str(k).encode() + b"=" + _sidik(obj[k], memo))
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            h.update(_sidik(v, memo))
+    else:
+        h.update(repr(obj).encode())
+    return h.digest()
+
+
+def page_hashes(pdf_path) -> list:
+    """SHA-1 content stream + MediaBox + resource font & XObject tiap halaman.
+
+    `pdf_path` boleh path atau bytes. Cache halaman berlaku lintas dokumen,
+    jadi sidik jari harus mencakup semua yang menentukan teks hasil ekstraksi:
+    XObject (halaman scan punya content stream identik "/Im0 Do", bedanya di
+    gambar) dan font beserta Encoding/ToUnicode-nya (subset/CID font bisa
+    memetakan byte content stream yang sama ke teks berbeda).
+    """
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdftypes import resolve1
+
+    hasil, memo = [], {}
+    with buka(pdf_path) as f:
+        doc = PDFDocument(PDFParser(f))
+        for page in PDFPage.create_pages(doc):
+            h = hashlib.sha1(repr(page.mediabox).encode())
+            contents = page.contents if isinstance(page.contents, list) else [page.contents]
+            for c in contents:
+                stream = resolve1(c)
+                # Byte mentah (masih terkompresi) sudah cukup sebagai sidik jari
+                raw = getattr(stream, "rawdata", None)
+                h.update(raw if raw is not None else stream.get_data())
+            res = resolve1(page.resources) or {}
+            for kunci in ("Font", "XObject"):
+                h.update(kunci.encode() + _sidik(res.get(kunci) or {}, memo))
+            hasil.append(h.hexdigest())
+    return hasil
+
+
+# ── CACHE BARIS PER HALAMAN ─────────────────────────────────
+def ambil_halaman(hashes) -> dict:
+    """{hash: rows} untuk hash yang sudah pernah diekstrak."""
+    unik = list(dict.fromkeys(hashes))
+    hasil = {}
+    with _conn() as con:
+        for i in range(0, len(unik), 500):
+            chunk = unik[i:i + 500]
+            q = f"SELECT hash, rows FROM halaman WHERE hash IN ({','.join('?' * len(chunk))})"
+            for h, rows in con.execute(q, chunk):
+                hasil[h] = json.loads(rows)
+        if hasil:
+            con.executemany("UPDATE halaman SET dipakai=? WHERE hash=?",
+                            [(time.time(), h) for h in hasil])
+    con.close()
+    return hasil
+
+
+def simpan_halaman(baris: dict):
+    if not baris:
+        return
+    now = time.time()
+    with _conn() as con:
+        con.executemany(
+            "INSERT OR REPLACE INTO halaman (hash, rows, dipakai) VALUES (?, ?, ?)",
+            [(h, json.dumps(rows, default=str), now) for h, rows in baris.items()])
+        # LRU: buang halaman yang paling lama tidak dipakai di atas HALAMAN_MAX
+        lebih = con.execute("SELECT COUNT(*) FROM halaman").fetchone()[0] - HALAMAN_MAX
+        if lebih > 0:
+            con.execute("DELETE FROM halaman WHERE hash IN "
+                        "(SELECT hash FROM halaman ORDER BY dipakai LIMIT ?)", (lebih,))
+    con.close()
+
+
+# ── VERSI DOKUMEN & DIFF SEP ────────────────────────────────
+def ambil_dokumen(nama: str):
+    with _conn() as con:
+        row = con.execute("SELECT hash, seps FROM dokumen WHERE nama=?", (nama,)).fetchone()
+    con.close()
+    if row is None:
+        return None
+    return {"hash": row[0], "seps": json.loads(row[1])}
+
+
+def simpan_dokumen(nama: str, digest: str, seps: dict):
+    with _conn() as con:
+        con.execute(
+            "INSERT OR REPLACE INTO dokumen (nama, hash, seps, waktu) VALUES (?, ?, ?, ?)",
+            (nama, digest, json.dumps(seps), time.time()))
+    con.close()
+
+
+def seps_dokumen(sep, nominal) -> dict:
+    """{No.SEP: [Disetujui, ...]} — SEP ganda menyimpan semua nominalnya."""
+    seps = {}
+    for s, n in zip(sep, nominal):
+        seps.setdefault(s, []).append(int(n))
+    return seps
+
+
+def diff_sep(lama: dict, baru: dict) -> dict:
+    """SEP ditambah, dihapus & berubah nominal (Disetujui) antar dua versi.
+
+    Nominal per SEP dibandingkan sebagai multiset: untuk SEP ganda, nominal
+    yang hilang dipasangkan dengan yang baru sebagai "berubah", sisanya
+    ditambah/dihapus (SEP muncul sekali per baris). Versi lama yang
+    tersimpan sebagai {SEP: nominal} tetap terbaca.
+    """
+    ditambah, dihapus, berubah = [], [], []
+    for s in sorted(set(lama) | set(baru)):
+        a = lama.get(s, [])
+        b = baru.get(s, [])
+        a = Counter(a if isinstance(a, list) else [a])
+        b = Counter(b if isinstance(b, list) else [b])
+        hilang = sorted((a - b).elements())
+        muncul = sorted((b - a).elements())
+        for x, y in zip(hilang, muncul):
+            berubah.append({"No.SEP": s, "Lama": x, "Baru": y})
+        dihapus  += [s] * max(0, len(hilang) - len(muncul))
+        ditambah += [s] * max(0, len(muncul) - len(hilang))
+    return {"ditambah": ditambah, "dihapus": dihapus, "berubah": berubah}
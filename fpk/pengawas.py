@@ -0,0 +1,291 @@
+"""Daemon folder masuk: PDF FPK baru di folder bersama langsung dikonversi.
+
+Jalankan dari folder aplikasi (riwayat & gudang dipakai bersama FPK Converter):
+    python -m fpk.pengawas FOLDER_MASUK [--keluar FOLDER_CSV] [--sekali]
+
+- Deteksi: notifikasi inotify lewat watchdog bila terpasang, selalu
+  ditambah polling stat (share SMB/NFS sering tidak mengirim event).
+- Debounce: file baru diproses setelah ukuran & mtime tidak berubah selama
+  JEDA detik dan diakhiri %%EOF (salinan yang belum selesai dilewati).
+- Tepat sekali per isi: file disalin ke scratch sambil di-hash, lalu
+  diklaim di riwayat (tabel berkas_masuk). Entri log & status berkas ditulis
+  dalam satu transaksi; isi yang sama (salinan/rename) tidak diproses ulang.
+  CSV ditulis sebelum transaksi itu, jadi CSV sendiri at-least-once: bila
+  daemon mati di antaranya, klaim dilepas saat start dan file dikonversi
+  lagi ke nama yang sama (ditimpa atomik, tanpa entri log ganda).
+- Konversi lewat fpk.triage (admission control & worker pool milik proses
+  daemon ini). Slot ekstraksi dibagi dengan Streamlit & fpk.api lewat file
+  lock fpk.antrian (jalankan dari folder aplikasi yang sama / FPK_SLOT_DIR
+  yang sama), jadi daemon tidak menambah anggaran JVM/worker server;
+  CSV 2 kolom ditulis ke FOLDER_CSV dengan nama FPK_{tingkat}_{bulan}_{tahun}.
+
+Env: FPK_FOLDER_MASUK, FPK_FOLDER_KELUAR, FPK_PENGAWAS_JEDA, FPK_PENGAWAS_INTERVAL.
+"""
+import os
+import time
+import signal
+import argparse
+import threading
+
+from fpk import antrian, riwayat, scratch, triage
+from fpk.metadata import ambil_metadata_pdf, jumlah_halaman
+
+JEDA      = float(os.environ.get("FPK_PENGAWAS_JEDA", 10))       # detik file harus diam
+INTERVAL  = float(os.environ.get("FPK_PENGAWAS_INTERVAL", 5))    # polling tanpa inotify
+RESCAN    = 60.0     # polling cadangan bila inotify aktif
+EKOR      = 2048     # byte akhir file yang dicek untuk %%EOF
+PENGGUNA  = "pengawas"
+
+ABAIKAN_AKHIRAN = (".part", ".tmp", ".crdownload", ".partial")
+
+
+# ── PEMINDAI ────────────────────────────────────────────────
+def _lengkap(path: str) -> bool:
+    """PDF utuh berakhir dengan marker %%EOF (boleh diikuti whitespace)."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - EKOR))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
+
+
+class Pemindai:
+    """Lacak (ukuran, mtime) tiap PDF; kembalikan yang sudah diam ≥ JEDA detik."""
+
+    def __init__(self, masuk: str, keluar: str = None, jeda: float = JEDA):
+        self.masuk  = os.path.abspath(masuk)
+        self.keluar = os.path.abspath(keluar) if keluar else None
+        self.jeda   = jeda
+        self.lihat  = {}     # path → [ukuran, mtime_ns, sejak]
+        self.sudah  = {}     # path → (ukuran, mtime_ns) yang sudah ditangani
+
+    def _daftar(self):
+        for akar, dirs, files in os.walk(self.masuk):
+            dirs[:] = [d for d in dirs if not d.startswith(".")
+                       and os.path.join(akar, d) != self.keluar]
+            for nama in files:
+                low = nama.lower()
+                if (low.endswith(".pdf") and not nama.startswith((".", "~$"))
+                        and not low.endswith(ABAIKAN_AKHIRAN)):
+                    yield os.path.join(akar, nama)
+
+    def pindai(self, sekarang: float = None) -> tuple:
+        """(siap, menunggu): path yang stabil & belum ditangani, dan jumlah yang belum stabil."""
+        sekarang = sekarang or time.monotonic()
+        siap, ada = [], set()
+        for path in self._daftar():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            ada.add(path)
+            sig = (st.st_size, st.st_mtime_ns)
+            if self.sudah.get(path) == sig:
+                continue
+            lama = self.lihat.get(path)
+            if lama is None or (lama[0], lama[1]) != sig:
+                lama = self.lihat[path] = [*sig, sekarang]
+            # Diam = tidak berubah antar-pindai, atau mtime memang sudah lama
+            # (file yang sudah ada saat daemon/cron mulai tidak perlu ditunggu)
+            diam = max(sekarang - lama[2], time.time() - st.st_mtime)
+            if diam < self.jeda or not st.st_size:
+                continue
+            if not _lengkap(path) and diam < 10 * self.jeda:
+                continue    # tanpa %%EOF: beri waktu lebih, lalu biarkan parser yang menolak
+            siap.append((path, *sig))
+        for path in set(self.lihat) - ada:
+            del self.lihat[path]
+        for path in set(self.sudah) - ada:
+            del self.sudah[path]
+        return siap, len(self.lihat) - len(siap)
+
+    def tandai(self, path: str, ukuran: int, mtime_ns: int):
+        self.sudah[path] = (ukuran, mtime_ns)
+        self.lihat.pop(path, None)
+
+
+# ── PROSES ──────────────────────────────────────────────────
+def _siapkan(path: str, ukuran: int, mtime_ns: int, dipakai: set):
+    """Salin ke scratch + hash + klaim; job dict (format fpk.triage) atau None."""
+    if riwayat.berkas_dikenal(path, ukuran, mtime_ns):
+        return None
+    alasan = antrian.cek_admisi(ukuran)
+    with open(path, "rb") as f:
+        info = scratch.spool(f)
+    if not riwayat.klaim_berkas(info["hash"], path, ukuran, mtime_ns):
+        scratch.hapus(info["path"])
+        print(f"↺ {os.path.basename(path)}: isi sama dengan berkas yang sudah pernah diproses")
+        return None
+    try:
+        alasan = alasan or antrian.cek_admisi(info["size"], jumlah_halaman(info["path"]))
+        if alasan:
+            raise ValueError(f"ditolak: {alasan}")
+        nama, tingkat = ambil_metadata_pdf(info["path"], info["hash"])
+        nama = riwayat.nama_berkas(path, nama, dipakai)
+    except Exception as e:
+        # Klaim tidak boleh tertinggal 'proses'; isi yang sama tidak dicoba lagi
+        riwayat.gagal_berkas(info["hash"], str(e))
+        scratch.hapus(info["path"])
+        print(f"⛔ {os.path.basename(path)}: {e}")
+        return None
+    return {"nama_upload": path, "path": info["path"], "hash": info["hash"],
+            "size": info["size"], "nama": nama, "tingkat": tingkat,
+            "filename": f"{nama}.csv"}
+
+
+def _tulis_csv(df, keluar: str, filename: str):
+    """Tulis atomik: pembaca folder keluar tidak pernah melihat CSV setengah jadi."""
+    os.makedirs(keluar, exist_ok=True)
+    tujuan = os.path.join(keluar, filename)
+    tmp = f"{tujuan}.{os.getpid()}.tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, tujuan)
+    return tujuan
+
+
+def proses(siap, keluar: str, tandai=None) -> int:
+    """Konversi path yang siap di worker pool; kembalikan jumlah yang berhasil.
+
+    `tandai(path, ukuran, mtime_ns)` dipanggil untuk path yang sudah diklaim
+    atau ditolak; path yang gagal dibaca (OSError) tidak, jadi dicoba lagi
+    di pindai berikutnya.
+    """
+    from fpk.extract import process_data_incremental
+
+    jobs = []
+    try:
+        for path, ukuran, mtime_ns in siap:
+            try:
+                job = _siapkan(path, ukuran, mtime_ns, {j["nama"] for j in jobs})
+            except OSError as e:
+                print(f"Gagal baca {path}: {e}")
+                continue
+            if tandai is not None:
+                tandai(path, ukuran, mtime_ns)
+            if job is not None:
+                jobs.append(job)
+        jobs.sort(key=lambda j: j["size"], reverse=True)
+
+        def konversi(j):
+            return process_data_incremental(j["path"], j["nama"], j["hash"], lengkap=True)
+
+        n_ok = 0
+        for job, hasil, err in triage.jalankan_jobs(jobs, konversi, pengguna=PENGGUNA):
+            if err is not None:
+                riwayat.gagal_berkas(job["hash"], str(err))
+                print(f"❌ {os.path.basename(job['nama_upload'])}: {err}")
+                continue
+            df_full, _ = hasil
+            df_res = df_full[["No.SEP", "Disetujui"]]
+            # CSV dulu, baru commit riwayat (at-least-once, lihat docstring modul)
+            try:
+                _tulis_csv(df_res, keluar, job["filename"])
+            except OSError as e:
+                riwayat.gagal_berkas(job["hash"], f"gagal menulis CSV: {e}")
+                print(f"❌ {job['filename']}: gagal menulis CSV: {e}")
+                continue
+            _, tahun, bulan = riwayat.periode_dari_nama(job["nama"])
+            if tahun:
+                try:
+                    from fpk import gudang
+                    gudang.simpan(df_full, job["nama"], tahun, bulan, job["tingkat"],
+                                  "converter", job["hash"])
+                except Exception as e:
+                    print(f"Gagal simpan gudang SEP: {e}")
+            riwayat.selesai_berkas(job["hash"], job["nama"], {
+                "waktu":         riwayat.waktu_wib(),
+                "nama_file":     job["filename"],
+                "tingkat":       job["tingkat"],
+                "jumlah":        len(df_res),
+                "total":         int(df_res["Disetujui"].sum()),
+                "status":        "Belum Diambil",
+                "waktu_selesai": None,
+            })
+            n_ok += 1
+            print(f"✅ {os.path.basename(job['nama_upload'])} → {job['filename']} ({len(df_res):,} SEP)")
+        return n_ok
+    finally:
+        triage.bersihkan_jobs(jobs)
+
+
+# ── LOOP ────────────────────────────────────────────────────
+def _pasang_inotify(folder: str, bangun: threading.Event):
+    """Observer watchdog yang membangunkan loop; None bila tidak tersedia."""
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        return None
+
+    class Bangunkan(FileSystemEventHandler):
+        def on_any_event(self, event):
+            bangun.set()
+
+    try:
+        obs = Observer()
+        obs.schedule(Bangunkan(), folder, recursive=True)
+        obs.start()
+        return obs
+    except Exception as e:
+        print(f"Gagal pasang inotify, pakai polling: {e}")
+        return None
+
+
+def jalankan(masuk: str, keluar: str, jeda: float = JEDA, interval: float = INTERVAL,
+             sekali: bool = False, poll: bool = False, berhenti: threading.Event = None):
+    """Loop utama; `sekali=True` → satu putaran (file yang mtime-nya belum
+    JEDA detik atau belum ber-%%EOF dilewati, diambil di putaran berikutnya)."""
+    berhenti = berhenti or threading.Event()
+    bangun   = threading.Event()
+    pemindai = Pemindai(masuk, keluar, jeda)
+    n = riwayat.reset_berkas()
+    if n:
+        print(f"{n} klaim tertinggal dari run sebelumnya dilepas")
+    obs = None if (sekali or poll) else _pasang_inotify(pemindai.masuk, bangun)
+    try:
+        while not berhenti.is_set():
+            bangun.clear()
+            siap, menunggu = pemindai.pindai()
+            if siap:
+                proses(siap, keluar, pemindai.tandai)
+            if sekali:
+                return
+            if menunggu:
+                timeout = max(0.5, jeda / 2)
+            else:
+                timeout = RESCAN if obs is not None else interval
+            bangun.wait(timeout)
+    finally:
+        if obs is not None:
+            obs.stop()
+            obs.join()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Konversi otomatis PDF FPK dari folder masuk")
+    ap.add_argument("masuk", nargs="?", default=os.environ.get("FPK_FOLDER_MASUK"))
+    ap.add_argument("--keluar", default=os.environ.get("FPK_FOLDER_KELUAR"),
+                    help="folder CSV hasil (default: MASUK/hasil_csv)")
+    ap.add_argument("--jeda", type=float, default=JEDA, help="detik file harus diam sebelum diproses")
+    ap.add_argument("--interval", type=float, default=INTERVAL, help="interval polling (detik)")
+    ap.add_argument("--sekali", action="store_true", help="satu putaran lalu keluar (cron)")
+    ap.add_argument("--poll", action="store_true", help="polling saja, tanpa inotify")
+    ap.add_argument("--ulang-gagal", action="store_true", help="coba ulang berkas yang pernah gagal")
+    args = ap.parse_args(argv)
+    if not args.masuk:
+        ap.error("folder masuk wajib (argumen atau env FPK_FOLDER_MASUK)")
+    keluar = args.keluar or os.path.join(args.masuk, "hasil_csv")
+
+    if args.ulang_gagal:
+        print(f"{riwayat.reset_berkas(gagal=True)} berkas gagal akan dicoba ulang")
+    berhenti = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: berhenti.set())
+    print(f"Mengawasi {os.path.abspath(args.masuk)} → {os.path.abspath(keluar)}")
+    jalankan(args.masuk, keluar, args.jeda, args.interval, args.sekali, args.poll, berhenti)
+
+
+if __name__ == "__main__":
+    main()
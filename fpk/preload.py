@@ -0,0 +1,32 @@
+"""Preload stack ekstraksi (pandas, tabula, pdfplumber) di background.
+
+Halaman login tidak mengimpor modul berat; setelah login, `mulai_preload()`
+memanaskan import di thread daemon supaya klik "Proses" pertama tidak
+menunggu import.
+"""
+import importlib
+import threading
+
+MODUL_BERAT = ("pandas", "pdfplumber", "tabula", "pyarrow", "fpk.extract", "fpk.gudang")
+
+_thread = None
+_lock   = threading.Lock()
+
+
+def _preload(moduls):
+    for nama in moduls:
+        try:
+            importlib.import_module(nama)
+        except Exception as e:
+            print(f"Gagal preload {nama}: {e}")
+
+
+def mulai_preload(moduls=MODUL_BERAT):
+    """Mulai preload sekali per proses; panggilan berikutnya no-op."""
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_preload, args=(moduls,),
+                                       name="fpk-preload", daemon=True)
+            _thread.start()
+    return _thread
@@ -0,0 +1,182 @@
+"""Profiling opt-in untuk satu konversi FPK.
+
+CLI:
+    python -m fpk.profil FILE.pdf [-o hasil.prof] [--inkremental]
+
+File .prof adalah format pstats standar (bisa dibuka dengan snakeviz,
+flameprof, atau `python -m pstats`).
+"""
+import io
+import os
+import sys
+import time
+import pstats
+import zipfile
+import tempfile
+import argparse
+import cProfile
+import threading
+import tracemalloc
+
+from fpk import extract
+from fpk.metadata import ambil_metadata_pdf
+
+TOP_N = 40
+
+# tracemalloc global per proses: dimulai oleh job profil pertama dan baru
+# dihentikan setelah job profil terakhir selesai (job lain mungkin masih
+# mengambil snapshot). Bila sudah aktif dari luar, tidak pernah dihentikan.
+_trace_lock  = threading.Lock()
+_trace_pakai = 0
+_trace_milik = False
+
+
+def _mulai_trace():
+    global _trace_pakai, _trace_milik
+    with _trace_lock:
+        if _trace_pakai == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+            _trace_milik = True
+        _trace_pakai += 1
+
+
+def _selesai_trace():
+    global _trace_pakai, _trace_milik
+    with _trace_lock:
+        _trace_pakai -= 1
+        if _trace_pakai == 0 and _trace_milik:
+            tracemalloc.stop()
+            _trace_milik = False
+
+
+def jumlah_aktif() -> int:
+    """Jumlah job profil yang sedang berjalan di proses ini."""
+    return _trace_pakai
+
+
+def profil_konversi(fn, *args, **kwargs):
+    """Jalankan fn(*args) dengan cProfile + tracemalloc + timer tabula.
+
+    cProfile, perekam tabula & memori per langkah (extract.langkah) hanya
+    untuk thread pemanggil; tracemalloc bersifat global (dihitung referensi,
+    lihat _mulai_trace), jadi snapshot bisa ikut memuat alokasi job lain yang
+    berjalan bersamaan di worker pool.
+    Mengembalikan (hasil, laporan) — laporan berisi stats, snapshot & ringkasan.
+    """
+    catat  = []
+    memori = {}
+    extract._rekam.catat  = catat
+    extract._rekam.memori = memori
+    extract._rekam.puncak = 0
+    _mulai_trace()
+    prof = cProfile.Profile()
+    t0 = time.perf_counter()
+    try:
+        prof.enable()
+        try:
+            hasil = fn(*args, **kwargs)
+        finally:
+            prof.disable()
+        durasi = time.perf_counter() - t0
+        snapshot = tracemalloc.take_snapshot()
+        _, puncak = tracemalloc.get_traced_memory()
+    finally:
+        extract._rekam.catat  = None
+        extract._rekam.memori = None
+        _selesai_trace()
+
+    laporan = {
+        "durasi":      durasi,
+        "puncak_mem":  max(puncak, extract._rekam.puncak),
+        "memori":      memori,
+        "tabula":      catat,
+        "tabula_detik": sum(c["detik"] for c in catat),
+        "stats":       pstats.Stats(prof),
+        "snapshot":    snapshot,
+    }
+    laporan["ringkasan"] = ringkasan(laporan)
+    return hasil, laporan
+
+
+def ringkasan(laporan: dict) -> str:
+    out = io.StringIO()
+    out.write(f"Durasi total      : {laporan['durasi']:.3f} s\n")
+    out.write(f"Waktu tabula      : {laporan['tabula_detik']:.3f} s "
+              f"({len(laporan['tabula'])} panggilan)\n")
+    out.write(f"Puncak memori (py): {laporan['puncak_mem'] / 1e6:.1f} MB\n\n")
+    for c in laporan["tabula"]:
+        out.write(f"  tabula pages={c['pages']}: {c['detik']:.3f} s, {c['tabel']} tabel\n")
+
+    out.write("\n── Memori per langkah ──\n")
+    out.write(tabel_memori(laporan.get("memori") or {}))
+
+    out.write(f"\n── Top {TOP_N} fungsi (cumulative) ──\n")
+    st = laporan["stats"]
+    st.stream = out
+    st.sort_stats("cumulative").print_stats(TOP_N)
+
+    out.write(f"\n── Top {TOP_N} alokasi (per baris) ──\n")
+    for s in laporan["snapshot"].statistics("lineno")[:TOP_N]:
+        out.write(f"{s}\n")
+    return out.getvalue()
+
+
+def salinan(m: dict):
+    """Salinan ekuivalen satu langkah (None bila ukuran masukan tidak dicatat)."""
+    return m['byte'] / m['masukan'] if m['masukan'] else None
+
+
+def tabel_memori(memori: dict) -> str:
+    """Tabel teks metrik extract.langkah: puncak, Arrow, salinan, objek, durasi."""
+    out = io.StringIO()
+    out.write(f"  {'langkah':<12} {'panggilan':>9} {'puncak MB':>10} {'arrow MB':>9} {'salinan':>8} "
+              f"{'objek':>10} {'detik':>8}\n")
+    for nama, m in memori.items():
+        x = salinan(m)
+        out.write(f"  {nama:<12} {m['panggilan']:>9} {m['puncak'] / 1e6:>10.2f} {m['arrow'] / 1e6:>9.2f} "
+                  f"{'-' if x is None else f'{x:.2f}':>8} {m['objek']:>10} {m['detik']:>8.3f}\n")
+    return out.getvalue()
+
+
+def zip_laporan(laporan: dict, nama: str) -> bytes:
+    """ZIP berisi {nama}.prof, {nama}.tracemalloc & {nama}_ringkasan.txt."""
+    buf = io.BytesIO()
+    with tempfile.TemporaryDirectory() as tmp:
+        prof_path = os.path.join(tmp, "cpu.prof")
+        snap_path = os.path.join(tmp, "alokasi.tracemalloc")
+        laporan["stats"].dump_stats(prof_path)
+        laporan["snapshot"].dump(snap_path)
+        with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.write(prof_path, f"{nama}.prof")
+            zf.write(snap_path, f"{nama}.tracemalloc")
+            zf.writestr(f"{nama}_ringkasan.txt", laporan["ringkasan"])
+    return buf.getvalue()
+
+
+# ── CLI ─────────────────────────────────────────────────────
+def _konversi(pdf_path, inkremental: bool):
+    ambil_metadata_pdf(pdf_path)
+    if inkremental:
+        return extract.process_data_incremental(pdf_path)[0]
+    return extract.process_data(pdf_path)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m fpk.profil",
+                                 description="Profil CPU & memori satu konversi PDF FPK.")
+    ap.add_argument("pdf")
+    ap.add_argument("-o", "--output", help="path .prof (default: <pdf>.prof)")
+    ap.add_argument("--inkremental", action="store_true",
+                    help="pakai process_data_incremental (cache per halaman)")
+    args = ap.parse_args(argv)
+
+    df, laporan = profil_konversi(_konversi, args.pdf, args.inkremental)
+    out = args.output or os.path.splitext(args.pdf)[0] + ".prof"
+    laporan["stats"].dump_stats(out)
+    laporan["snapshot"].dump(os.path.splitext(out)[0] + ".tracemalloc")
+    sys.stdout.write(laporan["ringkasan"])
+    sys.stdout.write(f"\n{len(df)} SEP · profil CPU: {out}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Process pool spawn bersama (ekstraksi audit, OCR).
+
+Spawn mengimpor ulang __main__ di tiap worker; di Streamlit __main__ adalah
+skrip halaman (app.py / audit.py ikut dieksekusi ulang). Karena itu semua
+worker dibuat sekaligus saat pool dibuat — sekali, di bawah lock — dengan
+__main__ netral. Setelah itu submit tidak lagi men-spawn proses baru
+(ProcessPoolExecutor hanya men-spawn sampai max_workers), jadi __main__
+tidak perlu disentuh lagi selama pool hidup.
+"""
+import sys
+import time
+import types
+import threading
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+SIAGA_DETIK = 0.2   # tugas pemanasan: worker sibuk sampai semua sudah di-spawn
+
+_pools = {}
+_lock  = threading.Lock()
+
+
+@contextlib.contextmanager
+def _main_netral():
+    asli = sys.modules["__main__"]
+    sys.modules["__main__"] = types.ModuleType("__main__")
+    try:
+        yield
+    finally:
+        sys.modules["__main__"] = asli
+
+
+def ambil_pool(nama: str, max_workers: int, initializer=None, initargs=()) -> ProcessPoolExecutor:
+    """Pool spawn bernama `nama`; dibuat (beserta semua worker-nya) sekali saja."""
+    with _lock:
+        pool = _pools.get(nama)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=max_workers,
+                                       mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=initializer, initargs=initargs)
+            # Tiap submit men-spawn satu worker selama belum ada worker yang
+            # menganggur; tugas pemanasan menahan worker agar tetap sibuk
+            with _main_netral():
+                for _ in range(max_workers):
+                    pool.submit(time.sleep, SIAGA_DETIK)
+            _pools[nama] = pool
+        return pool
+
+
+def reset_pool(nama: str, pool=None) -> bool:
+    """Buang pool yang rusak (mis. worker di-OOM-kill) agar dibuat ulang.
+
+    Bila `pool` diberikan, hanya dibuang kalau masih pool yang sama (pool
+    baru yang sudah dibuat thread lain tidak ikut terbuang). True bila ada
+    pool yang dibuang.
+    """
+    with _lock:
+        if pool is not None and _pools.get(nama) is not pool:
+            return False
+        lama = _pools.pop(nama, None)
+    if lama is None:
+        return False
+    lama.shutdown(wait=False, cancel_futures=True)
+    return True
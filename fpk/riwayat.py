@@ -0,0 +1,286 @@
+import os
+import re
+import json
+import time
+import sqlite3
+from datetime import datetime, timezone, timedelta
+
+DB_FILE  = "riwayat_konversi.sqlite"
+LOG_LAMA = "log_konversi.json"
+
+BULAN_ORDER = ["JANUARI", "FEBRUARI", "MARET", "APRIL", "MEI", "JUNI",
+               "JULI", "AGUSTUS", "SEPTEMBER", "OKTOBER", "NOVEMBER", "DESEMBER"]
+RE_PERIODE  = re.compile(r'FPK_(?:RITL|RJTL|RITP|RJTP|FPK)?_?([A-Z]+)_(\d{4})')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS konversi (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    waktu         TEXT,
+    waktu_ts      REAL,
+    nama_file     TEXT NOT NULL,
+    tingkat       TEXT,
+    jumlah        INTEGER NOT NULL DEFAULT 0,
+    total         INTEGER NOT NULL DEFAULT 0,
+    status        TEXT NOT NULL DEFAULT 'Belum Diambil',
+    waktu_selesai TEXT,
+    periode       TEXT NOT NULL,
+    tahun         INTEGER NOT NULL,
+    bulan         INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_konversi_periode ON konversi (tahun, bulan);
+CREATE INDEX IF NOT EXISTS ix_konversi_tingkat ON konversi (tingkat);
+CREATE INDEX IF NOT EXISTS ix_konversi_status  ON konversi (status);
+CREATE INDEX IF NOT EXISTS ix_konversi_nama    ON konversi (nama_file);
+
+-- Versi log: naik di setiap perubahan, jadi blok tampilan bisa di-cache per versi
+CREATE TABLE IF NOT EXISTS meta (kunci TEXT PRIMARY KEY, nilai INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('versi', 0);
+CREATE TRIGGER IF NOT EXISTS tr_konversi_ins AFTER INSERT ON konversi
+BEGIN UPDATE meta SET nilai = nilai + 1 WHERE kunci = 'versi'; END;
+CREATE TRIGGER IF NOT EXISTS tr_konversi_upd AFTER UPDATE ON konversi
+BEGIN UPDATE meta SET nilai = nilai + 1 WHERE kunci = 'versi'; END;
+CREATE TRIGGER IF NOT EXISTS tr_konversi_del AFTER DELETE ON konversi
+BEGIN UPDATE meta SET nilai = nilai + 1 WHERE kunci = 'versi'; END;
+
+-- PDF dari folder masuk (fpk.pengawas): tiap isi (hash) diproses tepat sekali
+CREATE TABLE IF NOT EXISTS berkas_masuk (
+    hash      TEXT PRIMARY KEY,
+    path      TEXT NOT NULL,
+    ukuran    INTEGER,
+    mtime_ns  INTEGER,
+    nama      TEXT,
+    status    TEXT NOT NULL,      -- proses / selesai / gagal
+    alasan    TEXT,
+    waktu_ts  REAL
+);
+CREATE INDEX IF NOT EXISTS ix_berkas_path ON berkas_masuk (path);
+"""
+
+KOLOM = ("id", "waktu", "nama_file", "tingkat", "jumlah", "total",
+         "status", "waktu_selesai", "periode")
+
+_siap = set()
+
+
+def waktu_wib() -> str:
+    """Format kolom `waktu` log: '05 Mar 2026, 14:30 WIB'."""
+    return (datetime.now(timezone.utc) + timedelta(hours=7)).strftime("%d %b %Y, %H:%M") + " WIB"
+
+
+def periode_dari_nama(nama_file: str):
+    """('MARET 2026', 2026, 3) dari nama FPK_{tingkat}_{bulan}_{tahun}; lainnya → ('Lainnya', 0, 99)."""
+    m = RE_PERIODE.search(nama_file or "")
+    if not m:
+        return "Lainnya", 0, 99
+    bulan = BULAN_ORDER.index(m.group(1)) + 1 if m.group(1) in BULAN_ORDER else 99
+    return f"{m.group(1)} {m.group(2)}", int(m.group(2)), bulan
+
+
+def _conn(db_file: str = None):
+    db_file = db_file or DB_FILE
+    con = sqlite3.connect(db_file, timeout=30)
+    con.row_factory = sqlite3.Row
+    if db_file not in _siap:
+        con.execute("PRAGMA journal_mode=WAL")
+        con.executescript(SCHEMA)
+        _migrasi_log_lama(con)
+        _siap.add(db_file)
+    return con
+
+
+def _migrasi_log_lama(con):
+    """Impor sekali log_konversi.json lama (urutan terbaru di depan)."""
+    if not os.path.exists(LOG_LAMA):
+        return
+    if con.execute("SELECT 1 FROM konversi LIMIT 1").fetchone():
+        return
+    try:
+        with open(LOG_LAMA, "r") as f:
+            log = json.load(f)
+    except Exception:
+        return
+    with con:
+        for item in reversed(log):
+            _insert(con, item)
+    os.replace(LOG_LAMA, LOG_LAMA + ".migrated")
+
+
+def _insert(con, entry: dict):
+    periode, tahun, bulan = periode_dari_nama(entry.get("nama_file", ""))
+    con.execute(
+        "INSERT INTO konversi (waktu, waktu_ts, nama_file, tingkat, jumlah, total,"
+        " status, waktu_selesai, periode, tahun, bulan)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (entry.get("waktu"), time.time(), entry.get("nama_file", ""), entry.get("tingkat", ""),
+         int(entry.get("jumlah", 0)), int(entry.get("total", 0)),
+         entry.get("status", "Belum Diambil"), entry.get("waktu_selesai"),
+         periode, tahun, bulan))
+
+
+# ── TULIS ───────────────────────────────────────────────────
+def tambah(entry: dict):
+    con = _conn()
+    with con:
+        _insert(con, entry)
+    con.close()
+
+
+def update_status(nama_files, status: str, waktu_selesai: str = None):
+    """Update entri terbaru untuk tiap nama file dalam satu transaksi."""
+    nama_files = list(dict.fromkeys(nama_files))
+    if not nama_files:
+        return
+    ph  = ",".join("?" * len(nama_files))
+    con = _conn()
+    with con:
+        con.execute(
+            f"UPDATE konversi SET status=?, waktu_selesai=? WHERE id IN ("
+            f" SELECT MAX(id) FROM konversi WHERE nama_file IN ({ph}) GROUP BY nama_file)",
+            (status, waktu_selesai, *nama_files))
+    con.close()
+
+
+def hapus_semua():
+    con = _conn()
+    with con:
+        con.execute("DELETE FROM konversi")
+    con.close()
+
+
+# ── FOLDER MASUK ────────────────────────────────────────────
+def berkas_dikenal(path: str, ukuran: int, mtime_ns: int) -> bool:
+    """True bila file di path ini dengan ukuran & mtime yang sama sudah pernah dicatat."""
+    con = _conn()
+    r = con.execute("SELECT 1 FROM berkas_masuk WHERE path = ? AND ukuran = ? AND mtime_ns = ?"
+                    " LIMIT 1", (path, ukuran, mtime_ns)).fetchone()
+    con.close()
+    return r is not None
+
+
+def klaim_berkas(digest: str, path: str, ukuran: int, mtime_ns: int) -> bool:
+    """Klaim isi file (hash) untuk diproses; False bila isi yang sama sudah pernah diklaim."""
+    con = _conn()
+    with con:
+        cur = con.execute(
+            "INSERT OR IGNORE INTO berkas_masuk (hash, path, ukuran, mtime_ns, status, waktu_ts)"
+            " VALUES (?, ?, ?, ?, 'proses', ?)", (digest, path, ukuran, mtime_ns, time.time()))
+    con.close()
+    return cur.rowcount == 1
+
+
+def nama_berkas(path: str, base: str, dipakai=()) -> str:
+    """Nama output untuk path: revisi file yang sama memakai nama lamanya,
+    file lain dengan periode & tingkat sama diberi akhiran _2, _3, dst.
+    `dipakai` = nama yang sudah dibagikan di batch yang sama."""
+    con = _conn()
+    rows = con.execute("SELECT path, nama FROM berkas_masuk WHERE status = 'selesai'"
+                       " AND substr(nama, 1, ?) = ?", (len(base), base)).fetchall()
+    con.close()
+    pola = re.compile(rf"{re.escape(base)}(?:_\d+)?$")
+    for r in rows:
+        if r["path"] == path and pola.match(r["nama"]):
+            return r["nama"]
+    dipakai = {r["nama"] for r in rows} | set(dipakai)
+    nama, n = base, 1
+    while nama in dipakai:
+        n += 1
+        nama = f"{base}_{n}"
+    return nama
+
+
+def selesai_berkas(digest: str, nama: str, entry: dict):
+    """Entri log + status berkas dalam satu transaksi (tepat sekali)."""
+    con = _conn()
+    with con:
+        _insert(con, entry)
+        con.execute("UPDATE berkas_masuk SET status = 'selesai', nama = ?, alasan = NULL,"
+                    " waktu_ts = ? WHERE hash = ?", (nama, time.time(), digest))
+    con.close()
+
+
+def gagal_berkas(digest: str, alasan: str):
+    con = _conn()
+    with con:
+        con.execute("UPDATE berkas_masuk SET status = 'gagal', alasan = ?, waktu_ts = ?"
+                    " WHERE hash = ?", (alasan, time.time(), digest))
+    con.close()
+
+
+def reset_berkas(gagal: bool = False) -> int:
+    """Lepas klaim 'proses' yang tertinggal (daemon mati di tengah jalan);
+    `gagal=True` juga membuka lagi berkas gagal agar dicoba ulang."""
+    status = ("proses", "gagal") if gagal else ("proses",)
+    con = _conn()
+    with con:
+        n = con.execute(f"DELETE FROM berkas_masuk WHERE status IN ({','.join('?' * len(status))})",
+                        status).rowcount
+    con.close()
+    return n
+
+
+# ── QUERY ───────────────────────────────────────────────────
+def versi() -> int:
+    """Nomor versi log (naik lewat trigger di setiap insert/update/delete)."""
+    con = _conn()
+    r = con.execute("SELECT nilai FROM meta WHERE kunci = 'versi'").fetchone()
+    con.close()
+    return r[0] if r else 0
+
+
+def _filter(periode=None, tingkat=None, status=None):
+    where, args = [], []
+    if periode:
+        where.append("periode = ?")
+        args.append(periode)
+    if tingkat:
+        where.append("tingkat = ?")
+        args.append(tingkat)
+    if status:
+        where.append("status = ?")
+        args.append(status)
+    return (" WHERE " + " AND ".join(where)) if where else "", args
+
+
+def query(periode=None, tingkat=None, status=None, limit: int = 10, offset: int = 0):
+    """(rows, total) — satu halaman riwayat terbaru dulu, sesuai filter."""
+    where, args = _filter(periode, tingkat, status)
+    con = _conn()
+    total = con.execute(f"SELECT COUNT(*) FROM konversi{where}", args).fetchone()[0]
+    rows  = con.execute(
+        f"SELECT {', '.join(KOLOM)} FROM konversi{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+        (*args, limit, offset)).fetchall()
+    con.close()
+    return [dict(r) for r in rows], total
+
+
+def ringkasan(periode=None, tingkat=None, status=None) -> dict:
+    where, args = _filter(periode, tingkat, status)
+    con = _conn()
+    r = con.execute(
+        "SELECT COUNT(*), COALESCE(SUM(status = 'Selesai'), 0), COALESCE(SUM(total), 0)"
+        f" FROM konversi{where}", args).fetchone()
+    con.close()
+    return {"total_entri": r[0], "total_selesai": r[1],
+            "total_pending": r[0] - r[1], "total_nominal": r[2]}
+
+
+def rekap_periode(tahun=None) -> list:
+    """Agregat per (periode, tingkat), urut periode terbaru dulu."""
+    where, args = ("WHERE tahun = ?", [tahun]) if tahun else ("", [])
+    con = _conn()
+    rows = con.execute(
+        "SELECT periode, tahun, bulan, tingkat, COUNT(*) AS konversi,"
+        " SUM(jumlah) AS count, SUM(total) AS total"
+        f" FROM konversi {where} GROUP BY periode, tingkat"
+        " ORDER BY tahun = 0, tahun DESC, bulan DESC, tingkat", args).fetchall()
+    con.close()
+    return [dict(r) for r in rows]
+
+
+def daftar_periode() -> list:
+    con = _conn()
+    rows = con.execute(
+        "SELECT DISTINCT periode, tahun, bulan FROM konversi"
+        " ORDER BY tahun = 0, tahun DESC, bulan DESC").fetchall()
+    con.close()
+    return [r["periode"] for r in rows]
@@ -0,0 +1,117 @@
+"""Area scratch terkelola untuk file upload.
+
+Upload di-spool per chunk ke satu file di SCRATCH_DIR (sekali tulis, di-hash
+sambil jalan — tanpa salinan bytes utuh), lalu parser membaca dari path
+atau memory-map. Pembersihan berlapis: `hapus()` di finally pemanggil,
+atexit untuk file proses ini, dan `sapu()` untuk sisa proses yang crash.
+"""
+import os
+import mmap
+import time
+import uuid
+import atexit
+import hashlib
+import tempfile
+import threading
+import contextlib
+
+SCRATCH_DIR = os.environ.get("FPK_SCRATCH_DIR",
+                             os.path.join(tempfile.gettempdir(), "fpk_scratch"))
+CHUNK       = 1 << 20
+UMUR_MAKS   = 6 * 3600      # file lebih tua dari ini dianggap yatim (proses mati)
+
+_milik     = set()          # path yang dibuat proses ini
+_lock      = threading.Lock()
+_disapu    = False
+
+
+def sapu(umur_maks: float = UMUR_MAKS) -> int:
+    """Hapus file scratch yatim yang lebih tua dari `umur_maks` detik."""
+    batas, n = time.time() - umur_maks, 0
+    try:
+        entri = list(os.scandir(SCRATCH_DIR))
+    except FileNotFoundError:
+        return 0
+    for e in entri:
+        try:
+            if e.is_file() and e.stat().st_mtime < batas:
+                os.unlink(e.path)
+                n += 1
+        except OSError:
+            pass
+    return n
+
+
+def _siapkan_dir():
+    global _disapu
+    os.makedirs(SCRATCH_DIR, exist_ok=True)
+    with _lock:
+        if not _disapu:
+            _disapu = True
+            sapu()
+
+
+def spool(src, suffix: str = ".pdf") -> dict:
+    """Tulis upload (file-like / bytes) ke scratch per chunk.
+
+    Mengembalikan {"path", "hash" (sha256), "size"}; bytes upload tidak
+    pernah disalin utuh.
+    """
+    _siapkan_dir()
+    path = os.path.join(SCRATCH_DIR, f"{uuid.uuid4().hex}{suffix}")
+    h, size = hashlib.sha256(), 0
+    with _lock:
+        _milik.add(path)
+    try:
+        with open(path, "wb") as out:
+            if isinstance(src, (bytes, bytearray, memoryview)):
+                mv = memoryview(src)
+                chunks = (mv[i:i + CHUNK] for i in range(0, len(mv), CHUNK))
+            else:
+                src.seek(0)
+                chunks = iter(lambda: src.read(CHUNK), b"")
+            for chunk in chunks:
+                h.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        hapus(path)
+        raise
+    return {"path": path, "hash": h.hexdigest(), "size": size}
+
+
+def hapus(path: str):
+    """Hapus file scratch; aman dipanggil ulang."""
+    with _lock:
+        _milik.discard(path)
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+@contextlib.contextmanager
+def spool_sementara(src, suffix: str = ".pdf"):
+    """`with spool_sementara(uf) as info:` — file dihapus saat keluar blok."""
+    info = spool(src, suffix)
+    try:
+        yield info
+    finally:
+        hapus(info["path"])
+
+
+@contextlib.contextmanager
+def peta(path: str):
+    """Memory-map read-only sebuah file scratch (file-like: read/seek/tell)."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield f
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+
+@atexit.register
+def _bersihkan_milik():
+    for path in list(_milik):
+        hapus(path)
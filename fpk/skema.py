@@ -0,0 +1,51 @@
+"""Skema 6 kolom FPK & parsing bertipe (dipakai converter dan audit).
+
+Baris mentah (dari tabula, parser tata letak / OCR, atau cache halaman) cukup
+diketik sekali di sini; kedua tool lalu memilih kolom yang dibutuhkan.
+Tidak mengimpor tabula supaya audit tetap jalan tanpa Java.
+"""
+import os
+
+import pandas as pd
+
+KOLOM = ['No. Urut', 'No.SEP', 'Tgl. Verifikasi', 'Biaya Riil RS', 'Diajukan', 'Disetujui']
+KOLOM_RP = ['Biaya Riil RS', 'Diajukan', 'Disetujui']
+
+# No.SEP: kode PPK 4 digit + jenis faskes + 14 karakter. Set env FPK_POLA_SEP
+# (mis. '1028R[0-9A-Z]{14}') untuk membatasi ke satu rumah sakit.
+POLA_SEP = os.environ.get("FPK_POLA_SEP", r"[0-9]{4}[A-Z][0-9A-Z]{14}")
+
+
+def _rupiah(s: pd.Series) -> pd.Series:
+    """'1,234,567' → 1234567 (int64); gagal dibaca → 0 (ditandai fpk.validasi)."""
+    return (pd.to_numeric(s.astype(str).str.replace(r'[^0-9]', '', regex=True), errors='coerce')
+              .fillna(0).astype('int64'))
+
+
+def _tanggal(s: pd.Series) -> pd.Series:
+    """Tanggal verifikasi → datetime64; format ISO dicoba dulu (cepat), sisanya dayfirst."""
+    s   = s.astype(str).str.strip()
+    tgl = pd.to_datetime(s, format='%Y-%m-%d', errors='coerce')
+    sisa = tgl.isna() & s.ne('') & s.ne('nan')
+    if sisa.any():
+        tgl[sisa] = pd.to_datetime(s[sisa], dayfirst=True, format='mixed', errors='coerce')
+    return tgl
+
+
+def ketik(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """Baris mentah berkolom KOLOM → DataFrame bertipe (index di-reset)."""
+    df = pd.DataFrame({
+        'No. Urut':        pd.to_numeric(df_raw['No. Urut'], errors='coerce').fillna(0).astype('int64'),
+        'No.SEP':          (df_raw['No.SEP'].astype(str)
+                            .str.replace(r'[^a-zA-Z0-9]', '', regex=True).str.strip()),
+        'Tgl. Verifikasi': _tanggal(df_raw['Tgl. Verifikasi']),
+        **{k: _rupiah(df_raw[k]) for k in KOLOM_RP},
+    })
+    # Index baru sebagai metadata; reset_index menyalin semua kolom (pandas < 3)
+    df.index = pd.RangeIndex(len(df))
+    return df
+
+
+def dari_rows(rows) -> pd.DataFrame:
+    """List baris mentah (6 nilai) → DataFrame bertipe."""
+    return ketik(pd.DataFrame(rows, columns=KOLOM))
@@ -0,0 +1,188 @@
+"""Mesin skenario what-if jaspel audit, dalam rupiah bulat (int64).
+
+Aturan pembulatan (satu tempat, dipakai halaman audit, API & skenario):
+- Tarif, rate selisih & persen kantong disimpan sebagai bilangan bulat per
+  SKALA (ppm), jadi 30% = 300000 persis — tidak ada 0.3 float.
+- Jasa pelayanan & jaspel selisih dihitung per SEP lalu dibulatkan ke rupiah
+  terdekat, setengah ke atas (`bulat`). Total = Σ nilai per SEP yang sudah
+  bulat, jadi total selalu sama dengan jumlah kolom detail.
+- Kantong besar dibagi dengan metode sisa terbesar (`bagi_kantong`): tiap
+  kantong dibulatkan ke bawah, sisa rupiah diberikan ke pecahan terbesar,
+  sehingga Σ kantong = total persis.
+
+Tiap sisi (RI/RJ) diringkas sekali menjadi agregat (vektor CBG & selisih
+positif per SEP). Puluhan kombinasi tarif / rate / naik kelas lalu dihitung
+sekaligus: Σ bulat(CBG × tarif) cukup dihitung sekali per nilai tarif unik.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+import pandas as pd
+
+SKALA        = 1_000_000     # rate & persen dalam ppm
+# Rupiah × ppm (≤ SKALA) harus muat di int64: batas nilai per SEP & total
+MAKS_RUPIAH  = np.iinfo("int64").max // SKALA - SKALA
+TARIF        = {"RI": 0.30, "RJ": 0.35}
+RATE_SELISIH = 0.05
+
+KOLOM_SKENARIO = ["tarif_ri", "tarif_rj", "rate_selisih", "nk_ri", "nk_rj"]
+
+# Proporsi kantong besar (%) dari data aktual ICHA Januari 2026
+KANTONG = {
+    "dr. Operator & dr. Spesialis": 34.29,
+    "dr. Umum":                      6.12,
+    "Perawat":                       24.81,
+    "Management Struktural":         12.11,
+    "Petugas Khusus":                 7.93,
+    "Farmasi":                        4.12,
+    "Management Administrasi":       10.62,
+}
+
+
+# ── ARITMETIKA RUPIAH ───────────────────────────────────────
+def ppm(rate) -> np.ndarray:
+    """Rate pecahan (0.30) → int64 per SKALA (300000); persis sampai 6 desimal."""
+    return np.rint(np.asarray(rate, dtype="float64") * SKALA).astype("int64")
+
+
+def bulat(x):
+    """Nilai berskala SKALA (int64) → rupiah, setengah ke atas."""
+    return (x + SKALA // 2) // SKALA
+
+
+def rupiah(nilai) -> int:
+    """Input bebas (int/float/str, mis. naik kelas) → rupiah bulat, setengah ke atas."""
+    return int(Decimal(str(nilai)).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def _cek_batas(x: np.ndarray):
+    """ValueError bila ada rupiah yang bisa overflow int64 saat dikali ppm."""
+    if x.size and (x.max() > MAKS_RUPIAH or x.min() < -MAKS_RUPIAH):
+        raise ValueError(f"nilai rupiah melebihi batas {MAKS_RUPIAH:,}")
+
+
+def _kali_jumlah(vec: np.ndarray, rate_ppm: np.ndarray) -> np.ndarray:
+    """Σ bulat(vec × rate) untuk tiap rate; satu lintasan vektor per rate unik."""
+    uniq, inv = np.unique(rate_ppm, return_inverse=True)
+    jumlah = np.array([bulat(vec * u).sum() for u in uniq.tolist()], dtype="int64")
+    return jumlah[inv]
+
+
+def bagi_kantong(total, kantong: dict = None) -> np.ndarray:
+    """Total rupiah (skalar atau vektor) → int64 [..., n_kantong] dengan Σ persis.
+
+    Target = bulat(total × Σ persen); bila Σ persen 100% target = total.
+    """
+    kantong = KANTONG if kantong is None else kantong
+    pct     = ppm(np.array(list(kantong.values()), dtype="float64") / 100)
+    total   = np.asarray(total, dtype="int64")
+    _cek_batas(total)
+    kali    = total[..., None] * pct
+    dasar   = kali // SKALA
+    sisa    = bulat(total * int(pct.sum())) - dasar.sum(axis=-1)
+    # Rupiah sisa ke pecahan terbesar; seri → urutan kantong
+    urut    = np.argsort(-(kali % SKALA), axis=-1, kind="stable")
+    peringkat = np.argsort(urut, axis=-1, kind="stable")
+    return dasar + (peringkat < sisa[..., None])
+
+
+# ── AGREGAT & DETAIL ────────────────────────────────────────
+def _vektor(df: pd.DataFrame):
+    cbg   = df["Disetujui"].to_numpy(dtype="int64")
+    biaya = df["Biaya Riil RS"].to_numpy(dtype="int64")
+    _cek_batas(cbg)
+    _cek_batas(biaya)
+    sel   = np.maximum(cbg - biaya, 0)
+    _cek_batas(sel)
+    return cbg, biaya, sel
+
+
+def agregat(df: pd.DataFrame) -> dict:
+    """Ringkasan satu sisi: total + vektor per SEP, cukup untuk skenario apa pun."""
+    cbg, biaya, sel = _vektor(df)
+    return {
+        "n_sep":         len(df),
+        "total_cbg":     int(cbg.sum()),
+        "total_biaya":   int(biaya.sum()),
+        "total_selisih": int(sel.sum()),
+        "cbg":           cbg,
+        "selisih":       sel,
+    }
+
+
+def detail(df: pd.DataFrame, tarif: float, rate_selisih: float = RATE_SELISIH) -> pd.DataFrame:
+    """Kolom jaspel per SEP (vektor, rupiah bulat), sama dengan rumus per baris ICHA."""
+    cbg, _, sel = _vektor(df)
+    jasa = bulat(cbg * ppm(tarif))
+    jsel = bulat(sel * ppm(rate_selisih))
+    df_out = df.copy()
+    df_out["Jasa Pelayanan"] = jasa
+    df_out["Selisih CBG"]    = sel
+    df_out["Jaspel Selisih"] = jsel
+    df_out["Total Jaspel"]   = jasa + jsel
+    return df_out
+
+
+def hitung_jaspel(df: pd.DataFrame, tarif: float, naik_kelas,
+                  rate_selisih: float = RATE_SELISIH) -> dict:
+    """Hitung jaspel per SEP sesuai rumus ICHA (satu sisi RI/RJ), semua dalam rupiah bulat."""
+    agg      = agregat(df)
+    df_out   = detail(df, tarif, rate_selisih)
+    jasa_pel = int(df_out["Jasa Pelayanan"].sum())
+    jsel     = int(df_out["Jaspel Selisih"].sum())
+    nk       = rupiah(naik_kelas)
+    subtotal = jasa_pel + jsel
+
+    return {
+        "n_sep":          agg["n_sep"],
+        "total_cbg":      agg["total_cbg"],
+        "total_biaya":    agg["total_biaya"],
+        "tarif":          tarif,
+        "jasa_pel":       jasa_pel,
+        "jaspel_selisih": jsel,
+        "naik_kelas":     nk,
+        "subtotal":       subtotal,
+        "final":          subtotal + nk,
+        "df_detail":      df_out,
+        "agg":            agg,
+    }
+
+
+# ── SKENARIO ────────────────────────────────────────────────
+def hitung(agg: dict, skenario, kantong: dict = None, icha=0) -> pd.DataFrame:
+    """Hitung banyak skenario sekaligus.
+
+    `agg`      = {"RI": agregat(...) | None, "RJ": ...}
+    `skenario` = DataFrame / list dict berkolom KOLOM_SKENARIO (kolom yang
+                 tidak ada memakai default: tarif standar, rate 5%, naik kelas 0).
+    Mengembalikan satu baris per skenario: jaspel RI/RJ, total (int64, sama
+    persis dengan hitung_jaspel untuk parameter yang sama), selisih vs ICHA
+    dan (bila `kantong` diberikan) nilai tiap kantong besar.
+    """
+    sk = pd.DataFrame(skenario)
+    n  = len(sk)
+
+    def kol(nama, default):
+        return sk[nama].to_numpy(dtype="float64") if nama in sk else np.full(n, default)
+
+    rate = ppm(kol("rate_selisih", RATE_SELISIH))
+    out  = {}
+    for kode in ("RI", "RJ"):
+        a = agg.get(kode)
+        if a is None:
+            out[f"jaspel_{kode.lower()}"] = np.zeros(n, dtype="int64")
+            continue
+        nk = np.array([rupiah(v) for v in kol(f"nk_{kode.lower()}", 0)], dtype="int64")
+        out[f"jaspel_{kode.lower()}"] = (_kali_jumlah(a["cbg"], ppm(kol(f"tarif_{kode.lower()}", TARIF[kode])))
+                                         + _kali_jumlah(a["selisih"], rate) + nk)
+    total = out["jaspel_ri"] + out["jaspel_rj"]
+    hasil = pd.concat([sk.reset_index(drop=True),
+                       pd.DataFrame({**out, "total": total})], axis=1)
+
+    icha = rupiah(icha)
+    if icha > 0:
+        hasil["selisih_icha"] = total - icha
+        hasil["pct_icha"]     = (total - icha) / icha * 100
+    if kantong:
+        hasil = pd.concat([hasil, pd.DataFrame(bagi_kantong(total, kantong), columns=list(kantong))], axis=1)
+    return hasil
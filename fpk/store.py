@@ -0,0 +1,128 @@
+import os
+import copy
+import json
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa advisory lock antar-proses
+    fcntl = None
+
+_stores      = {}
+_stores_lock = threading.Lock()
+
+
+class JsonStore:
+    """File JSON dengan tulis atomik, advisory lock & cache baca per mtime.
+
+    Baca cukup satu `os.stat` selama file tidak berubah; isi file hanya
+    di-parse ulang bila (inode, mtime, size) berbeda dari yang di-cache.
+    """
+
+    def __init__(self, path: str, default=None, indent=None):
+        self.path     = path
+        self.default  = default
+        self.indent   = indent
+        self._lock    = threading.RLock()
+        self._sig     = None
+        self._data    = None
+
+    # ── LOCK ────────────────────────────────────────────────
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.path + ".lock", "a") as lf:
+                fcntl.flock(lf, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _kosong(self):
+        return self.default() if callable(self.default) else copy.deepcopy(self.default)
+
+    def _load(self):
+        sig = self._signature()
+        if sig is not None and sig == self._sig:
+            return self._data
+        data = None
+        if sig is not None:
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+            except Exception:
+                data = None
+        self._sig, self._data = sig, data
+        return data
+
+    def _write(self, data):
+        folder = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=folder, prefix=".tmp_", suffix=".json")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, ensure_ascii=False, indent=self.indent)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        self._sig, self._data = self._signature(), copy.deepcopy(data)
+
+    # ── API ─────────────────────────────────────────────────
+    def exists(self) -> bool:
+        return self._signature() is not None
+
+    def read(self):
+        """Salinan isi file (atau default bila belum ada / rusak)."""
+        with self._lock:
+            if self._sig is not None and self._signature() == self._sig:
+                data = self._data
+            else:
+                with self._locked(exclusive=False):
+                    data = self._load()
+            return copy.deepcopy(data) if data is not None else self._kosong()
+
+    def write(self, data):
+        with self._locked(exclusive=True):
+            self._write(data)
+
+    def update(self, fn):
+        """Read-modify-write di bawah exclusive lock.
+
+        `fn(data)` mengubah data di tempat dan nilai kembaliannya diteruskan.
+        """
+        with self._locked(exclusive=True):
+            data = self._load()
+            data = copy.deepcopy(data) if data is not None else self._kosong()
+            hasil = fn(data)
+            self._write(data)
+            return hasil
+
+    def delete(self):
+        with self._locked(exclusive=True):
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self._sig, self._data = None, None
+
+
+def get_store(path: str, default=None, indent=None) -> JsonStore:
+    """Satu instance per path per proses, agar cache bertahan antar-rerun Streamlit."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = JsonStore(path, default=default, indent=indent)
+        return _stores[key]
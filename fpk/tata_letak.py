@@ -0,0 +1,290 @@
+"""Parser baris FPK berbasis posisi kata, langsung dari interpreter pdfminer.
+
+Tanpa objek per-karakter pdfplumber: huruf dicatat sebagai tuple ringan,
+digabung jadi kata lalu baris dalam satu lintasan per halaman. Batas kolom
+diambil dari garis vertikal tabel (PDF lattice) atau posisi judul kolom, dan
+diwariskan ke halaman lanjutan tanpa header. Baris baru dimulai oleh No. Urut
+di kolom pertama; sel terbungkus (tanggal + jam, No.SEP terpotong) digabung
+ke baris di atasnya. Baris yang tidak lolos pola kolom dilaporkan di
+`gagal`, bukan dibuang diam-diam.
+"""
+import re
+import bisect
+
+from fpk.skema import KOLOM, POLA_SEP
+
+_RP = r"[\d.,]+"
+
+# Semua regex dikompilasi sekali; salin & ubah dict ini untuk format lain
+KONFIG = {
+    # Judul kolom (kata pertama di header), urutan fpk.skema.KOLOM
+    "judul": [r"No\.?", r"No\.?\s?SEP", r"Tgl\.?", r"Biaya", r"Diajukan", r"Disetujui"],
+    # Pola isi sel setelah digabung
+    "pola": [r"\d+", POLA_SEP,
+             r"\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}(?: \d{1,2}[:.]\d{2}(?:[:.]\d{2})?)?",
+             _RP, _RP, _RP],
+    # Pemisah saat sel terbungkus ke baris berikutnya
+    "gabung": ["", "", " ", "", "", ""],
+    "spasi":         0.2,   # celah antar huruf > spasi × ukuran font → kata baru
+    "jarak_bungkus": 1.6,   # jarak baseline ≤ ini × ukuran font → masih sel yang sama
+}
+
+
+def kompilasi(konfig: dict) -> dict:
+    k = dict(konfig)
+    k["_judul"] = [re.compile(p + r"$") for p in konfig["judul"]]
+    k["_pola"]  = [re.compile(p + r"$") for p in konfig["pola"]]
+    k["_sep"]   = re.compile(konfig["pola"][1])
+    return k
+
+
+_DEFAULT = kompilasi(KONFIG)
+
+# Teks hasil OCR tidak punya posisi kata; cukup pola satu baris per SEP
+RE_BARIS = re.compile(rf'(\d+)\s+({POLA_SEP})\s+([\d/-]+)\s+([\d,]+)\s+([\d,]+)\s+([\d,]+)')
+
+
+def baris_dari_teks(text: str) -> list:
+    """Baris 6 kolom (string mentah) dari teks polos satu halaman (OCR)."""
+    return [m.groups() for m in RE_BARIS.finditer(text)]
+
+
+def baris_valid(rows, konfig=None) -> bool:
+    """True bila semua baris lolos pola kolom (mis. baris cache dari parser lain)."""
+    pola = (konfig or _DEFAULT)["_pola"]
+    return all(len(r) == len(pola) and all(isinstance(v, str) and p.match(v) for p, v in zip(pola, r))
+               for r in rows)
+
+
+# ── PEREKAM (DEVICE PDFMINER) ───────────────────────────────
+def _perekam_cls():
+    from pdfminer.pdfdevice import PDFTextDevice
+    from pdfminer.pdffont import PDFUnicodeNotDefined
+
+    class Perekam(PDFTextDevice):
+        """Catat huruf (x0, x1, baseline, teks, ukuran) & x garis vertikal."""
+
+        def __init__(self, rsrcmgr):
+            super().__init__(rsrcmgr)
+            self.huruf, self.garis_x, self._uni = [], [], {}
+
+        def begin_page(self, page, ctm):
+            self.ctm = ctm
+            self.huruf, self.garis_x = [], []
+
+        def render_string_horizontal(self, seq, matrix, pos, font, fontsize, scaling,
+                                     charspace, wordspace, rise, dxscale, ncs, graphicstate):
+            (x, y), (a, b, c, d, e, f) = pos, matrix
+            uni, catat = self._uni, self.huruf.append
+            ukuran = abs(fontsize * d) or fontsize
+            butuh_cs = False
+            for obj in seq:
+                if isinstance(obj, (int, float)):
+                    x -= obj * dxscale
+                    butuh_cs = True
+                    continue
+                if not isinstance(obj, bytes):
+                    continue
+                for cid in font.decode(obj):
+                    if butuh_cs:
+                        x += charspace
+                    kunci = (id(font), cid)
+                    teks  = uni.get(kunci)
+                    if teks is None:
+                        try:
+                            teks = font.to_unichr(cid)
+                        except PDFUnicodeNotDefined:
+                            teks = ""
+                        uni[kunci] = teks
+                    adv = font.char_width(cid) * fontsize * scaling
+                    x0  = a * x + c * y + e
+                    catat((x0, x0 + a * adv, b * x + d * y + f, teks, ukuran))
+                    x += adv
+                    if cid == 32 and wordspace:
+                        x += wordspace
+                    butuh_cs = True
+            return (x, y)
+
+        def paint_path(self, gstate, stroke, fill, evenodd, path):
+            ctm, cur = self.ctm, None
+            for seg in path:
+                op = seg[0]
+                if op in ("m", "l"):
+                    a, b, c, d, e, f = ctm
+                    px, py = seg[-2], seg[-1]
+                    pt = (a * px + c * py + e, b * px + d * py + f)
+                    if op == "l" and cur and abs(pt[0] - cur[0]) < 0.5 and abs(pt[1] - cur[1]) > 2:
+                        self.garis_x.append(pt[0])
+                    cur = pt
+                elif op != "h":
+                    cur = None
+
+    return Perekam
+
+
+# ── KATA & BARIS TEKS ───────────────────────────────────────
+def _kata(huruf, spasi):
+    """Huruf (urutan content stream) → kata [x0, x1, baseline, teks, ukuran]."""
+    kata, kini = [], None
+    for x0, x1, y, t, s in huruf:
+        if not t or t.isspace():
+            kini = None
+            continue
+        if (kini is not None and abs(y - kini[2]) < 0.3 * s
+                and -0.5 * s <= x0 - kini[1] <= spasi * s):
+            kini[1] = x1
+            kini[3] += t
+        else:
+            kini = [x0, x1, y, t, s]
+            kata.append(kini)
+    return kata
+
+
+def _baris_teks(kata):
+    """Kelompokkan kata per baseline (atas → bawah, kiri → kanan)."""
+    kata.sort(key=lambda k: (-k[2], k[0]))
+    baris, kini = [], None
+    for k in kata:
+        if kini is None or abs(kini[0][2] - k[2]) > 0.3 * k[4]:
+            kini = [k]
+            baris.append(kini)
+        else:
+            kini.append(k)
+    for b in baris:
+        b.sort(key=lambda k: k[0])
+    return baris
+
+
+def _batas_garis(garis_x, n_kolom):
+    """x pemisah kolom dari garis vertikal tabel lattice; None bila tidak cocok."""
+    xs = []
+    for x in sorted(garis_x):
+        if not xs or x - xs[-1] > 2:
+            xs.append(x)
+    return xs if len(xs) == n_kolom + 1 else None
+
+
+def _batas_judul(baris, k):
+    """x pemisah kolom dari posisi judul kolom; None bila baris bukan header."""
+    judul, j = k["_judul"], 0
+    posisi = []
+    for x0, _, _, t, s in baris:
+        if j < len(judul) and judul[j].match(t):
+            posisi.append(x0 - 0.25 * s)
+            j += 1
+    if j < len(judul):
+        return None
+    return [float("-inf")] + posisi[1:] + [float("inf")]
+
+
+# ── PARSER HALAMAN ──────────────────────────────────────────
+def urai_halaman(huruf, garis_x, batas=None, konfig=None) -> dict:
+    """Huruf satu halaman → {"rows", "gagal", "batas", "teks"}.
+
+    `batas` = pemisah kolom dari halaman sebelumnya (tabel berlanjut tanpa
+    header). "teks" berisi baris di luar tabel (judul, bulan pelayanan).
+    """
+    k     = konfig or _DEFAULT
+    n     = len(KOLOM)
+    pola, gabung = k["_pola"], k["gabung"]
+    rows, gagal, teks = [], [], []
+    batas = _batas_garis(garis_x, n) or batas
+    kini  = None   # [sel per kolom, baseline terakhir, ukuran]
+
+    def tutup():
+        sel = [gabung[i].join(kini[0][i]) for i in range(n)]
+        salah = [KOLOM[i] for i in range(n) if not pola[i].match(sel[i])]
+        if salah:
+            gagal.append({"baris": " | ".join(sel), "alasan": f"{', '.join(salah)} tidak sesuai format"})
+        else:
+            rows.append(tuple(sel))
+
+    for baris in _baris_teks(_kata(huruf, k["spasi"])):
+        b_judul = _batas_judul(baris, k)
+        if b_judul is not None:
+            # Header tabel (diulang per halaman); garis lattice lebih akurat bila ada
+            batas = _batas_garis(garis_x, n) or b_judul
+            if kini:
+                tutup()
+            kini = None
+            continue
+        y, s = baris[0][2], baris[0][4]
+        di_tabel = batas is not None and batas[0] <= baris[0][0] and baris[-1][1] <= batas[-1] + s
+        if not di_tabel:
+            if kini:
+                tutup()
+            kini = None
+            t = " ".join(w[3] for w in baris)
+            teks.append(t)
+            if k["_sep"].search(t.replace(" ", "")):
+                gagal.append({"baris": t, "alasan": "di luar kolom tabel"})
+            continue
+        sel = [[] for _ in range(n)]
+        for w in baris:
+            i = min(max(bisect.bisect_right(batas, (w[0] + w[1]) / 2) - 1, 0), n - 1)
+            sel[i].append(w[3])
+        if sel[0] and pola[0].match("".join(sel[0])):
+            if kini:
+                tutup()
+            kini = [sel, y, s]
+        elif kini and kini[1] - y <= k["jarak_bungkus"] * s:
+            for i in range(n):
+                kini[0][i].extend(sel[i])
+            kini[1] = y
+        else:
+            if kini:
+                tutup()
+            kini = None
+            t = " ".join(w[3] for w in baris)
+            if k["_sep"].search(t.replace(" ", "")):
+                gagal.append({"baris": t, "alasan": "baris tanpa No. Urut"})
+    if kini:
+        tutup()
+    return {"rows": rows, "gagal": gagal, "batas": batas, "teks": teks}
+
+
+def urai_pdf(f, lewati=(), konfig=None):
+    """Generator (no_halaman, total, hasil) untuk file biner PDF `f`.
+
+    Halaman dibaca lazy dari page tree; total diambil dari /Pages /Count,
+    jadi berhenti lebih awal (pratinjau) tidak perlu menelusuri semua halaman.
+    Halaman di `lewati` (mis. sudah ada di cache) tidak diinterpretasi;
+    hasilnya None. Sebelum halaman berikutnya di-parse, halaman yang dilewati
+    diinterpretasi mundur seperlunya sampai batas kolomnya ketemu, jadi
+    halaman lanjutan tanpa header tetap mewarisi batas yang benar.
+    """
+    from pdfminer.pdfparser import PDFParser
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.pdftypes import resolve1
+
+    doc     = PDFDocument(PDFParser(f))
+    halaman = PDFPage.create_pages(doc)
+    try:
+        total = int(resolve1(resolve1(doc.catalog["Pages"])["Count"]))
+    except Exception:
+        # /Count rusak atau tidak ada: telusuri page tree di depan
+        halaman = list(halaman)
+        total   = len(halaman)
+    rsrc    = PDFResourceManager(caching=True)
+    dev     = _perekam_cls()(rsrc)
+    interp  = PDFPageInterpreter(rsrc, dev)
+    batas   = None
+    lewat   = []    # halaman dilewati sejak halaman terakhir yang di-parse
+    for i, page in enumerate(halaman, 1):
+        if i in lewati:
+            lewat.append(page)
+            yield i, total, None
+            continue
+        for sebelum in reversed(lewat):
+            interp.process_page(sebelum)
+            b = urai_halaman(dev.huruf, dev.garis_x, None, konfig)["batas"]
+            if b is not None:
+                batas = b
+                break
+        lewat = []
+        interp.process_page(page)
+        hasil = urai_halaman(dev.huruf, dev.garis_x, batas, konfig)
+        batas = hasil["batas"]
+        yield i, total, hasil
@@ -0,0 +1,158 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from fpk import antrian, scratch
+from fpk.metadata import ambil_metadata_pdf, jumlah_halaman
+
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+POLL_DETIK  = 0.5
+
+
+# ── PRE-FLIGHT ──────────────────────────────────────────────
+def _probe(job: dict):
+    job["halaman"] = jumlah_halaman(job["path"])
+    if antrian.cek_admisi(job["size"], job["halaman"]):
+        return job
+    nama, tingkat = ambil_metadata_pdf(job["path"], job["hash"])
+    job["nama"], job["tingkat"] = nama, tingkat
+    return job
+
+
+def siapkan_upload(uploaded_files, pengguna=None) -> dict:
+    """Spool, hash & probe semua upload, buang duplikat identik, tangani tabrakan nama.
+
+    Upload ditulis per chunk ke area scratch (fpk.scratch) sambil di-hash —
+    tidak ada salinan bytes utuh di memori. Pemanggil wajib memanggil
+    `bersihkan_jobs(jobs)` di finally.
+
+    File yang lolos admission control (ukuran, jumlah halaman, kuota antrean
+    pengguna) masuk `jobs`; sisanya di `ditolak` beserta alasannya.
+    Hasil `jobs` sudah diurutkan dari file terbesar (LPT) untuk worker pool.
+    """
+    jobs, duplikat, ditolak, seen = [], [], [], {}
+    for urutan, uf in enumerate(uploaded_files):
+        # Ukuran dari metadata upload, tolak sebelum menulis apa pun ke disk
+        alasan = antrian.cek_admisi(getattr(uf, "size", 0))
+        if alasan:
+            ditolak.append({"nama_upload": uf.name, "alasan": alasan})
+            continue
+        try:
+            info = scratch.spool(uf)
+        except OSError as e:
+            ditolak.append({"nama_upload": uf.name, "alasan": f"gagal menyimpan upload: {e}"})
+            continue
+        digest = info["hash"]
+        if digest in seen:
+            scratch.hapus(info["path"])
+            duplikat.append({"nama_upload": uf.name,
+                             "sama_dengan": seen[digest]["nama_upload"]})
+            continue
+        job = {
+            "urutan":      urutan,
+            "nama_upload": uf.name,
+            "path":        info["path"],
+            "hash":        digest,
+            "size":        info["size"],
+        }
+        seen[digest] = job
+        jobs.append(job)
+
+    if jobs:
+        try:
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+                list(ex.map(_probe, jobs))
+        except BaseException:
+            bersihkan_jobs(jobs)
+            raise
+
+    kuota, lolos = antrian.sisa_kuota(pengguna), []
+    for job in jobs:
+        alasan = antrian.cek_admisi(job["size"], job["halaman"])
+        if not alasan and len(lolos) >= kuota:
+            alasan = f"antrean penuh (maks. {antrian.ANTRI_PER_PENGGUNA} file per pengguna)"
+        if alasan:
+            ditolak.append({"nama_upload": job["nama_upload"], "alasan": alasan})
+            bersihkan_jobs([job])
+        else:
+            lolos.append(job)
+    jobs = lolos
+
+    # Dua PDF berbeda bisa menghasilkan FPK_{tingkat}_{bulan}_{tahun} yang sama
+    tabrakan, dipakai = [], {}
+    for job in sorted(jobs, key=lambda j: j["urutan"]):
+        base = job["nama"]
+        n    = dipakai.get(base, 0) + 1
+        dipakai[base] = n
+        if n > 1:
+            job["nama"] = f"{base}_{n}"
+            tabrakan.append({"nama_upload": job["nama_upload"],
+                             "nama_asli": base, "nama_baru": job["nama"]})
+        job["filename"] = f"{job['nama']}.csv"
+
+    jobs.sort(key=lambda j: j["size"], reverse=True)
+    return {"jobs": jobs, "duplikat": duplikat, "tabrakan": tabrakan, "ditolak": ditolak}
+
+
+# ── WORKER POOL ─────────────────────────────────────────────
+def jalankan_jobs(jobs, fn, max_workers: int = MAX_WORKERS, pengguna=None, lapor=None,
+                  detak=None):
+    """Jalankan fn(job) di thread pool; yield (job, hasil, error) saat selesai.
+
+    Tiap job menunggu slot dari penjadwal server-wide (fpk.antrian) sebelum
+    mulai. Job dikirim sesuai urutan list (terbesar dulu) agar makespan
+    minimal. `lapor(posisi, n_menunggu)` dipanggil saat status antrean berubah
+    (posisi = posisi terdepan job sesi ini di antrean server, 0 bila tidak antre).
+    `detak()` dipanggil sekali setelah semua job dikirim lalu tiap putaran
+    poll, di thread pemanggil — tempat memperbarui UI progresif.
+    """
+    tiket = {}
+
+    def kerja(job):
+        # Tiket dibuat saat thread mulai, jadi slot tidak pernah diberikan ke
+        # job yang masih mengantre di executor (dan bisa dibatalkan)
+        t = tiket[id(job)] = antrian.ambil_tiket(pengguna)
+        if not antrian.tunggu(t):
+            raise RuntimeError("Dibatalkan sebelum mendapat giliran.")
+        try:
+            return fn(job)
+        finally:
+            antrian.lepas(t)
+
+    ex = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futs     = {ex.submit(kerja, job): job for job in jobs}
+        pending  = set(futs)
+        terakhir = None
+        if detak is not None:
+            detak()
+        while pending:
+            selesai, pending = wait(pending, timeout=POLL_DETIK, return_when=FIRST_COMPLETED)
+            if detak is not None:
+                detak()
+            if lapor is not None:
+                pos   = [p for p in (antrian.posisi(t) for t in list(tiket.values())) if p]
+                belum = sum(1 for f in pending if not f.running()) + len(pos)
+                info  = (min(pos) if pos else 0, belum)
+                if info != terakhir:
+                    terakhir = info
+                    lapor(*info)
+            for fut in selesai:
+                job = futs[fut]
+                try:
+                    yield job, fut.result(), None
+                except Exception as e:
+                    yield job, None, e
+    finally:
+        # Rerun/stop di tengah jalan: batalkan job yang belum mulai & tiket
+        # yang masih antre, lalu tunggu job yang sedang berjalan selesai
+        ex.shutdown(wait=False, cancel_futures=True)
+        for t in list(tiket.values()):
+            if t["status"] == "antri":
+                antrian.lepas(t)
+        ex.shutdown(wait=True)
+
+
+def bersihkan_jobs(jobs):
+    """Hapus file scratch hasil pre-flight; aman dipanggil ulang."""
+    for job in jobs:
+        scratch.hapus(job["path"])
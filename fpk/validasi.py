@@ -0,0 +1,82 @@
+"""Validasi baris SEP hasil ekstraksi (vektor, tanpa loop per baris).
+
+Hasilnya mask bit uint8 per baris — 1 byte/baris, murah disimpan di
+session & cukup untuk memfilter baris bermasalah saat ditampilkan.
+"""
+import numpy as np
+import pandas as pd
+
+from fpk.skema import POLA_SEP
+
+# Flag bit
+DUPLIKAT          = 1
+SEP_TIDAK_VALID   = 2
+NOMINAL_NOL       = 4   # Disetujui 0 / gagal dibaca (fillna(0) di bersihkan)
+OUTLIER           = 8
+MELEBIHI_DIAJUKAN = 16
+SEMUA             = 31  # gabungan semua flag
+
+LABEL = {
+    DUPLIKAT:          "No.SEP duplikat",
+    SEP_TIDAK_VALID:   "Format No.SEP tidak valid",
+    NOMINAL_NOL:       "Disetujui 0 / gagal dibaca",
+    OUTLIER:           "Disetujui outlier",
+    MELEBIHI_DIAJUKAN: "Disetujui > Diajukan",
+}
+
+# Format SEP yang sama dengan parser baris (fpk.tata_letak)
+RE_SEP = rf'^{POLA_SEP}$'
+
+# Modified z-score (Iglewicz & Hoaglin) atas log nominal; klaim CBG sangat
+# menceng ke kanan, jadi skala log lebih adil daripada nilai mentah.
+Z_OUTLIER = 3.5
+
+
+def _angka(s: pd.Series) -> np.ndarray:
+    """Kolom nominal → float64 (NaN bila gagal dibaca); kolom numerik dipakai langsung."""
+    if pd.api.types.is_numeric_dtype(s):
+        return s.to_numpy(dtype="float64", na_value=np.nan)
+    return pd.to_numeric(s.astype(str).str.replace(r'[^0-9]', '', regex=True),
+                         errors='coerce').to_numpy(dtype="float64", na_value=np.nan)
+
+
+def periksa(df: pd.DataFrame) -> np.ndarray:
+    """Mask flag per baris untuk DataFrame berkolom No.SEP, Disetujui (& Diajukan bila ada)."""
+    n    = len(df)
+    mask = np.zeros(n, dtype=np.uint8)
+    if not n:
+        return mask
+
+    sep = df['No.SEP'].astype(str)
+    mask[sep.duplicated(keep=False).to_numpy()] |= DUPLIKAT
+    mask[~sep.str.fullmatch(RE_SEP).to_numpy(dtype=bool, na_value=False)] |= SEP_TIDAK_VALID
+
+    setuju = _angka(df['Disetujui'])
+    nol    = ~(setuju > 0)            # NaN ikut tertandai
+    mask[nol] |= NOMINAL_NOL
+
+    pos = ~nol
+    if pos.sum() >= 10:
+        lg  = np.log(setuju[pos])
+        med = np.median(lg)
+        mad = np.median(np.abs(lg - med))
+        if mad > 0:
+            z = 0.6745 * (lg - med) / mad
+            idx = np.flatnonzero(pos)[np.abs(z) > Z_OUTLIER]
+            mask[idx] |= OUTLIER
+
+    if 'Diajukan' in df.columns:
+        aju = _angka(df['Diajukan'])
+        with np.errstate(invalid='ignore'):
+            mask[setuju > aju] |= MELEBIHI_DIAJUKAN
+    return mask
+
+
+def ringkas(mask: np.ndarray) -> dict:
+    """{label: jumlah baris} untuk flag yang muncul."""
+    return {LABEL[f]: int(np.count_nonzero(mask & f)) for f in LABEL if np.any(mask & f)}
+
+
+def keterangan(mask: np.ndarray) -> list:
+    """Teks flag per baris (hanya dipakai untuk baris yang ditampilkan)."""
+    return [", ".join(LABEL[f] for f in LABEL if m & f) for m in mask.tolist()]
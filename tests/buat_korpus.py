@@ -0,0 +1,211 @@
+"""Generator korpus PDF FPK sintetis + golden file untuk tes regresi.
+
+    python tests/buat_korpus.py
+
+Menulis tests/korpus/<kasus>.pdf dan tests/golden/<kasus>.json. Golden
+diturunkan dari spesifikasi kasus (kebenaran), bukan dari output parser,
+jadi parser yang salah baca akan gagal tes alih-alih ikut "dibekukan".
+
+Tabel digambar lengkap dengan garis sel (lattice) supaya bisa dibaca tabula
+dan pdfplumber seperti PDF asli dari aplikasi verifikasi BPJS.
+"""
+import os
+import json
+import random
+import zlib
+
+HERE       = os.path.dirname(os.path.abspath(__file__))
+KORPUS_DIR = os.path.join(HERE, "korpus")
+GOLDEN_DIR = os.path.join(HERE, "golden")
+
+HEADER_KOLOM = [("No.", "Urut"), ("No.SEP",), ("Tgl.", "Verifikasi"),
+                ("Biaya Riil", "RS"), ("Diajukan",), ("Disetujui",)]
+
+# Lebar kolom (pt) & margin
+LEBAR  = [40, 130, 85, 85, 85, 85]
+KIRI   = 36
+FONT   = 8
+BARIS  = 14      # tinggi baris satu-line
+BARIS2 = 24      # tinggi baris dengan sel dua baris
+
+
+def _esc(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _rp(n: int) -> str:
+    return f"{n:,}"
+
+
+class _Halaman:
+    """Kumpulan operator content stream satu halaman."""
+
+    def __init__(self, lebar, tinggi):
+        self.lebar, self.tinggi = lebar, tinggi
+        self.ops = []
+
+    def teks(self, x, y, s, ukuran=FONT):
+        self.ops.append(f"BT /F1 {ukuran} Tf {x:.1f} {y:.1f} Td ({_esc(s)}) Tj ET")
+
+    def garis(self, x1, y1, x2, y2):
+        self.ops.append(f"{x1:.1f} {y1:.1f} m {x2:.1f} {y2:.1f} l S")
+
+    def data(self) -> bytes:
+        return ("0.5 w\n" + "\n".join(self.ops)).encode("latin-1")
+
+
+def _pdf(halaman) -> bytes:
+    objs = []
+
+    def add(b):
+        objs.append(b)
+        return len(objs)
+
+    font  = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    pages = add(b"")
+    kids  = []
+    for h in halaman:
+        c  = zlib.compress(h.data())
+        cs = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(c) + c + b"\nendstream")
+        kids.append(add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+                        b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+                        % (pages, h.lebar, h.tinggi, font, cs)))
+    objs[pages - 1] = (b"<< /Type /Pages /Kids [%s] /Count %d >>"
+                       % (b" ".join(b"%d 0 R" % k for k in kids), len(kids)))
+    cat = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages)
+
+    out, offs = bytearray(b"%PDF-1.4\n"), []
+    for i, o in enumerate(objs, 1):
+        offs.append(len(out))
+        out += b"%d 0 obj\n" % i + o + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objs) + 1)
+    for o in offs:
+        out += b"%010d 00000 n \n" % o
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objs) + 1, cat, xref)
+    return bytes(out)
+
+
+def _baris_tabel(h, y, sel, tinggi):
+    """Satu baris tabel: sel = list kolom, tiap kolom list baris teks (rata atas)."""
+    x = KIRI
+    for lebar, isi in zip(LEBAR, sel):
+        for k, s in enumerate(isi):
+            h.teks(x + 3, y - 10 - k * 10, s)
+        h.garis(x, y, x, y - tinggi)
+        x += lebar
+    h.garis(x, y, x, y - tinggi)
+    h.garis(KIRI, y - tinggi, x, y - tinggi)
+
+
+def buat_pdf(kasus: dict) -> bytes:
+    lebar, tinggi = (842, 595) if kasus.get("landscape") else (595, 842)
+    halaman, h, y = [], None, 0
+    rows = kasus["rows"]
+    for i, r in enumerate(rows):
+        dua = bool(r.get("jam") or r.get("potong"))
+        t   = BARIS2 if dua else BARIS
+        if h is None or y - t < 40:
+            h = _Halaman(lebar, tinggi)
+            halaman.append(h)
+            y = tinggi - 40
+            if len(halaman) == 1:
+                h.teks(KIRI, y, "RINCIAN DATA HASIL VERIFIKASI", 11)
+                h.teks(KIRI, y - 16, f"Bulan Pelayanan : {kasus['bulan']}")
+                h.teks(KIRI, y - 28, f"Tingkat Pelayanan : {kasus['tingkat']}")
+                h.teks(KIRI, y - 40, "RS UMUM DAERAH (SINTETIS)")
+                y -= 56
+            if len(halaman) == 1 or kasus.get("header_ulang", True):
+                h.garis(KIRI, y, KIRI + sum(LEBAR), y)
+                _baris_tabel(h, y, [list(c) for c in HEADER_KOLOM], BARIS2)
+                y -= BARIS2
+            else:
+                h.garis(KIRI, y, KIRI + sum(LEBAR), y)
+        tgl = [r["tgl"]] + ([r["jam"]] if r.get("jam") else [])
+        k   = r.get("potong")
+        sep = [r["sep"][:k], r["sep"][k:]] if k else [r["sep"]]
+        _baris_tabel(h, y, [[str(i + 1)], sep, tgl,
+                            [_rp(r["biaya"])], [_rp(r["diajukan"])], [_rp(r["disetujui"])]], t)
+        y -= t
+    return _pdf(halaman)
+
+
+# ── KASUS ───────────────────────────────────────────────────
+def _sep(rng, kode="V", ppk="1028R") -> str:
+    return f"{ppk}{rng.randint(1, 999):03d}{rng.randint(1, 12):02d}{rng.randint(24, 26):02d}{kode}{rng.randint(0, 999999):06d}"
+
+
+def _rows(seed, n, nominal=None, jam_tiap=0, bulan=3, tahun=2026, ppk="1028R", potong_tiap=0):
+    rng  = random.Random(seed)
+    rows, seps = [], set()
+    for i in range(n):
+        sep = _sep(rng, ppk=ppk)
+        while sep in seps:
+            sep = _sep(rng, ppk=ppk)
+        seps.add(sep)
+        setuju = nominal(rng, i) if nominal else rng.randint(150_000, 45_000_000)
+        rows.append({
+            "sep":       sep,
+            "tgl":       f"{tahun}-{bulan:02d}-{rng.randint(1, 28):02d}",
+            "jam":       f"{rng.randint(7, 20):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}"
+                         if jam_tiap and i % jam_tiap == 0 else None,
+            # No.SEP terbungkus ke baris kedua sel
+            "potong":    13 if potong_tiap and i % potong_tiap == 0 else None,
+            "biaya":     max(0, setuju + rng.randint(-2_000_000, 2_000_000)),
+            "diajukan":  setuju + rng.randint(0, 3_000_000),
+            "disetujui": setuju,
+        })
+    return rows
+
+
+def _nominal_ekstrem(rng, i):
+    # < 1.000 (tanpa koma), ribuan, jutaan, ratusan juta & miliar (3 koma)
+    pilihan = [rng.randint(0, 999), rng.randint(1_000, 99_999), rng.randint(100_000, 9_999_999),
+               rng.randint(100_000_000, 999_999_999), rng.randint(1_000_000_000, 4_999_999_999)]
+    return pilihan[i % len(pilihan)]
+
+
+KASUS = {
+    # RI tingkat lanjut: beberapa halaman, header tabel diulang tiap halaman
+    "ritl_multi_halaman": {"tingkat": "RITL", "bulan": "MARET 2026",
+                           "rows": _rows(1, 130)},
+    # RJ tingkat lanjut: landscape, tabel berlanjut tanpa header di halaman berikut
+    "rjtl_lanjut_tanpa_header": {"tingkat": "RJTL", "bulan": "APRIL 2026", "landscape": True,
+                                 "header_ulang": False, "rows": _rows(2, 90, bulan=4)},
+    # RI tingkat pertama: sel dua baris (tanggal + jam) & header multi-line
+    "ritp_sel_multiline": {"tingkat": "RITP", "bulan": "JANUARI 2026",
+                           "rows": _rows(3, 70, jam_tiap=3, bulan=1)},
+    # RJ tingkat pertama: nominal < 1.000 sampai miliaran (pemisah ribuan koma)
+    "rjtp_pemisah_ribuan": {"tingkat": "RJTP", "bulan": "DESEMBER 2025",
+                            "rows": _rows(4, 60, nominal=_nominal_ekstrem, bulan=12, tahun=2025)},
+    # RI tingkat lanjut RS lain (kode PPK 0301): No.SEP sebagian terbungkus dua baris
+    "ritl_ppk_lain_sep_terbungkus": {"tingkat": "RITL", "bulan": "FEBRUARI 2026",
+                                     "rows": _rows(5, 80, bulan=2, ppk="0301R", potong_tiap=4)},
+}
+
+
+def golden(nama: str, kasus: dict) -> dict:
+    bulan, tahun = kasus["bulan"].split()
+    return {
+        "kasus":           nama,
+        "nama_file":       f"FPK_{kasus['tingkat']}_{bulan}_{tahun}",
+        "tingkat":         kasus["tingkat"],
+        "bulan_pelayanan": kasus["bulan"],
+        "kolom":           ["No.SEP", "Biaya Riil RS", "Diajukan", "Disetujui"],
+        "baris":           [[r["sep"], r["biaya"], r["diajukan"], r["disetujui"]] for r in kasus["rows"]],
+    }
+
+
+def main():
+    os.makedirs(KORPUS_DIR, exist_ok=True)
+    os.makedirs(GOLDEN_DIR, exist_ok=True)
+    for nama, kasus in KASUS.items():
+        with open(os.path.join(KORPUS_DIR, f"{nama}.pdf"), "wb") as f:
+            f.write(buat_pdf(kasus))
+        with open(os.path.join(GOLDEN_DIR, f"{nama}.json"), "w") as f:
+            json.dump(golden(nama, kasus), f, indent=1)
+        print(f"{nama}: {len(kasus['rows'])} baris")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+import os
+import sys
+import json
+import shutil
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+HERE       = os.path.dirname(os.path.abspath(__file__))
+KORPUS_DIR = os.path.join(HERE, "korpus")
+GOLDEN_DIR = os.path.join(HERE, "golden")
+KASUS      = sorted(f[:-4] for f in os.listdir(KORPUS_DIR) if f.endswith(".pdf"))
+
+ADA_JAVA = shutil.which("java") is not None
+
+
+def golden(kasus: str) -> dict:
+    with open(os.path.join(GOLDEN_DIR, f"{kasus}.json")) as f:
+        return json.load(f)
+
+
+def pdf_path(kasus: str) -> str:
+    return os.path.join(KORPUS_DIR, f"{kasus}.pdf")
+
+
+@pytest.fixture(autouse=True)
+def cache_terisolasi(tmp_path, monkeypatch):
+    """Cache halaman SQLite per tes, supaya hasil tidak datang dari run sebelumnya."""
+    from fpk import page_cache
+    monkeypatch.setattr(page_cache, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(page_cache, "DB_FILE", str(tmp_path / "halaman.sqlite"))
@@ -0,0 +1,55 @@
+"""Penjadwal slot (fpk.antrian): anggaran slot dibagi antar-proses lewat flock."""
+import os
+
+import pytest
+
+from fpk import antrian
+
+pytestmark = pytest.mark.skipif(antrian.fcntl is None, reason="butuh fcntl (flock)")
+
+
+@pytest.fixture
+def slot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(antrian, "SLOT_DIR", str(tmp_path / "slot"))
+    monkeypatch.setattr(antrian, "SLOT_MAX", 2)
+    monkeypatch.setattr(antrian, "SLOT_PER_PENGGUNA", 2)
+    monkeypatch.setattr(antrian, "POLL_SLOT", 0.05)
+    return tmp_path / "slot"
+
+
+def _pegang_semua(slot_dir):
+    """Tiru proses lain (mis. daemon) yang memegang semua slot."""
+    os.makedirs(slot_dir, exist_ok=True)
+    pegang = []
+    for i in range(antrian.SLOT_MAX):
+        f = open(slot_dir / f"slot{i}.lock", "a")
+        antrian.fcntl.flock(f, antrian.fcntl.LOCK_EX | antrian.fcntl.LOCK_NB)
+        pegang.append(f)
+    return pegang
+
+
+def test_slot_penuh_di_proses_lain_menahan_tiket(slot_dir):
+    pegang = _pegang_semua(slot_dir)
+    t = antrian.ambil_tiket("a")
+    try:
+        assert t["status"] == "antri"
+        assert not antrian.tunggu(t, timeout=0.2)
+        pegang.pop().close()
+        assert antrian.tunggu(t, timeout=1)
+    finally:
+        antrian.lepas(t)
+        for f in pegang:
+            f.close()
+
+
+def test_lepas_membuka_slot_untuk_proses_lain(slot_dir):
+    tiket = [antrian.ambil_tiket("a") for _ in range(antrian.SLOT_MAX)]
+    try:
+        assert all(t["status"] == "jalan" for t in tiket)
+        with pytest.raises(OSError):
+            _pegang_semua(slot_dir)
+    finally:
+        for t in tiket:
+            antrian.lepas(t)
+    for f in _pegang_semua(slot_dir):
+        f.close()
@@ -0,0 +1,40 @@
+"""Diff SEP antar versi dokumen (fpk.page_cache)."""
+from fpk import page_cache
+from fpk.page_cache import diff_sep, seps_dokumen
+
+
+def test_sep_ganda_disimpan_semua():
+    assert seps_dokumen(["A", "B", "A"], [100, 200, 300]) == {"A": [100, 300], "B": [200]}
+
+
+def test_sep_ganda_berubah_satu():
+    lama = seps_dokumen(["A", "A", "B"], [100, 100, 200])
+    baru = seps_dokumen(["A", "A", "B"], [100, 150, 200])
+    assert diff_sep(lama, baru) == {
+        "ditambah": [], "dihapus": [],
+        "berubah": [{"No.SEP": "A", "Lama": 100, "Baru": 150}]}
+
+
+def test_sep_ganda_dihapus_dan_ditambah_satu():
+    dua  = seps_dokumen(["A", "A"], [100, 100])
+    satu = seps_dokumen(["A"], [100])
+    assert diff_sep(dua, satu)["dihapus"] == ["A"]
+    assert diff_sep(satu, dua)["ditambah"] == ["A"]
+    assert diff_sep(dua, dua) == {"ditambah": [], "dihapus": [], "berubah": []}
+
+
+def test_urutan_baris_tidak_dianggap_berubah():
+    lama = seps_dokumen(["A", "A"], [100, 200])
+    assert diff_sep(lama, seps_dokumen(["A", "A"], [200, 100]))["berubah"] == []
+
+
+def test_versi_lama_tanpa_list_tetap_terbaca():
+    assert diff_sep({"A": 100, "B": 5}, seps_dokumen(["A", "C"], [120, 7])) == {
+        "ditambah": ["C"], "dihapus": ["B"],
+        "berubah": [{"No.SEP": "A", "Lama": 100, "Baru": 120}]}
+
+
+def test_dokumen_tersimpan_bolak_balik():
+    seps = seps_dokumen(["A", "A"], [100, 250])
+    page_cache.simpan_dokumen("x", "h1", seps)
+    assert page_cache.ambil_dokumen("x") == {"hash": "h1", "seps": seps}
@@ -0,0 +1,126 @@
+"""Daemon folder masuk (fpk.pengawas): debounce pemindai & klaim tepat sekali."""
+import os
+import shutil
+import time
+
+import pytest
+
+from conftest import pdf_path
+
+KASUS = "rjtp_pemisah_ribuan"
+
+
+@pytest.fixture
+def masuk(tmp_path, monkeypatch):
+    """Folder masuk kosong; riwayat & scratch terisolasi di tmp_path."""
+    from fpk import riwayat, scratch
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(riwayat, "DB_FILE", str(tmp_path / "riwayat.sqlite"))
+    monkeypatch.setattr(scratch, "SCRATCH_DIR", str(tmp_path / "scratch"))
+    folder = tmp_path / "masuk"
+    folder.mkdir()
+    return folder
+
+
+def _salin(folder, nama: str, mtime: float = None) -> str:
+    tujuan = str(folder / nama)
+    shutil.copyfile(pdf_path(KASUS), tujuan)
+    if mtime is not None:
+        os.utime(tujuan, (mtime, mtime))
+    return tujuan
+
+
+# ── DEBOUNCE ────────────────────────────────────────────────
+def test_file_baru_menunggu_jeda(masuk):
+    from fpk.pengawas import Pemindai
+
+    path = _salin(masuk, "a.pdf")
+    p = Pemindai(str(masuk), jeda=10)
+    t0 = time.monotonic()
+    assert p.pindai(t0) == ([], 1)
+    assert p.pindai(t0 + 5) == ([], 1)
+    siap, menunggu = p.pindai(t0 + 11)
+    assert [s[0] for s in siap] == [path] and menunggu == 0
+
+
+def test_file_berubah_mengulang_jeda(masuk):
+    from fpk.pengawas import Pemindai
+
+    path = _salin(masuk, "a.pdf")
+    p = Pemindai(str(masuk), jeda=10)
+    t0 = time.monotonic()
+    p.pindai(t0)
+    with open(path, "ab") as f:
+        f.write(b"\n")
+    assert p.pindai(t0 + 8) == ([], 1)
+    assert p.pindai(t0 + 15) == ([], 1)
+    assert len(p.pindai(t0 + 19)[0]) == 1
+
+
+def test_tanpa_eof_ditunggu_lebih_lama(masuk):
+    from fpk.pengawas import Pemindai
+
+    path = str(masuk / "terpotong.pdf")
+    with open(pdf_path(KASUS), "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(data[:len(data) // 2])
+    p = Pemindai(str(masuk), jeda=10)
+    t0 = time.monotonic()
+    p.pindai(t0)
+    assert p.pindai(t0 + 11) == ([], 1)
+    assert len(p.pindai(t0 + 101)[0]) == 1
+
+
+def test_file_lama_langsung_siap_dan_tandai(masuk):
+    from fpk.pengawas import Pemindai
+
+    path = _salin(masuk, "a.pdf", mtime=time.time() - 3600)
+    p = Pemindai(str(masuk), jeda=10)
+    siap, _ = p.pindai()
+    assert [s[0] for s in siap] == [path]
+    p.tandai(*siap[0])
+    assert p.pindai() == ([], 0)
+
+
+def test_abaikan_file_sementara(masuk):
+    from fpk.pengawas import Pemindai
+
+    _salin(masuk, "a.pdf.part", mtime=time.time() - 3600)
+    _salin(masuk, "~$b.pdf", mtime=time.time() - 3600)
+    assert Pemindai(str(masuk), jeda=10).pindai() == ([], 0)
+
+
+# ── KLAIM TEPAT SEKALI ──────────────────────────────────────
+def test_klaim_sekali_per_hash(masuk):
+    from fpk import riwayat
+
+    assert riwayat.klaim_berkas("abc", "/x/a.pdf", 1, 1)
+    assert not riwayat.klaim_berkas("abc", "/x/b.pdf", 1, 1)
+
+
+def test_salinan_isi_sama_tidak_diproses_ulang(masuk):
+    from fpk import scratch
+    from fpk.pengawas import _siapkan
+
+    a = _salin(masuk, "a.pdf", mtime=time.time() - 3600)
+    b = _salin(masuk, "salinan a.pdf", mtime=time.time() - 3600)
+    job = _siapkan(a, os.path.getsize(a), os.stat(a).st_mtime_ns, set())
+    try:
+        assert job is not None and job["nama"].startswith("FPK_")
+        assert _siapkan(b, os.path.getsize(b), os.stat(b).st_mtime_ns, set()) is None
+        # Path + ukuran + mtime yang sama langsung dikenali tanpa di-hash ulang
+        assert _siapkan(a, os.path.getsize(a), os.stat(a).st_mtime_ns, set()) is None
+    finally:
+        scratch.hapus(job["path"])
+
+
+def test_gagal_baca_tidak_ditandai(masuk):
+    from fpk.pengawas import proses
+
+    hilang = str(masuk / "hilang.pdf")
+    ditandai = []
+    assert proses([(hilang, 100, 1)], str(masuk / "keluar"),
+                  lambda *a: ditandai.append(a)) == 0
+    assert ditandai == []
@@ -0,0 +1,139 @@
+"""Regresi akurasi & performa parser FPK terhadap korpus sintetis (tests/korpus).
+
+Golden file dibuat oleh tests/buat_korpus.py dari spesifikasi kasus. Tes
+tabula (FPK Converter) dilewati bila Java tidak tersedia.
+
+Anggaran waktu/memori bisa dilonggarkan di mesin lambat lewat env
+FPK_ANGGARAN_FAKTOR (mis. 2 = dua kali lipat).
+"""
+import os
+import time
+import tracemalloc
+
+import pytest
+
+from conftest import ADA_JAVA, KASUS, golden, pdf_path
+
+FAKTOR = float(os.environ.get("FPK_ANGGARAN_FAKTOR", "1"))
+
+# Seluruh korpus (5 PDF, 12 halaman, 430 SEP)
+ANGGARAN = {
+    "audit":  {"detik": 4.0,  "mb": 25},
+    "tabula": {"detik": 30.0, "mb": 60},
+}
+
+perlu_java = pytest.mark.skipif(not ADA_JAVA, reason="tabula butuh Java")
+
+
+def _baris(df, kolom):
+    return df[kolom].astype(object).values.tolist()
+
+
+def _ukur(fn, paths):
+    """(detik, puncak MB) — waktu diukur tanpa tracemalloc agar tidak ikut melambat."""
+    t0 = time.perf_counter()
+    for p in paths:
+        fn(p)
+    detik = time.perf_counter() - t0
+    tracemalloc.start()
+    try:
+        for p in paths:
+            fn(p)
+        _, puncak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return detik, puncak / 1e6
+
+
+# ── METADATA ────────────────────────────────────────────────
+@pytest.mark.parametrize("kasus", KASUS)
+def test_metadata(kasus):
+    from fpk.metadata import ambil_metadata_pdf, probe_metadata
+
+    g = golden(kasus)
+    assert ambil_metadata_pdf(pdf_path(kasus)) == (g["nama_file"], g["tingkat"])
+    assert probe_metadata(pdf_path(kasus))["bulan_pelayanan"] == g["bulan_pelayanan"]
+
+
+# ── AUDIT (pdfplumber) ──────────────────────────────────────
+@pytest.mark.parametrize("kasus", KASUS)
+def test_audit_extract_pdf(kasus):
+    from fpk.audit_pdf import extract_pdf
+
+    g = golden(kasus)
+    with open(pdf_path(kasus), "rb") as f:
+        df, bulan, err = extract_pdf(f.read())
+    assert err is None
+    assert bulan == g["bulan_pelayanan"]
+    assert _baris(df, g["kolom"]) == g["baris"]
+    assert df.attrs["tidak_terbaca"] == []
+
+
+@pytest.mark.parametrize("lewati", [{1}, {1, 2}])
+def test_batas_warisan_setelah_halaman_cache(lewati, monkeypatch):
+    """Halaman lanjutan tanpa header (dan tanpa garis) setelah halaman yang
+    dilewati (cache) tetap mewarisi batas kolom dari header di halaman 1."""
+    import io
+    from fpk import tata_letak
+
+    monkeypatch.setattr(tata_letak, "_batas_garis", lambda garis_x, n: None)
+    with open(pdf_path("rjtl_lanjut_tanpa_header"), "rb") as f:
+        data = f.read()
+    penuh   = [h for _, _, h in tata_letak.urai_pdf(io.BytesIO(data))]
+    parsial = [h for _, _, h in tata_letak.urai_pdf(io.BytesIO(data), lewati)]
+    for i, (a, b) in enumerate(zip(penuh, parsial), 1):
+        if i in lewati:
+            assert b is None
+        else:
+            assert a["rows"] and b["rows"] == a["rows"]
+
+
+def test_anggaran_audit():
+    from fpk.audit_pdf import extract_pdf
+
+    data = []
+    for k in KASUS:
+        with open(pdf_path(k), "rb") as f:
+            data.append(f.read())
+    extract_pdf(data[0])  # pemanasan import
+    detik, mb = _ukur(extract_pdf, data)
+    assert detik <= ANGGARAN["audit"]["detik"] * FAKTOR, f"audit: {detik:.2f} s"
+    assert mb <= ANGGARAN["audit"]["mb"] * FAKTOR, f"audit: puncak {mb:.1f} MB"
+
+
+# ── FPK CONVERTER (tabula) ──────────────────────────────────
+@perlu_java
+@pytest.mark.parametrize("kasus", KASUS)
+def test_process_data(kasus):
+    from fpk.extract import process_data
+
+    g   = golden(kasus)
+    df  = process_data(pdf_path(kasus), lengkap=True)
+    assert _baris(df, g["kolom"]) == g["baris"]
+
+    csv = process_data(pdf_path(kasus))
+    assert list(csv.columns) == ["No.SEP", "Disetujui"]
+    assert _baris(csv, ["No.SEP", "Disetujui"]) == [[b[0], b[3]] for b in g["baris"]]
+
+
+@perlu_java
+@pytest.mark.parametrize("kasus", KASUS)
+def test_process_data_incremental(kasus):
+    from fpk.extract import process_data_incremental
+    from fpk.metadata import jumlah_halaman
+
+    g = golden(kasus)
+    df, info = process_data_incremental(pdf_path(kasus), lengkap=True)
+    assert _baris(df, g["kolom"]) == g["baris"]
+    assert info["halaman"] == info["diekstrak"] == jumlah_halaman(pdf_path(kasus))
+
+
+@perlu_java
+def test_anggaran_tabula():
+    from fpk.extract import process_data
+
+    paths = [pdf_path(k) for k in KASUS]
+    process_data(paths[0])  # pemanasan JVM / import
+    detik, mb = _ukur(process_data, paths)
+    assert detik <= ANGGARAN["tabula"]["detik"] * FAKTOR, f"tabula: {detik:.2f} s"
+    assert mb <= ANGGARAN["tabula"]["mb"] * FAKTOR, f"tabula: puncak {mb:.1f} MB"
@@ -0,0 +1,114 @@
+"""Aritmetika rupiah jaspel (fpk.skenario): pembulatan, kantong besar, skenario."""
+from decimal import Decimal, ROUND_HALF_UP
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fpk import skenario
+from fpk.skenario import KANTONG, RATE_SELISIH, TARIF
+
+
+def _df(cbg, biaya=None):
+    biaya = [0] * len(cbg) if biaya is None else biaya
+    return pd.DataFrame({"Disetujui": np.array(cbg, dtype="int64"),
+                         "Biaya Riil RS": np.array(biaya, dtype="int64")})
+
+
+def _tepat(rp: int, rate: float) -> int:
+    """Referensi: rp × rate dengan Decimal, setengah ke atas."""
+    return int((Decimal(rp) * Decimal(str(rate))).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+# ── PEMBULATAN ──────────────────────────────────────────────
+@pytest.mark.parametrize("cbg, tarif, harapan", [
+    (15, 0.30, 5),       # 4.5  → 5
+    (5, 0.10, 1),        # 0.5  → 1
+    (25, 0.30, 8),       # 7.5  → 8
+    (14, 0.25, 4),       # 3.5  → 4
+    (13, 0.30, 4),       # 3.9  → 4
+    (11, 0.30, 3),       # 3.3  → 3
+])
+def test_setengah_ke_atas(cbg, tarif, harapan):
+    assert int(skenario.bulat(cbg * skenario.ppm(tarif))) == harapan
+    hasil = skenario.hitung_jaspel(_df([cbg]), tarif, 0, rate_selisih=0)
+    assert hasil["jasa_pel"] == harapan
+
+
+def test_rupiah_setengah_ke_atas():
+    assert skenario.rupiah("2.5") == 3
+    assert skenario.rupiah(1.5) == 2
+    assert skenario.rupiah("1000.49") == 1000
+
+
+def test_total_sama_dengan_jumlah_detail():
+    rng = np.random.default_rng(1)
+    cbg = rng.integers(100_000, 50_000_000, 500)
+    df  = _df(cbg, cbg - rng.integers(-2_000_000, 2_000_000, 500))
+    h   = skenario.hitung_jaspel(df, 0.30, "1250.5")
+    d   = h["df_detail"]
+    assert h["jasa_pel"] == d["Jasa Pelayanan"].sum() == sum(_tepat(int(c), 0.30) for c in cbg)
+    assert h["jaspel_selisih"] == d["Jaspel Selisih"].sum()
+    assert h["final"] == d["Total Jaspel"].sum() + 1251
+
+
+# ── KANTONG BESAR ───────────────────────────────────────────
+@pytest.mark.parametrize("total", [0, 1, 2, 6, 7, 99, 12_345, 987_654_321])
+def test_jumlah_kantong_sama_dengan_total(total):
+    pct = sum(KANTONG.values())
+    k   = skenario.bagi_kantong(total)
+    assert k.dtype == np.int64 and (k >= 0).all()
+    assert k.sum() == _tepat(total, pct / 100)
+
+
+def test_kantong_100_persen_persis():
+    kantong = {"a": 33.33, "b": 33.33, "c": 33.34}
+    total   = np.array([0, 1, 2, 100, 1_000_001])
+    k       = skenario.bagi_kantong(total, kantong)
+    assert k.sum(axis=-1).tolist() == total.tolist()
+    # Tiap kantong menyimpang < 1 rupiah dari pecahan tepatnya
+    tepat = total[:, None] * np.array([33.33, 33.33, 33.34]) / 100
+    assert (np.abs(k - tepat) < 1).all()
+
+
+# ── SKENARIO vs HITUNG_JASPEL ───────────────────────────────
+def test_hitung_sama_dengan_hitung_jaspel_default():
+    rng = np.random.default_rng(7)
+    df  = {kode: _df(c, c - rng.integers(-3_000_000, 1_000_000, len(c)))
+           for kode, c in (("RI", rng.integers(1_000_000, 90_000_000, 300)),
+                           ("RJ", rng.integers(100_000, 3_000_000, 800)))}
+    agg = {kode: skenario.agregat(d) for kode, d in df.items()}
+    h   = skenario.hitung(agg, [{}])
+    for kode in ("RI", "RJ"):
+        ref = skenario.hitung_jaspel(df[kode], TARIF[kode], 0, RATE_SELISIH)
+        assert h[f"jaspel_{kode.lower()}"].iloc[0] == ref["final"]
+    assert h["total"].iloc[0] == h["jaspel_ri"].iloc[0] + h["jaspel_rj"].iloc[0]
+
+
+def test_hitung_banyak_skenario_sama_dengan_satu_per_satu():
+    df  = _df([1_234_567, 7_654_321, 15], [1_000_000, 8_000_000, 0])
+    agg = {"RI": skenario.agregat(df), "RJ": None}
+    sk  = [{"tarif_ri": t, "rate_selisih": r, "nk_ri": nk}
+           for t in (0.25, 0.30, 0.333333) for r in (0.0, 0.05) for nk in (0, "10.5")]
+    h   = skenario.hitung(agg, sk)
+    for i, s in enumerate(sk):
+        ref = skenario.hitung_jaspel(df, s["tarif_ri"], s["nk_ri"], s["rate_selisih"])
+        assert h["jaspel_ri"].iloc[i] == ref["final"]
+    assert (h["jaspel_rj"] == 0).all()
+
+
+# ── BATAS INT64 ─────────────────────────────────────────────
+def test_cbg_besar_tanpa_overflow():
+    maks = skenario.MAKS_RUPIAH
+    df   = _df([maks, maks - 1, 1])
+    h    = skenario.hitung_jaspel(df, 0.999999, 0, rate_selisih=1.0)
+    assert h["jasa_pel"] == sum(_tepat(c, 0.999999) for c in (maks, maks - 1, 1))
+    k = skenario.bagi_kantong(maks)
+    assert k.sum() == _tepat(maks, sum(KANTONG.values()) / 100)
+
+
+def test_cbg_di_atas_batas_ditolak():
+    with pytest.raises(ValueError):
+        skenario.agregat(_df([skenario.MAKS_RUPIAH + 1]))
+    with pytest.raises(ValueError):
+        skenario.bagi_kantong(skenario.MAKS_RUPIAH + 1)